@@ -1,175 +1,602 @@
-import sqlite3
-from datetime import datetime, date
+import re
+import threading
+from collections.abc import Mapping
+from contextlib import contextmanager
+from difflib import SequenceMatcher
+from datetime import datetime, date, timedelta
+from itertools import islice
+
+import database
+import db
+import medical
+import perf
+import stats
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+BULK_CHUNK_SIZE = 5000
+PAGE_SIZE = 50
+
+# -------------------------------
+# TABLE VERSIONS
+# -------------------------------
+# Readers (see cache.py) compare counters to tell whether data they built
+# earlier is still current. The table_versions table is bumped by triggers
+# on every write, from any process; the in-process counters below are bumped
+# once a write here has committed and also cover whole-database changes
+# (migration, restore) that can bring old counter values back.
+_table_versions = {"students": 0, "entry_logs": 0, "medical_info": 0, "leave_requests": 0, "presence": 0,
+                   "rooms": 0}
+_versions_lock = threading.Lock()
+
+def table_versions(*tables):
+    with db.connection() as conn:
+        stored = dict(conn.execute(
+            f"SELECT name, version FROM table_versions WHERE name IN ({','.join('?' * len(tables))})", tables))
+    return tuple((_table_versions.get(t, 0), stored.get(t, 0)) for t in tables)
+
+def bump_versions(*tables):
+    with _versions_lock:
+        for t in tables:
+            _table_versions[t] = _table_versions.get(t, 0) + 1
+
+def bump_all_versions():
+    """After the whole database changed underneath (migration, restore)."""
+    bump_versions(*list(_table_versions))
+
+@contextmanager
+def _write(*tables):
+    with db.transaction() as conn:
+        yield conn
+    bump_versions(*tables)
+
 
 # -------------------------------
 # DATABASE INITIALIZATION
 # -------------------------------
 def init_db():
-    conn = sqlite3.connect("hostel.db")
-    c = conn.cursor()
-
-    # Create Students table
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS students (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT,
-            dept TEXT,
-            year INTEGER,
-            contact TEXT,
-            guardian TEXT,
-            guardian_contact TEXT,
-            room_no TEXT
-        )
-    """)
-
-    # Create Entry Logs table
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS entry_logs (
-            log_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            student_id INTEGER,
-            entry_time TEXT,
-            exit_time TEXT,
-            status TEXT,
-            FOREIGN KEY (student_id) REFERENCES students(id)
-        )
-    """)
-
-    # Create Medical Info table
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS medical_info (
-            student_id INTEGER PRIMARY KEY,
-            blood_group TEXT,
-            allergies TEXT,
-            conditions TEXT,
-            emergency_contact TEXT,
-            FOREIGN KEY (student_id) REFERENCES students(id)
-        )
-    """)
-
-    # Create Leave Requests table
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS leave_requests (
-            request_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            student_id INTEGER,
-            from_date TEXT,
-            to_date TEXT,
-            reason TEXT,
-            status TEXT DEFAULT 'Pending',
-            FOREIGN KEY (student_id) REFERENCES students(id)
-        )
-    """)
-
-    conn.commit()
-    conn.close()
+    with db.connection() as conn:
+        applied = database.migrate(conn)
+    if applied:
+        bump_all_versions()
+    medical.encrypt_leftovers()  # so pre-encryption records show up in emergency lookups
 
 
 # -------------------------------
 # STUDENT FUNCTIONS
 # -------------------------------
-def add_student(name, dept, year, contact, guardian, guardian_contact, room_no):
-    conn = sqlite3.connect("hostel.db")
-    c = conn.cursor()
-    c.execute("""
-        INSERT INTO students (name, dept, year, contact, guardian, guardian_contact, room_no)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    """, (name, dept, year, contact, guardian, guardian_contact, room_no))
-    conn.commit()
-    conn.close()
+def add_student(name, dept, year, contact, guardian, guardian_contact, room_no, gender=None):
+    with _write("students", "rooms") as conn:
+        cur = conn.execute("""
+            INSERT INTO students (name, dept, year, contact, guardian, guardian_contact, gender)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (name, dept, year, contact, guardian, guardian_contact, _gender(gender)))
+        assign_room(conn, cur.lastrowid, room_no)
+
+def _gender(value):
+    """'m' -> 'M'; blank -> None. Needed before a student can go into a gendered block."""
+    value = (value or "").strip().upper() or None
+    if value not in (None, "M", "F"):
+        raise ValueError(f"gender must be M, F or blank, got {value!r}")
+    return value
+
+def assign_room(conn, student_id, room_no, create=True):
+    """Put a student in room_no through allocations, inside the caller's transaction.
+
+    An empty room_no vacates the student's bed. A room number that is not in
+    rooms yet is created at database.DEFAULT_ROOM_CAPACITY, as the rooms
+    migration did for free-text rooms (create=False refuses it instead).
+    Raises ValueError when the room is full or in a block for the other gender.
+    """
+    room_no = (room_no or "").strip()
+    if not room_no:
+        conn.execute("DELETE FROM allocations WHERE student_id = ?", (student_id,))
+        return
+    if create:
+        block = block_of(room_no)
+        conn.execute("INSERT OR IGNORE INTO blocks (block) VALUES (?)", (block,))
+        conn.execute("INSERT OR IGNORE INTO rooms (room_no, block, capacity) VALUES (?, ?, ?)",
+                     (room_no, block, database.DEFAULT_ROOM_CAPACITY))
+    room = conn.execute("""
+        SELECT r.capacity - r.occupied, b.gender FROM rooms r JOIN blocks b ON b.block = r.block
+        WHERE r.room_no = ?
+    """, (room_no,)).fetchone()
+    if room is None:
+        raise ValueError(f"Unknown room {room_no!r}")
+    student = conn.execute("""
+        SELECT s.gender, a.room_no FROM students s LEFT JOIN allocations a ON a.student_id = s.id
+        WHERE s.id = ?
+    """, (student_id,)).fetchone()
+    if student is None:
+        raise ValueError(f"Unknown student {student_id}")
+    free, block_gender = room
+    gender, current = student
+    if current == room_no:
+        return
+    if free <= 0:
+        raise ValueError(f"Room {room_no} is full")
+    if block_gender is not None and gender != block_gender:
+        raise ValueError(f"Room {room_no} is in a {block_gender} block")
+    now = datetime.now().strftime(TIME_FORMAT)
+    if current is None:
+        conn.execute("INSERT INTO allocations (student_id, room_no, allocated_at) VALUES (?, ?, ?)",
+                     (student_id, room_no, now))
+    else:
+        conn.execute("UPDATE allocations SET room_no = ?, allocated_at = ? WHERE student_id = ?",
+                     (room_no, now, student_id))
+
+def block_of(room_no):
+    """Hostel block of a room: "A-101" -> "A". Rooms without a prefix map to "*"."""
+    if not room_no or "-" not in room_no:
+        return "*"
+    return room_no.split("-", 1)[0].strip().upper() or "*"
+
+# The original eight columns; gender (added with rooms) is read separately.
+STUDENT_SELECT = "id, name, dept, year, contact, guardian, guardian_contact, room_no"
 
 def view_students():
-    conn = sqlite3.connect("hostel.db")
-    c = conn.cursor()
-    c.execute("SELECT * FROM students")
-    data = c.fetchall()
-    conn.close()
-    return data
+    with db.connection() as conn:
+        return conn.execute(f"SELECT {STUDENT_SELECT} FROM students").fetchall()
+
+# room_no goes through assign_room(), so it is checked against the room's free beds.
+STUDENT_FIELDS = ("name", "dept", "year", "contact", "guardian", "guardian_contact", "room_no", "gender")
+
+def update_student(student_id, **fields):
+    unknown = set(fields) - set(STUDENT_FIELDS)
+    if unknown:
+        raise ValueError(f"Cannot update {sorted(unknown)}; choose from {STUDENT_FIELDS}")
+    if not fields:
+        return
+    if "gender" in fields:
+        fields["gender"] = _gender(fields["gender"])
+    columns = [f for f in STUDENT_FIELDS if f in fields and f != "room_no"]
+    with _write("students", "rooms") as conn:
+        if columns:
+            conn.execute(f"UPDATE students SET {', '.join(c + '=?' for c in columns)} WHERE id=?",
+                         [fields[c] for c in columns] + [student_id])
+        if "room_no" in fields:
+            assign_room(conn, student_id, fields["room_no"])
 
 def delete_student(student_id):
-    conn = sqlite3.connect("hostel.db")
-    c = conn.cursor()
-    c.execute("DELETE FROM students WHERE id=?", (student_id,))
-    c.execute("DELETE FROM entry_logs WHERE student_id=?", (student_id,))
-    c.execute("DELETE FROM leave_requests WHERE student_id=?", (student_id,))
-    c.execute("DELETE FROM medical_info WHERE student_id=?", (student_id,))
-    conn.commit()
-    conn.close()
+    with _write("students", "entry_logs", "medical_info", "leave_requests", "rooms") as conn:
+        # entry_logs, leave_requests, medical_info and the student's bed
+        # allocation follow via ON DELETE CASCADE.
+        conn.execute("DELETE FROM students WHERE id=?", (student_id,))
 
 
 # -------------------------------
 # ENTRY LOG FUNCTIONS
 # -------------------------------
+# A check-in is logged without exit_time, a check-out with one; see
+# movement_row() and database.checkin_sql().
 def add_entry(student_id, entry_time=None, exit_time=None, status="On Time"):
-    conn = sqlite3.connect("hostel.db")
-    c = conn.cursor()
     if not entry_time:
-        entry_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    c.execute("""
-        INSERT INTO entry_logs (student_id, entry_time, exit_time, status)
-        VALUES (?, ?, ?, ?)
-    """, (student_id, entry_time, exit_time, status))
-    conn.commit()
-    conn.close()
+        entry_time = datetime.now().strftime(TIME_FORMAT)
+    with _write("entry_logs") as conn:
+        conn.execute("""
+            INSERT INTO entry_logs (student_id, entry_time, exit_time, status)
+            VALUES (?, ?, ?, ?)
+        """, (student_id, entry_time, exit_time, status))
+
+def movement_row(student_id, at, checkout=False):
+    """The (student_id, entry_time[, exit_time]) log row for a gate movement at `at`."""
+    return (student_id, at, at) if checkout else (student_id, at)
 
 def view_logs():
-    conn = sqlite3.connect("hostel.db")
-    c = conn.cursor()
-    c.execute("SELECT * FROM entry_logs")
-    data = c.fetchall()
-    conn.close()
-    return data
+    with db.connection() as conn:
+        return conn.execute("SELECT * FROM entry_logs").fetchall()
+
+
+# -------------------------------
+# PRESENCE FUNCTIONS
+# -------------------------------
+# Backed by the presence table, which a trigger on entry_logs keeps current
+# (see database.py). Students with no gate activity yet count as inside.
+
+def presence_of(student_id):
+    with db.connection() as conn:
+        return conn.execute(
+            "SELECT state, since, log_id FROM presence WHERE student_id=?", (student_id,)
+        ).fetchone()
+
+def who_is_out():
+    with db.connection() as conn:
+        return conn.execute("""
+            SELECT p.student_id, s.name, s.room_no, p.since
+            FROM presence p JOIN students s ON s.id = p.student_id
+            WHERE p.state = 'out'
+            ORDER BY p.since
+        """).fetchall()
+
+def not_returned_by(cutoff):
+    """Students who went out before cutoff ("YYYY-MM-DD HH:MM:SS") and are still out."""
+    with db.connection() as conn:
+        return conn.execute("""
+            SELECT p.student_id, s.name, s.room_no, p.since
+            FROM presence p JOIN students s ON s.id = p.student_id
+            WHERE p.state = 'out' AND p.since < ?
+            ORDER BY p.since
+        """, (str(cutoff),)).fetchall()
+
+def headcount():
+    with db.connection() as conn:
+        total, out = conn.execute("""
+            SELECT (SELECT COUNT(*) FROM students),
+                   (SELECT COUNT(*) FROM presence WHERE state = 'out')
+        """).fetchone()
+    return {"total": total, "in": total - out, "out": out}
+
+def rebuild_presence():
+    with _write("presence") as conn:
+        database.rebuild_presence(conn)
 
 
 # -------------------------------
 # MEDICAL INFO FUNCTIONS
 # -------------------------------
-def add_medical_info(student_id, blood_group, allergies, conditions, emergency_contact):
-    conn = sqlite3.connect("hostel.db")
-    c = conn.cursor()
-    c.execute("""
-        INSERT OR REPLACE INTO medical_info 
-        (student_id, blood_group, allergies, conditions, emergency_contact)
-        VALUES (?, ?, ?, ?, ?)
-    """, (student_id, blood_group, allergies, conditions, emergency_contact))
-    conn.commit()
-    conn.close()
+# Fields are encrypted at rest and every access is logged; see medical.py.
+def add_medical_info(student_id, blood_group, allergies, conditions, emergency_contact, actor=None):
+    with _write("medical_info") as conn:
+        medical.store_many(conn, [(student_id, blood_group, allergies, conditions, emergency_contact)], actor)
 
-def view_medical_info(student_id):
-    conn = sqlite3.connect("hostel.db")
-    c = conn.cursor()
-    c.execute("SELECT * FROM medical_info WHERE student_id=?", (student_id,))
-    data = c.fetchone()
-    conn.close()
-    return data
+def view_medical_info(student_id, actor=None):
+    with db.transaction() as conn:
+        return medical.read(conn, student_id, actor)
 
 
 # -------------------------------
 # LEAVE REQUEST FUNCTIONS
 # -------------------------------
 def add_leave_request(student_id, from_date, to_date, reason):
-    conn = sqlite3.connect("hostel.db")
-    c = conn.cursor()
-    c.execute("""
-        INSERT INTO leave_requests (student_id, from_date, to_date, reason)
-        VALUES (?, ?, ?, ?)
-    """, (student_id, from_date, to_date, reason))
-    conn.commit()
-    conn.close()
+    with _write("leave_requests") as conn:
+        conn.execute("""
+            INSERT INTO leave_requests (student_id, from_date, to_date, reason)
+            VALUES (?, ?, ?, ?)
+        """, (student_id, from_date, to_date, reason))
 
 def view_leave_requests():
-    conn = sqlite3.connect("hostel.db")
-    c = conn.cursor()
-    c.execute("SELECT * FROM leave_requests")
-    data = c.fetchall()
-    conn.close()
-    return data
+    with db.connection() as conn:
+        return conn.execute("SELECT * FROM leave_requests").fetchall()
+
+def update_leave_status(request_id, new_status, changed_by=None, note=None):
+    """Set one request's status without checks; leaves.set_status() is the checked version."""
+    with _write("leave_requests") as conn:
+        conn.execute("""
+            INSERT INTO leave_history (request_id, old_status, new_status, changed_by, note, changed_at)
+            SELECT request_id, status, ?, ?, ?, ? FROM leave_requests WHERE request_id = ?
+        """, (new_status, changed_by, note, datetime.now().strftime(TIME_FORMAT), request_id))
+        conn.execute("UPDATE leave_requests SET status=? WHERE request_id=?", (new_status, request_id))
+
+
+# -------------------------------
+# STUDENT SEARCH
+# -------------------------------
+# Words in the query must all prefix-match some field (name, dept, room,
+# contact or guardian), ranked by bm25 with name hits weighted highest. If
+# that finds fewer than `limit` students, names sharing trigrams with the
+# query are re-scored by similarity so small typos still match.
+
+SEARCH_WEIGHTS = (10.0, 2.0, 4.0, 3.0, 1.0, 1.0)  # same order as database.SEARCH_COLUMNS
+FUZZY_CANDIDATES = 200
+FUZZY_MIN_SCORE = 0.75
+
+def _words(text):
+    return re.findall(r"\w+", text.lower())
 
-def update_leave_status(request_id, new_status):
-    conn = sqlite3.connect("hostel.db")
-    c = conn.cursor()
-    c.execute("UPDATE leave_requests SET status=? WHERE request_id=?", (new_status, request_id))
-    conn.commit()
-    conn.close()
+def _similarity(words, name):
+    targets = _words(name or "")
+    if not targets:
+        return 0.0
+    return sum(max(SequenceMatcher(None, w, t).ratio() for t in targets) for w in words) / len(words)
 
+def search_students(query, limit=10):
+    """Ranked (id, name, dept, room_no, contact) matches for a search box."""
+    words = _words(query or "")
+    if not words:
+        return []
+    columns = "s.id, s.name, s.dept, s.room_no, s.contact"
+    with db.connection() as conn:
+        results = []
+        if query.strip().isdigit():
+            results += conn.execute(f"SELECT {columns} FROM students s WHERE s.id = ?", (int(query),)).fetchall()
+        weights = ", ".join(map(str, SEARCH_WEIGHTS))
+        results += conn.execute(f"""
+            SELECT {columns} FROM students_fts f JOIN students s ON s.id = f.rowid
+            WHERE students_fts MATCH ?
+            ORDER BY bm25(students_fts, {weights}) LIMIT ?
+        """, (" ".join(f'"{w}"*' for w in words), limit)).fetchall()
+        grams = {w[i:i + 3] for w in words for i in range(len(w) - 2)}
+        if len(results) < limit and grams:
+            seen = {r[0] for r in results}
+            candidates = conn.execute(f"""
+                SELECT {columns} FROM students_trigram t JOIN students s ON s.id = t.rowid
+                WHERE students_trigram MATCH ?
+                ORDER BY rank LIMIT ?
+            """, (" OR ".join(f'"{g}"' for g in sorted(grams)), FUZZY_CANDIDATES)).fetchall()
+            scored = [(_similarity(words, row[1]), row) for row in candidates if row[0] not in seen]
+            scored.sort(key=lambda pair: -pair[0])
+            results += [row for score, row in scored if score >= FUZZY_MIN_SCORE]
+    unique = {}
+    for row in results:
+        unique.setdefault(row[0], row)
+    return list(unique.values())[:limit]
+
+
+# -------------------------------
+# FILTERED / PAGED QUERIES
+# -------------------------------
+# Keyset pagination: pass the id of the last row you already have as
+# after_id to get the next page. The sort column's value is looked up from
+# that row, so paging stays an index range scan however deep you go.
+
+STUDENT_SORT_KEYS = ("id", "name", "dept", "year", "room_no")
+LOG_SORT_KEYS = ("log_id", "entry_time")
+LOG_COLUMN_INDEX = {"log_id": 0, "entry_time": 2}
+LEAVE_SORT_KEYS = ("request_id", "from_date", "to_date")
+
+def _page(conn, table, id_col, columns, joins, where, params, sort, sort_keys,
+          descending, after_id, limit, after_key=None):
+    if sort not in sort_keys:
+        raise ValueError(f"Cannot sort {table} by {sort!r}; choose one of {sort_keys}")
+    op, direction = ("<", "DESC") if descending else (">", "ASC")
+    where, params = list(where), list(params)
+    if after_key is not None:
+        # (sort value, id) of the last row seen, already looked up by the caller.
+        where.append(f"(t.{sort}, t.{id_col}) {op} (?, ?)")
+        params.extend(after_key)
+    elif after_id is not None:
+        where.append(f"(t.{sort}, t.{id_col}) {op} "
+                     f"(SELECT {sort}, {id_col} FROM {table} WHERE {id_col} = ?)")
+        params.append(after_id)
+    sql = f"SELECT {columns} FROM {table} t {joins}"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += f" ORDER BY t.{sort} {direction}, t.{id_col} {direction} LIMIT ?"
+    params.append(limit)
+    return conn.execute(sql, params).fetchall()
+
+def _student_filters(where, params, dept, room_no, alias):
+    if dept is not None:
+        where.append(f"{alias}.dept = ?")
+        params.append(dept)
+    if room_no is not None:
+        where.append(f"{alias}.room_no = ?")
+        params.append(room_no)
+
+def _day_after(day):
+    return str(date.fromisoformat(str(day)) + timedelta(days=1))
+
+def query_students(dept=None, room_no=None, year=None, sort="id", descending=False,
+                   after_id=None, limit=PAGE_SIZE):
+    where, params = [], []
+    _student_filters(where, params, dept, room_no, "t")
+    if year is not None:
+        where.append("t.year = ?")
+        params.append(year)
+    with db.connection() as conn:
+        columns = ", ".join("t." + c for c in STUDENT_SELECT.split(", "))
+        return _page(conn, "students", "id", columns, "", where, params,
+                     sort, STUDENT_SORT_KEYS, descending, after_id, limit)
+
+def query_logs(student_id=None, date_from=None, date_to=None, status=None, dept=None,
+               room_no=None, sort="log_id", descending=False, after_id=None, limit=PAGE_SIZE):
+    where, params = [], []
+    if student_id is not None:
+        where.append("t.student_id = ?")
+        params.append(student_id)
+    if date_from is not None:
+        where.append("t.entry_time >= ?")
+        params.append(str(date_from))
+    if date_to is not None:
+        where.append("t.entry_time < ?")
+        params.append(_day_after(date_to))
+    if status is not None:
+        where.append("t.status = ?")
+        params.append(status)
+    joins = ""
+    if dept is not None or room_no is not None:
+        joins = "JOIN students s ON s.id = t.student_id"
+        _student_filters(where, params, dept, room_no, "s")
+    with db.connection() as conn:
+        archives = _archives_for(conn, date_from, date_to)
+        if not archives:
+            return _page(conn, "entry_logs", "log_id", "t.*", joins, where, params,
+                         sort, LOG_SORT_KEYS, descending, after_id, limit)
+        return _fan_out_logs(conn, archives, joins, where, params, sort, descending, after_id, limit)
+
+
+# Rows moved out by retention.py live in per-month archive databases listed
+# in log_archives. A log query only reaches them when its date range does.
+def _archives_for(conn, date_from, date_to):
+    if date_from is None and date_to is None:
+        return []
+    return [path for (path,) in conn.execute("""
+        SELECT path FROM log_archives WHERE month >= ? AND month <= ? ORDER BY month
+    """, (str(date_from or "")[:7], str(date_to or "9999-12")[:7]))]
+
+
+def _fan_out_logs(conn, archives, joins, where, params, sort, descending, after_id, limit):
+    # Archives are attached one at a time (SQLite allows only ten at once).
+    # Each source returns its own first `limit` rows past the cursor; the
+    # merged, re-sorted result is cut back down to `limit`.
+    if sort not in LOG_SORT_KEYS:
+        raise ValueError(f"Cannot sort entry_logs by {sort!r}; choose one of {LOG_SORT_KEYS}")
+    after_key = None
+    if after_id is not None:
+        lookup = f"SELECT {sort}, log_id FROM {{}} WHERE log_id = ?"
+        row = conn.execute(lookup.format("entry_logs"), (after_id,)).fetchone()
+        for path in archives:
+            if row:
+                break
+            with db.attached(conn, path, "arc"):
+                row = conn.execute(lookup.format("arc.entry_logs"), (after_id,)).fetchone()
+        if row is None:
+            return []
+        after_key = tuple(row)
+    rows = _page(conn, "entry_logs", "log_id", "t.*", joins, where, params,
+                 sort, LOG_SORT_KEYS, descending, after_id, limit, after_key)
+    for path in archives:
+        with db.attached(conn, path, "arc"):
+            rows += _page(conn, "arc.entry_logs", "log_id", "t.*", joins, where, params,
+                          sort, LOG_SORT_KEYS, descending, after_id, limit, after_key)
+    # An interrupted archive run can leave a row in both places.
+    merged = {row[0]: row for row in rows}
+    key = LOG_COLUMN_INDEX[sort]
+    return sorted(merged.values(), key=lambda r: (r[key], r[0]), reverse=descending)[:limit]
+
+def query_leave_requests(student_id=None, date_from=None, date_to=None, status=None, dept=None,
+                         room_no=None, sort="request_id", descending=False, after_id=None,
+                         limit=PAGE_SIZE):
+    where, params = [], []
+    if student_id is not None:
+        where.append("t.student_id = ?")
+        params.append(student_id)
+    # A leave matches a date range when the two intervals overlap.
+    if date_from is not None:
+        where.append("t.to_date >= ?")
+        params.append(str(date_from))
+    if date_to is not None:
+        where.append("t.from_date <= ?")
+        params.append(str(date_to))
+    if status is not None:
+        where.append("t.status = ?")
+        params.append(status)
+    joins = ""
+    if dept is not None or room_no is not None:
+        joins = "JOIN students s ON s.id = t.student_id"
+        _student_filters(where, params, dept, room_no, "s")
+    with db.connection() as conn:
+        return _page(conn, "leave_requests", "request_id", "t.*", joins, where, params,
+                     sort, LEAVE_SORT_KEYS, descending, after_id, limit)
+
+
+# -------------------------------
+# BULK WRITE FUNCTIONS
+# -------------------------------
+# Rows are tuples in the same order as add_student()/add_entry() arguments,
+# or dicts keyed by argument name. Invalid rows are reported and skipped;
+# the rest of the batch is still written. Each chunk is one transaction;
+# chunk_size=None writes the whole batch in a single transaction.
+
+def _student_row(name, dept, year, contact, guardian, guardian_contact, room_no, gender=None):
+    if not name or not str(name).strip():
+        raise ValueError("name is required")
+    try:
+        year = int(year)
+    except (TypeError, ValueError):
+        raise ValueError(f"year must be an integer, got {year!r}")
+    if not 1 <= year <= 5:
+        raise ValueError(f"year must be between 1 and 5, got {year}")
+    return (str(name).strip(), dept, year, contact, guardian, guardian_contact, _gender(gender), room_no)
+
+def _entry_row(student_id, entry_time=None, exit_time=None, status="On Time"):
+    if isinstance(student_id, bool) or not isinstance(student_id, int):
+        raise ValueError(f"student_id must be an integer, got {student_id!r}")
+    if not entry_time:
+        entry_time = datetime.now().strftime(TIME_FORMAT)
+    for label, value in (("entry_time", entry_time), ("exit_time", exit_time)):
+        if value is not None:
+            # fromisoformat is much cheaper than strptime on big batches;
+            # the length check pins it to the TIME_FORMAT layout.
+            try:
+                if len(value) != 19 or value[10] != " ":
+                    raise ValueError
+                datetime.fromisoformat(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"{label} must look like YYYY-MM-DD HH:MM:SS, got {value!r}")
+    return (student_id, entry_time, exit_time, status)
+
+def _prepare(rows, start, make_row):
+    good, errors = [], []
+    for index, row in enumerate(rows, start):
+        try:
+            values = make_row(**row) if isinstance(row, Mapping) else make_row(*row)
+        except (TypeError, ValueError) as e:
+            errors.append((index, row, str(e)))
+        else:
+            good.append((index, row, values))
+    return good, errors
+
+def _chunks(iterable, chunk_size):
+    if chunk_size is None:
+        yield list(iterable)
+        return
+    it = iter(iterable)
+    while True:
+        chunk = list(islice(it, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def _insert_many(conn, table, sql, rows):
+    if not rows:
+        return []
+    conn.executemany(sql, rows)
+    # AUTOINCREMENT ids are handed out contiguously while this transaction
+    # holds the write lock, so the last sequence value pins down the range.
+    last = conn.execute("SELECT seq FROM sqlite_sequence WHERE name=?", (table,)).fetchone()[0]
+    return list(range(last - len(rows) + 1, last + 1))
+
+def existing_student_ids(conn, student_ids):
+    known = set()
+    ids = list(student_ids)
+    for i in range(0, len(ids), 500):
+        part = ids[i:i + 500]
+        marks = ",".join("?" * len(part))
+        known.update(r[0] for r in conn.execute(f"SELECT id FROM students WHERE id IN ({marks})", part))
+    return known
+
+def add_students_bulk(rows, chunk_size=BULK_CHUNK_SIZE):
+    ids, errors, offset = [], [], 0
+    for chunk in _chunks(rows, chunk_size):
+        good, bad = _prepare(chunk, offset, _student_row)
+        errors.extend(bad)
+        offset += len(chunk)
+        with _write("students", "rooms") as conn:
+            new_ids = _insert_many(conn, "students", """
+                INSERT INTO students (name, dept, year, contact, guardian, guardian_contact, gender)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, [values[:-1] for _, _, values in good])
+            # Rooms are allocated one by one so each sees the beds the ones before took.
+            rejected = set()
+            for (index, row, values), sid in zip(good, new_ids):
+                try:
+                    assign_room(conn, sid, values[-1])
+                except ValueError as e:
+                    errors.append((index, row, str(e)))
+                    rejected.add(sid)
+            conn.executemany("DELETE FROM students WHERE id = ?", [(sid,) for sid in rejected])
+            ids.extend(sid for sid in new_ids if sid not in rejected)
+    errors.sort(key=lambda e: e[0])
+    return ids, errors
+
+def insert_entries(conn, rows, offset=0):
+    """Validate and insert log rows on conn inside the caller's transaction."""
+    good, bad = _prepare(rows, offset, _entry_row)
+    known = existing_student_ids(conn, {values[0] for _, _, values in good})
+    for index, row, values in good:
+        if values[0] not in known:
+            bad.append((index, row, f"unknown student_id {values[0]}"))
+    ids = _insert_many(conn, "entry_logs", """
+        INSERT INTO entry_logs (student_id, entry_time, exit_time, status)
+        VALUES (?, ?, ?, ?)
+    """, [values for _, _, values in good if values[0] in known])
+    return ids, sorted(bad, key=lambda e: e[0])
+
+def add_entries_bulk(rows, chunk_size=BULK_CHUNK_SIZE):
+    ids, errors, offset = [], [], 0
+    for chunk in _chunks(rows, chunk_size):
+        with _write("entry_logs") as conn:
+            new_ids, bad = insert_entries(conn, chunk, offset)
+        ids.extend(new_ids)
+        errors.extend(bad)
+        offset += len(chunk)
+    return ids, errors
+
+
+# -------------------------------
+# INSTRUMENTATION
+# -------------------------------
+perf.instrument(globals(), "backend", skip=("table_versions", "bump_versions", "block_of"))
 
 # -------------------------------
 # RUN DATABASE INITIALIZATION & DEMO DATA
@@ -199,19 +626,17 @@ if __name__ == "__main__":
         ("Arjun Yadav", "CIVIL", 2, "9912345678", "Mahesh Yadav", "9456123098", "D-115"),
     ]
 
-    for s in sample_students:
-        try:
-            add_student(*s)
-        except:
-            pass
+    student_ids, _ = add_students_bulk(sample_students)
 
-    print("✅ Added 15 demo students")
+    print(f"✅ Added {len(student_ids)} demo students")
 
     # --- Add demo logs ---
-    for sid in range(1, 16):
-        for _ in range(random.randint(1, 3)):
-            entry_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            add_entry(sid, entry_time, None, random.choice(["Checked-In", "Checked-Out", "On Time"]))
+    entry_time = datetime.now().strftime(TIME_FORMAT)
+    add_entries_bulk(
+        (sid, entry_time, None, random.choice(["Checked-In", "Checked-Out", "On Time"]))
+        for sid in student_ids
+        for _ in range(random.randint(1, 3))
+    )
 
     print("✅ Added demo entry logs")
 
@@ -0,0 +1,237 @@
+import os
+import re
+import sqlite3
+import time
+from datetime import datetime
+
+import backend
+import db
+
+# -------------------------------
+# ONLINE BACKUP
+# -------------------------------
+# Snapshots are copied with SQLite's backup API while the app keeps
+# running: PAGES_PER_STEP pages at a time with a short pause in between,
+# so a step never holds the database for long and, with WAL, writers are
+# not blocked at all. A write from another connection makes SQLite start
+# the copy again; after MAX_RESTARTS of those the rest is copied in one
+# step (a single read snapshot) so a busy gate cannot starve the backup.
+#
+# A snapshot is written to a .partial file, switched out of WAL mode, run
+# through PRAGMA integrity_check and only then renamed to
+# backups/hostel-YYYYmmdd-HHMMSS[-N].db (backups/<hostel_id>/ for hostel
+# shards), so every file with that name is a verified copy. Snapshots
+# never change afterwards, which is what lets db.configure_replica() serve
+# them read-only to the analytics pages.
+
+BACKUP_DIR = os.environ.get("HOSTEL_BACKUP_DIR", "backups")
+KEEP = int(os.environ.get("HOSTEL_BACKUP_KEEP", "14"))
+PAGES_PER_STEP = 256
+STEP_PAUSE = 0.005  # seconds between steps
+MAX_RESTARTS = 3
+PREFIX = "hostel-"
+STAMP = "%Y%m%d-%H%M%S"
+_NAME = re.compile(re.escape(PREFIX) + r"(\d{8}-\d{6})(?:-(\d+))?\.db")
+
+
+class _Restarted(Exception):
+    pass
+
+
+def backup_dir():
+    return os.path.abspath(os.path.join(BACKUP_DIR, db.current_hostel() or ""))
+
+
+def _copy(src, dest, pages=PAGES_PER_STEP, pause=STEP_PAUSE):
+    """Copy src into dest in steps; returns how many times SQLite had to start over."""
+    restarts = 0
+    remaining = None
+
+    def progress(status, left, total):
+        nonlocal remaining, restarts
+        if remaining is not None and left > remaining:
+            restarts += 1
+            if restarts > MAX_RESTARTS:
+                raise _Restarted
+        remaining = left
+        if left and pause:
+            time.sleep(pause)
+
+    try:
+        src.backup(dest, pages=pages, progress=progress)
+    except _Restarted:
+        src.backup(dest)
+    return restarts
+
+
+def verify(path):
+    """Problems found in a snapshot; an empty list means it is sound."""
+    if not os.path.exists(path):
+        return [f"{path} does not exist"]
+    try:
+        conn = sqlite3.connect(f"file:{os.path.abspath(path)}?mode=ro", uri=True)
+        try:
+            problems = [row[0] for row in conn.execute("PRAGMA integrity_check")]
+            if problems == ["ok"]:
+                problems = []
+            if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'schema_version'").fetchone():
+                problems.append("not a hostel database (no schema_version)")
+        finally:
+            conn.close()
+    except sqlite3.DatabaseError as e:
+        return [str(e)]
+    return problems
+
+
+def snapshot(directory=None, keep=KEEP, now=None):
+    """Copy the current hostel's database into a new verified snapshot. Returns its path."""
+    directory = directory or backup_dir()
+    os.makedirs(directory, exist_ok=True)
+    # Replicas answer trend charts from daily_stats, so bring it up to date first.
+    backend.stats.refresh_daily_stats()
+    stem = os.path.join(directory, f"{PREFIX}{(now or datetime.now()):{STAMP}}")
+    path, n = stem + ".db", 1
+    while os.path.exists(path):  # never overwrite, e.g. a restore's safety copy taken in the same second
+        path, n = f"{stem}-{n}.db", n + 1
+    partial = path + ".partial"
+    if os.path.exists(partial):
+        os.remove(partial)
+
+    dest = sqlite3.connect(partial)
+    try:
+        with db.connection() as conn:
+            _copy(conn, dest)
+        dest.execute("PRAGMA journal_mode=DELETE")
+    finally:
+        dest.close()
+    problems = verify(partial)
+    if problems:
+        os.remove(partial)
+        raise RuntimeError(f"Snapshot failed verification: {problems[0]}")
+    os.replace(partial, path)
+    if keep:
+        rotate(keep, directory)
+    return path
+
+
+def snapshots(directory=None):
+    """(path, taken_at, bytes) for each finished snapshot, newest first."""
+    directory = directory or backup_dir()
+    if not os.path.isdir(directory):
+        return []
+    found = []
+    for name in os.listdir(directory):
+        match = _NAME.fullmatch(name)
+        if not match:
+            continue
+        path = os.path.join(directory, name)
+        found.append((path, datetime.strptime(match[1], STAMP), int(match[2] or 0), os.path.getsize(path)))
+    return [(path, taken, size) for path, taken, _, size in sorted(found, key=lambda s: s[1:3], reverse=True)]
+
+
+def latest(directory=None):
+    found = snapshots(directory)
+    return found[0][0] if found else None
+
+
+def rotate(keep=KEEP, directory=None):
+    """Delete all but the newest `keep` snapshots. Returns the removed paths."""
+    removed = []
+    for path, _, _ in snapshots(directory)[keep:]:
+        os.remove(path)
+        removed.append(path)
+    return removed
+
+
+def restore(path):
+    """Replace the current hostel's database with a snapshot, keeping a copy of what was there.
+
+    Runs against the live database: the copy is one backup step, so other
+    connections see either the old data or the restored data, never a mix.
+    Returns the path of the safety snapshot taken first.
+    """
+    problems = verify(path)
+    if problems:
+        raise ValueError(f"Refusing to restore {path}: {problems[0]}")
+    safety = snapshot(keep=None)
+    src = sqlite3.connect(f"file:{os.path.abspath(path)}?mode=ro", uri=True)
+    try:
+        with db.connection() as conn:
+            src.backup(conn)
+    finally:
+        src.close()
+    backend.init_db()  # an older snapshot may need newer migrations
+    backend.bump_all_versions()
+    return safety
+
+
+def use_latest():
+    """Point the current hostel's replica at its newest snapshot. Returns (path, taken_at) or None."""
+    found = snapshots()
+    if not found:
+        db.configure_replica(None, db.current_hostel())
+        return None
+    path, taken, _ = found[0]
+    db.configure_replica(path, db.current_hostel())
+    return path, taken
+
+
+def watch(every=3600.0, keep=KEEP):
+    """Snapshot every hostel every `every` seconds."""
+    import shards
+
+    while True:
+        for hostel_id in shards.hostels():
+            with db.use(hostel_id):
+                path = snapshot(keep=keep)
+            print(f"{datetime.now():%H:%M:%S} 💾 {path}")
+        time.sleep(every)
+
+
+# -------------------------------
+# COMMAND LINE
+# -------------------------------
+if __name__ == "__main__":
+    import argparse
+
+    import shards
+
+    parser = argparse.ArgumentParser(description="Online snapshots of the hostel database.")
+    parser.add_argument("--hostel", help="hostel id from the hostel map (default: every hostel / hostel.db)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_snap = sub.add_parser("snapshot", help="take a verified snapshot now")
+    p_snap.add_argument("--keep", type=int, default=KEEP)
+    p_watch = sub.add_parser("watch", help="take snapshots on a schedule")
+    p_watch.add_argument("--every", type=float, default=3600.0, help="seconds between snapshots")
+    p_watch.add_argument("--keep", type=int, default=KEEP)
+    sub.add_parser("list", help="show snapshots")
+    p_verify = sub.add_parser("verify", help="integrity-check a snapshot (default: all)")
+    p_verify.add_argument("path", nargs="?")
+    p_restore = sub.add_parser("restore", help="replace the database with a snapshot")
+    p_restore.add_argument("path")
+    args = parser.parse_args()
+
+    shards.load()
+    shards.init_all()
+    hostels = [args.hostel] if args.hostel else shards.hostels()
+    if args.command == "watch":
+        watch(args.every, args.keep)
+    if args.command == "restore" and len(hostels) > 1:
+        parser.error("restore needs --hostel")
+    failed = False
+    for hostel_id in hostels:
+        with db.use(hostel_id):
+            if args.command == "snapshot":
+                print(f"✅ {snapshot(keep=args.keep)}")
+            elif args.command == "list":
+                for path, taken, size in snapshots():
+                    print(f"{taken:%Y-%m-%d %H:%M:%S}  {size / 1e6:>8.1f} MB  {path}")
+            elif args.command == "verify":
+                for path in [args.path] if args.path else [s[0] for s in snapshots()]:
+                    problems = verify(path)
+                    failed = failed or bool(problems)
+                    print(f"{'❌' if problems else '✅'} {path}" + "".join(f"\n   {p}" for p in problems[:10]))
+            else:
+                safety = restore(args.path)
+                print(f"✅ Restored {args.path} (previous data saved as {safety})")
+    raise SystemExit(1 if failed else 0)
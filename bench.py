@@ -0,0 +1,438 @@
+"""Benchmark harness: every backend function and every app page on a synthetic hostel.
+
+    python bench.py --scale small -o results.json
+    python bench.py --scale large -o v2.json --compare v1.json
+
+Builds a throwaway database (hostel.db is never touched) at the chosen
+scale, times each backend function (p50/p99 latency and calls per second),
+times the uncached data each app.py page needs, then repeats the page loads
+from several reader threads while writer threads keep checking students in
+and out. Results are written as JSON; --compare flags anything that got
+slower than the given baseline by more than --threshold.
+
+    python bench.py --startup
+
+instead runs app.py headless in a fresh interpreter per page and checks
+the cold start and rerun latency against STARTUP_BUDGET_MS / RERUN_BUDGET_MS.
+"""
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+import backend
+import columnar
+import curfew
+import db
+import leaves
+import medical
+import rooms
+
+SCALES = {
+    # students, entry logs, leave requests
+    "tiny": (50, 2000, 100),
+    "small": (1000, 100_000, 5000),
+    "medium": (5000, 1_000_000, 50_000),
+    "large": (10_000, 5_000_000, 200_000),
+}
+DEPTS = ("CSE", "ECE", "ME", "CE", "EEE", "IT")
+BLOCKS = ("A", "B", "C", "D")
+FIRST = ("Aarav", "Priya", "Isha", "Rohan", "Kabir", "Ananya", "Vivaan", "Diya", "Arjun", "Meera")
+LAST = ("Sharma", "Patel", "Verma", "Iyer", "Reddy", "Nair", "Gupta", "Khan", "Das", "Singh")
+LEAVE_STATUSES = ("Pending", "Approved", "Rejected")
+DAYS = 365
+BUDGET = 1.0          # seconds spent timing each function
+MAX_RUNS = 1000
+MIN_RUNS = 3
+
+
+# -------------------------------
+# SYNTHETIC HOSTEL
+# -------------------------------
+def _ts(moment):
+    return moment.strftime(backend.TIME_FORMAT)
+
+
+def generate(students, logs, leaves, seed=42, end=None):
+    """Fill the configured database through the bulk APIs. Returns seeding timings."""
+    rng = random.Random(seed)
+    end = end or datetime.now().replace(microsecond=0)
+    start = end - timedelta(days=DAYS)
+    timings = {}
+
+    t = time.perf_counter()
+    room_nos = [f"{b}-{floor}{n:02d}" for b in BLOCKS for floor in range(1, 5) for n in range(1, 41)]
+    rng.shuffle(room_nos)
+    rooms.add_rooms((room_no, max(2, -(-students // len(room_nos)))) for room_no in room_nos)
+    backend.add_students_bulk(
+        (f"{rng.choice(FIRST)} {rng.choice(LAST)}", rng.choice(DEPTS), rng.randint(1, 4),
+         f"9{rng.randrange(10**9):09d}", f"{rng.choice(FIRST)} {rng.choice(LAST)}",
+         f"9{rng.randrange(10**9):09d}", room_nos[i % len(room_nos)])
+        for i in range(students))
+    timings["students_s"] = time.perf_counter() - t
+
+    def log_rows():
+        span = DAYS * 86400
+        for _ in range(logs):
+            sid = rng.randint(1, students)
+            at = _ts(start + timedelta(seconds=rng.randrange(span)))
+            yield backend.movement_row(sid, at, checkout=rng.random() < 0.5)
+
+    t = time.perf_counter()
+    backend.add_entries_bulk(log_rows())
+    timings["entry_logs_s"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    with db.transaction() as conn:
+        rows = []
+        for _ in range(leaves):
+            first = start.date() + timedelta(days=rng.randrange(DAYS))
+            rows.append((rng.randint(1, students), str(first), str(first + timedelta(days=rng.randint(0, 6))),
+                         "Home visit", rng.choice(LEAVE_STATUSES)))
+        conn.executemany("""
+            INSERT INTO leave_requests (student_id, from_date, to_date, reason, status)
+            VALUES (?, ?, ?, ?, ?)
+        """, rows)
+        medical.store_many(conn, [(sid, rng.choice(("A+", "B+", "O+", "AB-")), rng.choice(("", "Peanuts", "Dust")),
+                                   "", "") for sid in range(1, students + 1, 3)], actor="bench")
+    backend.bump_versions("leave_requests", "medical_info")
+    timings["leave_requests_s"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    curfew.backfill()
+    timings["curfew_backfill_s"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    columnar.sync()
+    timings["columnar_build_s"] = time.perf_counter() - t
+    return {k: round(v, 3) for k, v in timings.items()}
+
+
+# -------------------------------
+# TIMING
+# -------------------------------
+def summarise(times):
+    times = sorted(times)
+    pick = lambda q: times[min(len(times) - 1, int(q * len(times)))] * 1000
+    return {
+        "runs": len(times),
+        "ops_per_s": round(len(times) / sum(times), 1) if sum(times) else None,
+        "p50_ms": round(pick(0.50), 3),
+        "p99_ms": round(pick(0.99), 3),
+        "max_ms": round(times[-1] * 1000, 3),
+    }
+
+
+def measure(fn, budget=BUDGET):
+    times = []
+    started = time.perf_counter()
+    while len(times) < MAX_RUNS and (len(times) < MIN_RUNS or time.perf_counter() - started < budget):
+        t = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t)
+    return summarise(times)
+
+
+def backend_calls(students, rng, end):
+    """name -> zero-argument callable, one per public backend function."""
+    day = lambda: str((end - timedelta(days=rng.randrange(DAYS))).date())
+    sid = lambda: rng.randint(1, students)
+    now = lambda: _ts(end - timedelta(seconds=rng.randrange(DAYS * 86400)))
+    new_ids = []
+
+    def add_student():
+        # A new room each time, so the allocation never finds it full.
+        backend.add_student("Bench Student", "CSE", 1, "", "", "", f"Z-{len(new_ids) + 1}")
+        with db.connection() as conn:
+            new_ids.append(conn.execute("SELECT MAX(id) FROM students").fetchone()[0])
+
+    return {
+        "view_students": backend.view_students,
+        "view_logs": backend.view_logs,
+        "view_leave_requests": backend.view_leave_requests,
+        "view_medical_info": lambda: backend.view_medical_info(sid()),
+        "medical.emergency": lambda: medical.emergency(rng.choice(("A+", "O+", "AB-")), block="A"),
+        "presence_of": lambda: backend.presence_of(sid()),
+        "who_is_out": backend.who_is_out,
+        "not_returned_by": lambda: backend.not_returned_by(now()),
+        "headcount": backend.headcount,
+        "search_students.prefix": lambda: backend.search_students(rng.choice(FIRST)[:3]),
+        # Surname with its first two letters swapped, e.g. "Psatel".
+        "search_students.typo": lambda: backend.search_students((lambda n: n[1] + n[0] + n[2:])(rng.choice(LAST))),
+        "query_students": lambda: backend.query_students(dept=rng.choice(DEPTS)),
+        "query_logs.student": lambda: backend.query_logs(student_id=sid()),
+        "query_logs.day": lambda: backend.query_logs(date_from=day(), date_to=day()),
+        "query_logs.deep_page": lambda: backend.query_logs(sort="entry_time", descending=True,
+                                                           after_id=rng.randint(1, 1000)),
+        "query_leave_requests": lambda: backend.query_leave_requests(status="Pending"),
+        "leaves.on_leave": lambda: leaves.on_leave(day()),
+        "leaves.conflicts": lambda: leaves.conflicts(sid(), day(), day()),
+        "stats.totals": backend.stats.totals,
+        "stats.students_by_dept": backend.stats.students_by_dept,
+        "stats.students_by_year": backend.stats.students_by_year,
+        "stats.leaves_by_status": backend.stats.leaves_by_status,
+        "stats.movements": lambda: backend.stats.movements("day"),
+        "stats.late_returns": lambda: backend.stats.late_returns("week"),
+        "stats.leave_approval_by_dept": backend.stats.leave_approval_by_dept,
+        "columnar.sync": columnar.sync,
+        "columnar.heatmap": lambda: columnar.heatmap(columnar.load()),
+        "columnar.absence_streaks": lambda: columnar.absence_streaks(columnar.load()),
+        "add_entry": lambda: backend.add_entry(sid()),
+        "add_entries_bulk.1000": lambda: backend.add_entries_bulk([(sid(), now()) for _ in range(1000)]),
+        "curfew.process_new": curfew.process_new,
+        "add_student": add_student,
+        "update_student": lambda: backend.update_student(sid(), contact=f"9{rng.randrange(10**9):09d}"),
+        "delete_student": lambda: new_ids and backend.delete_student(new_ids.pop()),
+        "add_medical_info": lambda: backend.add_medical_info(sid(), "O+", "", "", ""),
+        "add_leave_request": lambda: backend.add_leave_request(sid(), day(), day(), "Bench"),
+        "update_leave_status": lambda: backend.update_leave_status(rng.randint(1, 100), rng.choice(LEAVE_STATUSES)),
+    }
+
+
+def page_loads():
+    """The data each app.py page reads on a fresh (uncached) run."""
+    first_page = {"after_id": None, "limit": backend.PAGE_SIZE}
+    return {
+        "dashboard": lambda: (backend.stats.totals(), backend.headcount(), leaves.on_leave_count(),
+                              backend.stats.students_by_dept(),
+                              backend.stats.students_by_year(), backend.stats.leaves_by_status()),
+        "students": backend.view_students,
+        "entry_logs": lambda: (backend.search_students("aa", 20), backend.not_returned_by(_ts(datetime.now())),
+                               backend.who_is_out(), curfew.recent_alerts(limit=50),
+                               backend.query_logs(**first_page)),
+        "medical_info": lambda: backend.search_students("aa", 20),
+        "leave_requests": lambda: (backend.search_students("aa", 20), backend.query_leave_requests(**first_page)),
+        "analytics": lambda: (backend.stats.totals(), backend.stats.students_by_dept(),
+                              backend.stats.movements("day"), backend.stats.late_returns("day"),
+                              backend.stats.leave_approval_by_dept()),
+    }
+
+
+def concurrent(students, readers, writers, duration, seed):
+    """Page loads from reader threads while writer threads log movements."""
+    pages = page_loads()
+    latencies = {name: [] for name in pages}
+    writes, errors = [], []
+    stop = threading.Event()
+
+    def reader(n):
+        rng = random.Random(seed + n)
+        names = list(pages)
+        while not stop.is_set():
+            name = rng.choice(names)
+            t = time.perf_counter()
+            try:
+                pages[name]()
+            except sqlite3.Error as e:
+                errors.append(f"{name}: {e}")
+                continue
+            latencies[name].append(time.perf_counter() - t)
+
+    def writer(n):
+        rng = random.Random(seed + 1000 + n)
+        while not stop.is_set():
+            t = time.perf_counter()
+            try:
+                at = _ts(datetime.now())
+                backend.add_entry(rng.randint(1, students), at, at if rng.random() < 0.5 else None)
+            except sqlite3.Error as e:
+                errors.append(f"add_entry: {e}")
+                continue
+            writes.append(time.perf_counter() - t)
+
+    threads = [threading.Thread(target=reader, args=(n,)) for n in range(readers)]
+    threads += [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+    for th in threads:
+        th.start()
+    time.sleep(duration)
+    stop.set()
+    for th in threads:
+        th.join()
+    return {
+        "readers": readers,
+        "writers": writers,
+        "duration_s": duration,
+        "pages": {name: summarise(times) for name, times in latencies.items() if times},
+        "add_entry": summarise(writes) if writes else None,
+        "writes_per_s": round(len(writes) / duration, 1),
+        "errors": errors[:20],
+        "error_count": len(errors),
+    }
+
+
+# -------------------------------
+# APP STARTUP
+# -------------------------------
+APP_PAGES = ("dashboard", "students", "rooms", "logs", "medical", "leaves", "analytics", "performance")
+CHART_PAGES = ("dashboard", "analytics", "performance")
+HEAVY_MODULES = ("pandas", "plotly.express")
+STARTUP_BUDGET_MS = 2000  # first run of app.py in a new process, schema migration included
+RERUN_BUDGET_MS = 100     # p50 of the reruns after it
+
+_APP_DRIVER = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+app, page, reruns, heavy = sys.argv[1], sys.argv[2], int(sys.argv[3]), sys.argv[4:]
+at = AppTest.from_file(app, default_timeout=60)
+at.query_params["page"] = page
+started = time.perf_counter()
+at.run()
+cold = time.perf_counter() - started
+loaded = [m for m in heavy if m in sys.modules]
+times = []
+for _ in range(reruns):
+    started = time.perf_counter()
+    at.run()
+    times.append(time.perf_counter() - started)
+print(json.dumps({"cold": cold, "reruns": times, "loaded": loaded,
+                  "errors": [e.message for e in at.exception]}))
+"""
+
+
+def app_startup(pages=APP_PAGES, reruns=5):
+    """{page: cold_ms, rerun timings, heavy modules loaded} for app.py on an empty hostel, one process per page."""
+    app = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, HOSTEL_DB=os.path.join(tmp, "bench.db"), HOSTEL_MEDICAL_KEY=medical.new_key(),
+                   HOSTEL_SHARDS=os.path.join(tmp, "hostels.json"), HOSTEL_ADMIN="1")
+        for page in pages:
+            out = subprocess.run([sys.executable, "-c", _APP_DRIVER, app, page, str(reruns), *HEAVY_MODULES],
+                                 capture_output=True, text=True, env=env, cwd=tmp, check=True).stdout
+            run = json.loads(out.strip().splitlines()[-1])
+            results[page] = {"cold_ms": round(run["cold"] * 1000, 1), "rerun": summarise(run["reruns"]),
+                             "loaded": run["loaded"], "errors": run["errors"]}
+    return results
+
+
+def over_budget(startup):
+    """(page, problem) for every page over the startup budget or loading what it should not."""
+    problems = []
+    for page, result in startup.items():
+        if result["errors"]:
+            problems.append((page, f"raised {result['errors'][0]}"))
+        if result["cold_ms"] > STARTUP_BUDGET_MS:
+            problems.append((page, f"cold start {result['cold_ms']} ms > {STARTUP_BUDGET_MS} ms"))
+        if result["rerun"]["p50_ms"] > RERUN_BUDGET_MS:
+            problems.append((page, f"rerun p50 {result['rerun']['p50_ms']} ms > {RERUN_BUDGET_MS} ms"))
+        if page not in CHART_PAGES and "plotly.express" in result["loaded"]:
+            problems.append((page, "imports plotly without drawing a chart"))
+    return problems
+
+
+# -------------------------------
+# RUN / COMPARE
+# -------------------------------
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run(scale="small", readers=4, writers=2, duration=5.0, budget=BUDGET, seed=42, only=None):
+    students, logs, leaves = SCALES[scale]
+    end = datetime.now().replace(microsecond=0)
+    with tempfile.TemporaryDirectory() as tmp:
+        db.configure(path=os.path.join(tmp, "bench.db"))
+        medical.configure(medical.new_key())  # throwaway key for the synthetic records
+        columnar_dir, columnar.COLUMNAR_DIR = columnar.COLUMNAR_DIR, os.path.join(tmp, "columnar")
+        try:
+            backend.init_db()
+            seeding = generate(students, logs, leaves, seed, end)
+            rng = random.Random(seed)
+            functions = {name: measure(fn, budget) for name, fn in backend_calls(students, rng, end).items()
+                         if not only or name in only}
+            pages = {name: measure(fn, budget) for name, fn in page_loads().items()}
+            mixed = concurrent(students, readers, writers, duration, seed) if duration else None
+        finally:
+            db.close()
+            medical.configure(None)
+            columnar.COLUMNAR_DIR = columnar_dir
+    return {
+        "meta": {
+            "revision": _git_revision(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "scale": scale,
+            "students": students,
+            "entry_logs": logs,
+            "leave_requests": leaves,
+            "seed": seed,
+        },
+        "seeding": seeding,
+        "functions": functions,
+        "pages": pages,
+        "concurrent": mixed,
+    }
+
+
+def compare(result, baseline, threshold=0.2):
+    """(section, name, before_ms, after_ms) for every p50 more than threshold slower."""
+    slower = []
+    for section in ("functions", "pages"):
+        for name, now in result[section].items():
+            before = baseline.get(section, {}).get(name)
+            if before and now["p50_ms"] > before["p50_ms"] * (1 + threshold):
+                slower.append((section, name, before["p50_ms"], now["p50_ms"]))
+    return slower
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds of mixed load (0 to skip)")
+    parser.add_argument("--budget", type=float, default=BUDGET, help="seconds spent timing each function")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--only", action="append", help="time just this backend function (repeatable)")
+    parser.add_argument("-o", "--output", help="write JSON here (default: stdout)")
+    parser.add_argument("--compare", help="baseline JSON from an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed p50 slowdown, 0.2 = 20%%")
+    parser.add_argument("--startup", action="store_true", help="check app.py start-up and rerun latency instead")
+    args = parser.parse_args(argv)
+
+    if args.startup:
+        startup = app_startup()
+        print(json.dumps(startup, indent=2))
+        problems = over_budget(startup)
+        for page, problem in problems:
+            print(f"⚠️ {page}: {problem}", file=sys.stderr)
+        if not problems:
+            print("✅ Every page within the start-up budget", file=sys.stderr)
+        return 1 if problems else 0
+
+    result = run(args.scale, args.readers, args.writers, args.duration, args.budget, args.seed, args.only)
+    text = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+        print(f"✅ Results written to {args.output}", file=sys.stderr)
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare) as f:
+            slower = compare(result, json.load(f), args.threshold)
+        for section, name, before, after in slower:
+            print(f"⚠️ {section}/{name}: p50 {before} ms -> {after} ms", file=sys.stderr)
+        if slower:
+            return 1
+        print("✅ No regressions against the baseline", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
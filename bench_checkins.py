@@ -0,0 +1,78 @@
+"""Check-ins per second: connect-per-call (old backend) vs. the pooled layer.
+
+    python bench_checkins.py [n_checkins] [threads]
+
+Runs against a throwaway database so hostel.db is never touched.
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import backend
+import db
+
+
+def legacy_add_entry(path, student_id):
+    # Exactly what backend.add_entry did before the pool existed.
+    conn = sqlite3.connect(path)
+    c = conn.cursor()
+    entry_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    c.execute("""
+        INSERT INTO entry_logs (student_id, entry_time, exit_time, status)
+        VALUES (?, ?, ?, ?)
+    """, (student_id, entry_time, None, "On Time"))
+    conn.commit()
+    conn.close()
+
+
+def run(fn, n, threads):
+    per_thread = n // threads
+
+    def worker(offset):
+        for i in range(per_thread):
+            fn(1 + (offset + i) % 100)
+
+    workers = [threading.Thread(target=worker, args=(t * per_thread,)) for t in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+    return per_thread * threads / elapsed
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, "legacy.db")
+        pooled_path = os.path.join(tmp, "pooled.db")
+
+        # Legacy database keeps SQLite's defaults (rollback journal, FULL sync).
+        db.configure(path=legacy_path)
+        backend.init_db()
+        db.close()
+        with sqlite3.connect(legacy_path) as conn:
+            conn.execute("PRAGMA journal_mode=DELETE")
+
+        db.configure(path=pooled_path)
+        backend.init_db()
+
+        before = run(lambda sid: legacy_add_entry(legacy_path, sid), n, threads)
+        after = run(backend.add_entry, n, threads)
+        db.close()
+
+    print(f"check-ins: {n}  threads: {threads}")
+    print(f"before (connect per call): {before:10.0f} check-ins/s")
+    print(f"after  (pooled, WAL):      {after:10.0f} check-ins/s")
+    print(f"speed-up:                  {after / before:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
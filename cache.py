@@ -0,0 +1,93 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import backend
+import db
+
+# -------------------------------
+# SETTINGS
+# -------------------------------
+# Entries are invalidated by backend.table_versions(), which sees writes
+# from every process; the TTL is only a backstop, and the byte cap keeps a
+# burst of filtered views from growing the cache without bound.
+DEFAULT_TTL = 300.0
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def _sizeof(value):
+    memory_usage = getattr(value, "memory_usage", None)
+    if memory_usage is not None:  # pandas DataFrame / Series
+        usage = memory_usage(deep=True)
+        return int(usage.sum()) if hasattr(usage, "sum") else int(usage)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(sys.getsizeof(v) for v in value)
+    return sys.getsizeof(value)
+
+
+# -------------------------------
+# TABLE-VERSIONED CACHE
+# -------------------------------
+class TableCache:
+    def __init__(self, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (versions, created, size, value)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, tables, loader):
+        # Read the versions before loading: if a write lands mid-load the
+        # entry is stored under the old versions and rebuilt next time.
+        versions = backend.table_versions(*tables)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == versions and now - entry[1] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[3]
+            self.misses += 1
+
+        value = loader()
+        size = _sizeof(value)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            if size <= self.max_bytes:
+                self._entries[key] = (versions, now, size, value)
+                self._bytes += size
+                while self._bytes > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._bytes -= evicted[2]
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes,
+                    "hits": self.hits, "misses": self.misses}
+
+
+# -------------------------------
+# MODULE-LEVEL CACHE
+# -------------------------------
+# Shared by every Streamlit session in the process. Cached values are handed
+# out as-is, so callers must treat them as read-only.
+data_cache = TableCache()
+
+
+def get(key, tables, loader):
+    # Table versions are process-wide, so the hostel shard (and the replica
+    # being read, if any) goes in the key.
+    return data_cache.get((db.current_hostel(), db.current_replica(), key), tables, loader)
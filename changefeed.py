@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+
+import db
+
+# -------------------------------
+# CHANGE FEED
+# -------------------------------
+# change_feed gets one row per insert/update/delete on the tables in
+# database.FEED_TABLES, written by triggers in the same transaction as the
+# change. seq only grows, so a consumer keeps the last seq it handled and
+# asks for what came after it:
+#
+#     seq = changefeed.cursor("my-consumer")
+#     for seq, table, op, row_id, at in changefeed.poll(seq):
+#         ...
+#     changefeed.advance("my-consumer", seq)
+#
+# Cursors live in the watermarks table as "feed:<consumer>". Rows carry ids,
+# not data; consumers read the current row if they need it.
+
+POLL_LIMIT = 500
+KEEP_DAYS = 30
+
+
+def poll(since_seq=0, limit=POLL_LIMIT, tables=None):
+    """(seq, table, op, row_id, at) for changes after since_seq, oldest first."""
+    sql = "SELECT seq, table_name, op, row_id, at FROM change_feed WHERE seq > ?"
+    params = [since_seq]
+    if tables:
+        sql += f" AND table_name IN ({','.join('?' * len(tables))})"
+        params.extend(tables)
+    with db.connection() as conn:
+        return conn.execute(sql + " ORDER BY seq LIMIT ?", params + [limit]).fetchall()
+
+
+def latest_seq():
+    with db.connection() as conn:
+        return conn.execute("SELECT COALESCE(MAX(seq), 0) FROM change_feed").fetchone()[0]
+
+
+def cursor(consumer):
+    with db.connection() as conn:
+        row = conn.execute("SELECT last_id FROM watermarks WHERE name = ?", (f"feed:{consumer}",)).fetchone()
+    return row[0] if row else 0
+
+
+def advance(consumer, seq, conn=None):
+    """Move a consumer's cursor forward (never back); pass conn to do it inside a larger transaction."""
+    sql = """
+        INSERT INTO watermarks (name, last_id) VALUES (?, ?)
+        ON CONFLICT(name) DO UPDATE SET last_id = MAX(last_id, excluded.last_id)
+    """
+    if conn is not None:
+        conn.execute(sql, (f"feed:{consumer}", seq))
+        return
+    with db.transaction() as conn:
+        conn.execute(sql, (f"feed:{consumer}", seq))
+
+
+def prune(keep_days=KEEP_DAYS, now=None):
+    """Drop changes older than keep_days that every registered consumer has already read."""
+    cutoff = ((now or datetime.now()) - timedelta(days=keep_days)).strftime("%Y-%m-%d %H:%M:%S")
+    with db.transaction() as conn:
+        slowest = conn.execute("SELECT MIN(last_id) FROM watermarks WHERE name LIKE 'feed:%'").fetchone()[0]
+        sql = "DELETE FROM change_feed WHERE at < ?"
+        params = [cutoff]
+        if slowest is not None:
+            sql += " AND seq <= ?"
+            params.append(slowest)
+        return conn.execute(sql, params).rowcount
@@ -0,0 +1,308 @@
+import json
+import os
+import threading
+from datetime import datetime
+
+import numpy as np
+
+import database
+import db
+
+# -------------------------------
+# COLUMNAR LOG SNAPSHOT
+# -------------------------------
+# A copy of entry_logs (archived months included) as one flat binary file
+# per column under columnar/ (columnar/<hostel_id>/ for hostel shards),
+# sorted by log_id:
+#
+#   log_id      int64
+#   student_id  int32
+#   at          int64   time of the movement (exit_time for a check-out,
+#                       entry_time for a check-in) as seconds since
+#                       1970-01-01 (wall clock, no zone)
+#   out         uint8   1 for a check-out, 0 for a check-in
+#   status      uint8   index into STATUSES
+#
+# meta.json records how many rows are valid, so an append that died half
+# way is cut off on the next one, and the files are memory-mapped on load.
+# sync() appends rows up to the curfew watermark (statuses are assigned
+# after a row is inserted) and starts over when curfew.backfill() has
+# re-classified history or the snapshot predates FORMAT. The analytics
+# below work on whole arrays at once.
+#
+# One process should sync a given directory at a time (the app or
+# python columnar.py sync); any number can read it.
+
+COLUMNAR_DIR = os.environ.get("HOSTEL_COLUMNAR_DIR", "columnar")
+FETCH_SIZE = 100_000
+STATUSES = ("", "On Time", "Late", "Overnight", "On Leave")
+FORMAT = 2  # bump when a column changes meaning; older snapshots are rebuilt
+COLUMNS = {"log_id": np.int64, "student_id": np.int32, "at": np.int64, "out": np.uint8, "status": np.uint8}
+DIRECTIONS = ("out", "in", "all")
+DAY = 86400
+
+_lock = threading.Lock()
+_loaded = {}  # directory -> (meta, LogColumns)
+
+_SELECT = f"""
+    SELECT log_id, student_id, CAST(strftime('%s', {database.moved_at_sql()}) AS INTEGER),
+           NOT {database.checkin_sql()},
+           CASE status {" ".join(f"WHEN '{s}' THEN {i}" for i, s in enumerate(STATUSES) if s)} ELSE 0 END
+    FROM {{table}}
+    WHERE log_id > ? AND log_id <= ? AND strftime('%s', {database.moved_at_sql()}) IS NOT NULL
+    ORDER BY log_id
+"""
+
+
+class LogColumns:
+    """The snapshot's columns as NumPy arrays (read-only memory maps when loaded from disk)."""
+
+    def __init__(self, arrays):
+        for name in COLUMNS:
+            setattr(self, name, arrays[name])
+
+    def __len__(self):
+        return len(self.log_id)
+
+    def mask(self, date_from=None, date_to=None, direction="all"):
+        """Rows in [date_from, date_to] (dates or 'YYYY-MM-DD') moving in the given direction."""
+        if direction not in DIRECTIONS:
+            raise ValueError(f"direction must be one of {DIRECTIONS}, got {direction!r}")
+        keep = np.ones(len(self), dtype=bool)
+        if date_from is not None:
+            keep &= self.at >= _epoch(date_from)
+        if date_to is not None:
+            keep &= self.at < _epoch(date_to) + DAY
+        if direction != "all":
+            keep &= self.out == (direction == "out")
+        return keep
+
+
+def _epoch(day):
+    return int((np.datetime64(str(day)[:10], "D") - np.datetime64(0, "D")) // np.timedelta64(1, "D")) * DAY
+
+
+def store_dir():
+    return os.path.abspath(os.path.join(COLUMNAR_DIR, db.current_hostel() or ""))
+
+
+def _meta_path(directory):
+    return os.path.join(directory, "meta.json")
+
+
+def _read_meta(directory):
+    try:
+        with open(_meta_path(directory)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _write_meta(directory, meta):
+    tmp = _meta_path(directory) + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(meta, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, _meta_path(directory))
+
+
+def _fetch(conn, table, after, upto):
+    """Rows of `table` in (after, upto] as column arrays."""
+    parts = {name: [] for name in COLUMNS}
+    cur = conn.execute(_SELECT.format(table=table), (after, upto))
+    while True:
+        rows = cur.fetchmany(FETCH_SIZE)
+        if not rows:
+            break
+        block = np.array(rows, dtype=np.int64)
+        for i, (name, dtype) in enumerate(COLUMNS.items()):
+            parts[name].append(block[:, i].astype(dtype))
+    return {name: np.concatenate(chunks) if chunks else np.empty(0, dtype=COLUMNS[name])
+            for name, chunks in parts.items()}
+
+
+def _merge(sources):
+    """Concatenate column dicts, sorted by log_id, without duplicates."""
+    merged = {name: np.concatenate([s[name] for s in sources]) for name in COLUMNS}
+    _, first = np.unique(merged["log_id"], return_index=True)
+    return {name: values[first] for name, values in merged.items()}
+
+
+def _column_path(directory, meta, name):
+    return os.path.join(directory, f"{name}.{meta['build']}.bin")
+
+
+def _append(directory, meta, arrays):
+    rows = meta["rows"]
+    for name, dtype in COLUMNS.items():
+        with open(_column_path(directory, meta, name), "ab") as f:
+            f.truncate(rows * np.dtype(dtype).itemsize)  # drop what a failed append left behind
+            f.write(np.ascontiguousarray(arrays[name], dtype=dtype).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+    meta["rows"] = rows + len(arrays["log_id"])
+    if len(arrays["log_id"]):
+        meta["last_log_id"] = int(arrays["log_id"][-1])
+    _write_meta(directory, meta)
+
+
+def sync(directory=None):
+    """Bring the snapshot up to date with the database. Returns the number of rows added.
+
+    A rebuild writes a new set of files and switches meta.json over to them,
+    so arrays already mapped by load() stay valid.
+    """
+    directory = directory or store_dir()
+    with _lock:
+        meta = _read_meta(directory)
+        with db.connection() as conn:
+            conn.execute("BEGIN")  # one read snapshot for the watermarks and the rows
+            try:
+                marks = dict(conn.execute(
+                    "SELECT name, last_id FROM watermarks WHERE name IN ('curfew', 'curfew:backfills')").fetchall())
+                upto, generation = marks.get("curfew", 0), marks.get("curfew:backfills", 0)
+                old = meta
+                rebuild = (meta is None or meta.get("format") != FORMAT or meta["generation"] != generation
+                           or upto < meta["last_log_id"])
+                if rebuild:
+                    meta = {"build": (old or {"build": 0})["build"] + 1, "rows": 0, "last_log_id": 0,
+                            "generation": generation, "format": FORMAT}
+                sources = [_fetch(conn, "entry_logs", meta["last_log_id"], upto)]
+            finally:
+                conn.rollback()
+            if rebuild:
+                # Rows moved to an archive after the read above are in both; _merge keeps one.
+                for (path,) in conn.execute("SELECT path FROM log_archives ORDER BY month").fetchall():
+                    with db.attached(conn, path, "arc"):
+                        sources.append(_fetch(conn, "arc.entry_logs", 0, upto))
+        added = _merge(sources)
+        if rebuild or len(added["log_id"]):
+            os.makedirs(directory, exist_ok=True)
+            _append(directory, meta, added)
+        if rebuild and old is not None:
+            for name in COLUMNS:
+                try:
+                    os.remove(_column_path(directory, old, name))
+                except FileNotFoundError:
+                    pass
+    return len(added["log_id"])
+
+
+def load(directory=None):
+    """The snapshot as memory-mapped arrays; empty if it has not been built."""
+    directory = directory or store_dir()
+    meta = _read_meta(directory) or {"rows": 0}
+    cached = _loaded.get(directory)
+    if cached and cached[0] == meta:
+        return cached[1]
+    arrays = {}
+    for name, dtype in COLUMNS.items():
+        if meta["rows"]:
+            arrays[name] = np.memmap(_column_path(directory, meta, name), dtype=dtype, mode="r",
+                                     shape=(meta["rows"],))
+        else:
+            arrays[name] = np.empty(0, dtype=dtype)
+    columns = LogColumns(arrays)
+    _loaded[directory] = (meta, columns)
+    return columns
+
+
+def current(directory=None):
+    """sync() then load(): the up-to-date snapshot."""
+    sync(directory)
+    return load(directory)
+
+
+# -------------------------------
+# ANALYTICS
+# -------------------------------
+def heatmap(columns, direction="out", date_from=None, date_to=None):
+    """7 x 24 movement counts: rows Monday..Sunday, columns hour of day."""
+    at = columns.at[columns.mask(date_from, date_to, direction)]
+    days = at // DAY
+    cell = ((days + 3) % 7) * 24 + (at - days * DAY) // 3600  # 1970-01-01 was a Thursday
+    return np.bincount(cell, minlength=7 * 24).reshape(7, 24)
+
+
+def absence_streaks(columns, min_days=1, date_from=None, date_to=None, now=None, limit=50):
+    """Longest stretches away: (student_id, longest_days, absences, total_days), longest first.
+
+    An absence runs from a check-out to the same student's next check-in and
+    is counted in calendar days (a check-out and return on the same day is
+    0). A student still out is away until `now`; a check-out followed by
+    another check-out is skipped, since the return was never logged.
+    """
+    if not len(columns):
+        return []
+    order = np.lexsort((columns.log_id, columns.at, columns.student_id))
+    sid, at, out = columns.student_id[order], columns.at[order], columns.out[order].astype(bool)
+    now = int((np.datetime64(now or datetime.now(), "s") - np.datetime64(0, "s")) // np.timedelta64(1, "s"))
+
+    same_next = np.append(sid[1:] == sid[:-1], False)
+    next_in = np.append(~out[1:], False)
+    returned = out & same_next & next_in
+    still_out = out & ~same_next
+    start = np.flatnonzero(returned | still_out)
+    end = np.where(returned[start], np.append(at[1:], 0)[start], now)
+    days = end // DAY - at[start] // DAY
+
+    keep = days >= min_days
+    if date_from is not None:
+        keep &= at[start] >= _epoch(date_from)
+    if date_to is not None:
+        keep &= at[start] < _epoch(date_to) + DAY
+    students, slot = np.unique(sid[start][keep], return_inverse=True)
+    days = days[keep]
+    longest = np.zeros(len(students), dtype=np.int64)
+    np.maximum.at(longest, slot, days)
+    count = np.bincount(slot, minlength=len(students))
+    total = np.bincount(slot, weights=days, minlength=len(students)).astype(np.int64)
+    rank = np.lexsort((students, -total, -longest))[:limit]
+    return [(int(students[i]), int(longest[i]), int(count[i]), int(total[i])) for i in rank]
+
+
+def frame(columns):
+    """pandas DataFrame with datetime64 times and a categorical status, not TEXT and object columns."""
+    import pandas as pd
+
+    return pd.DataFrame({
+        "log_id": columns.log_id,
+        "student_id": columns.student_id,
+        "at": np.asarray(columns.at).astype("datetime64[s]"),
+        "out": np.asarray(columns.out).astype(bool),
+        "status": pd.Categorical.from_codes(np.asarray(columns.status), categories=list(STATUSES)),
+    })
+
+
+# -------------------------------
+# COMMAND LINE
+# -------------------------------
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    import backend
+    import shards
+
+    parser = argparse.ArgumentParser(description="Columnar snapshot of entry_logs for analytics.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("sync", help="append new logs (rebuilds when history was re-classified)")
+    p_heat = sub.add_parser("heatmap", help="check-outs by weekday and hour")
+    p_heat.add_argument("--direction", choices=DIRECTIONS, default="out")
+    args = parser.parse_args()
+
+    shards.load()
+    for hostel_id in shards.hostels():
+        with db.use(hostel_id):
+            backend.init_db()
+            started = time.perf_counter()
+            added = sync()
+            columns = load()
+            print(f"✅ {hostel_id or 'hostel.db'}: {len(columns)} logs ({added} new) in "
+                  f"{time.perf_counter() - started:.2f}s -> {store_dir()}")
+            if args.command == "heatmap":
+                grid = heatmap(columns, args.direction)
+                print("     " + "".join(f"{h:>5}" for h in range(24)))
+                for name, row in zip(("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"), grid):
+                    print(f"{name:>4} " + "".join(f"{n:>5}" for n in row))
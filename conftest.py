@@ -0,0 +1,34 @@
+import pytest
+
+import backend
+import db
+import medical
+
+STUDENTS = [
+    ("Aarav Sharma", "CSE", 2, "9876543210", "Ramesh Sharma", "9123456789", "A-101"),
+    ("Priya Patel", "ECE", 3, "9988776655", "Suresh Patel", "9090909090", "B-202"),
+    ("Isha Verma", "CSE", 2, "9812312312", "Mohan Verma", "9000000001", "A-104"),
+]
+
+
+@pytest.fixture
+def hostel_db(tmp_path):
+    path = str(tmp_path / "hostel.db")
+    db.configure(path=path)
+    medical.configure(key=medical.new_key())
+    backend.init_db()
+    yield path
+    db.close()
+    medical.configure(None)
+
+
+@pytest.fixture
+def students():
+    """The roster `seeded` adds; parametrize `students` where a test needs another."""
+    return STUDENTS
+
+
+@pytest.fixture
+def seeded(hostel_db, students):
+    backend.add_students_bulk(students)
+    return hostel_db
@@ -0,0 +1,312 @@
+import time as _time
+from datetime import datetime, timedelta
+
+import backend
+import db
+import leaves
+
+# -------------------------------
+# CURFEW RULES ENGINE
+# -------------------------------
+# Classifies every entry_logs row and writes the result into its status:
+#   "On Time"   - nothing to report
+#   "Late"      - back after curfew but before wake-up, or left during curfew
+#   "Overnight" - out across a whole curfew night
+#   "On Leave"  - would be Late/Overnight, but an approved leave covers it
+#
+# process_new() only looks at rows past the "curfew" watermark; backfill()
+# re-runs the rules over history. check_curfew() raises "Missed Curfew"
+# alerts for students still out once a block's curfew passes.
+
+WATERMARK = "curfew"
+CHUNK_SIZE = 5000
+
+
+def _parse(ts):
+    return datetime.strptime(ts, backend.TIME_FORMAT)
+
+
+def _clock(hhmm):
+    return datetime.strptime(hhmm, "%H:%M").time()
+
+
+def load_windows(conn):
+    return {block: (_clock(curfew), _clock(wake))
+            for block, curfew, wake in conn.execute("SELECT block, curfew, wake FROM curfew_windows")}
+
+
+def set_curfew(block, curfew, wake):
+    _clock(curfew), _clock(wake)  # validate before storing
+    with db.transaction() as conn:
+        conn.execute("""
+            INSERT INTO curfew_windows (block, curfew, wake) VALUES (?, ?, ?)
+            ON CONFLICT(block) DO UPDATE SET curfew = excluded.curfew, wake = excluded.wake
+        """, (block, curfew, wake))
+
+
+def night_of(at, window):
+    """(start, end) of the curfew night that contains `at`, or the next one."""
+    curfew, wake = window
+    for offset in (-1, 0, 1):
+        day = at.date() + timedelta(days=offset)
+        start = datetime.combine(day, curfew)
+        end = datetime.combine(day + timedelta(days=1 if wake <= curfew else 0), wake)
+        if at < end:
+            return start, end
+    raise AssertionError("unreachable")
+
+
+def classify(is_checkin, at, last_out, window):
+    """Return (status, night_start) before leave is taken into account.
+
+    last_out is the time of the student's preceding check-out, or None if
+    their previous movement was a check-in (or there is none).
+    """
+    if not is_checkin:
+        start, end = night_of(at, window)
+        return ("Late" if start <= at else "On Time"), start
+    start, end = night_of(last_out or at, window)
+    if at < start:
+        return "On Time", start
+    if at < end:
+        return "Late", start
+    return "Overnight", start
+
+
+# -------------------------------
+# PROCESSING
+# -------------------------------
+class _Context:
+    """Per-run lookups so a chunk costs one query per student, not per row."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.windows = load_windows(conn)
+        self.blocks = {}
+        self.last = {}  # student_id -> exit time of previous movement (None if a check-in)
+        self.leave = {}  # night -> students on approved leave, one index probe per night
+
+    def window(self, student_id):
+        if student_id not in self.blocks:
+            row = self.conn.execute("SELECT room_no FROM students WHERE id=?", (student_id,)).fetchone()
+            self.blocks[student_id] = backend.block_of(row[0] if row else None)
+        return self.windows.get(self.blocks[student_id]) or self.windows["*"]
+
+    def last_out(self, student_id, entry_time):
+        if student_id not in self.last:
+            row = self.conn.execute("""
+                SELECT exit_time FROM entry_logs
+                WHERE student_id = ? AND entry_time < ?
+                ORDER BY entry_time DESC LIMIT 1
+            """, (student_id, entry_time)).fetchone()
+            self.last[student_id] = row[0] if row else None
+        return self.last[student_id]
+
+    def on_leave(self, student_id, day):
+        if day not in self.leave:
+            self.leave[day] = leaves.on_leave_ids(self.conn, day)
+        return student_id in self.leave[day]
+
+
+def _process(ctx, rows, raise_alerts, quiet=()):
+    updates, alerts = [], []
+    now = datetime.now().strftime(backend.TIME_FORMAT)
+    for log_id, student_id, entry_time, exit_time in rows:
+        is_checkin = exit_time is None
+        at = _parse(exit_time or entry_time)
+        last_out = ctx.last_out(student_id, entry_time)
+        status, night = classify(is_checkin, at, _parse(last_out) if last_out else None, ctx.window(student_id))
+        if status != "On Time" and ctx.on_leave(student_id, str(night.date())):
+            status = "On Leave"
+        ctx.last[student_id] = exit_time
+        updates.append((status, log_id))
+        if raise_alerts and status in ("Late", "Overnight") and log_id not in quiet:
+            alerts.append((student_id, status, str(night.date()), log_id, now))
+    ctx.conn.executemany("UPDATE entry_logs SET status = ? WHERE log_id = ?", updates)
+    if alerts:
+        ctx.conn.executemany("""
+            INSERT OR IGNORE INTO curfew_alerts (student_id, kind, night, log_id, raised_at)
+            VALUES (?, ?, ?, ?, ?)
+        """, alerts)
+    return len(updates)
+
+
+def _fetch(conn, after_id, limit):
+    return conn.execute("""
+        SELECT log_id, student_id, entry_time, exit_time FROM entry_logs
+        WHERE log_id > ? ORDER BY log_id LIMIT ?
+    """, (after_id, limit)).fetchall()
+
+
+def _watermark(conn):
+    row = conn.execute("SELECT last_id FROM watermarks WHERE name = ?", (WATERMARK,)).fetchone()
+    return row[0] if row else 0
+
+
+def _advance(conn, last_id):
+    conn.execute("""
+        INSERT INTO watermarks (name, last_id) VALUES (?, ?)
+        ON CONFLICT(name) DO UPDATE SET last_id = MAX(last_id, excluded.last_id)
+    """, (WATERMARK, last_id))
+
+
+def _classify_next(conn, limit, quiet=()):
+    rows = _fetch(conn, _watermark(conn), limit)
+    if rows:
+        _process(_Context(conn), rows, raise_alerts=True, quiet=quiet)
+        _advance(conn, rows[-1][0])
+    return len(rows)
+
+
+def process_new(limit=CHUNK_SIZE):
+    """Classify log rows added since the last run. Returns how many were processed."""
+    total = 0
+    while True:
+        with db.transaction() as conn:
+            count = _classify_next(conn, limit)
+        total += count
+        if count:
+            backend.bump_versions("entry_logs")
+        if count < limit:
+            return total
+
+
+def process_pending(conn, quiet=(), limit=CHUNK_SIZE):
+    """process_new() on conn inside the caller's transaction; no alerts for log_ids in `quiet`.
+
+    For imported history: inserting and classifying it in one transaction
+    means no other process_new() sees the rows unclassified and alerts on them.
+    """
+    total = 0
+    while True:
+        count = _classify_next(conn, limit, quiet)
+        total += count
+        if count < limit:
+            return total
+
+
+def backfill(from_log_id=0, chunk_size=CHUNK_SIZE):
+    """Re-classify history without raising alerts; moves the watermark forward only."""
+    total, after = 0, from_log_id
+    ctx = None
+    while True:
+        with db.transaction() as conn:
+            if ctx is None:
+                ctx = _Context(conn)
+                # Rows already in daily_stats may change status.
+                rolled_up = conn.execute(
+                    "SELECT last_id FROM watermarks WHERE name = 'rollup:entry_logs'").fetchone()
+            ctx.conn = conn
+            rows = _fetch(conn, after, chunk_size)
+            if not rows:
+                break
+            total += _process(ctx, rows, raise_alerts=False)
+            after = rows[-1][0]
+            _advance(conn, after)
+        backend.bump_versions("entry_logs")
+    if total:
+        # Copies of history made before this (columnar.py) start over.
+        with db.transaction() as conn:
+            conn.execute("""
+                INSERT INTO watermarks (name, last_id) VALUES ('curfew:backfills', 1)
+                ON CONFLICT(name) DO UPDATE SET last_id = last_id + 1
+            """)
+    if total and rolled_up and rolled_up[0] > from_log_id:
+        backend.stats.rebuild_daily_stats()
+    return total
+
+
+def check_curfew(now=None):
+    """Raise a "Missed Curfew" alert for every student still out past their block's curfew.
+
+    Reads only the students the presence table says are out, so the cost
+    follows the number of people outside, not the number of residents.
+    Returns the alerts raised by this call.
+    """
+    now = now or datetime.now()
+    raised = []
+    with db.transaction() as conn:
+        windows = load_windows(conn)
+        rows = conn.execute("""
+            SELECT p.student_id, s.room_no, p.since
+            FROM presence p JOIN students s ON s.id = p.student_id
+            WHERE p.state = 'out'
+        """).fetchall()
+        ctx = _Context(conn)
+        for student_id, room_no, since in rows:
+            window = windows.get(backend.block_of(room_no)) or windows["*"]
+            start, end = night_of(now, window)
+            if not (start <= now < end) or _parse(since) >= start:
+                continue
+            night = str(start.date())
+            if ctx.on_leave(student_id, night):
+                continue
+            cur = conn.execute("""
+                INSERT OR IGNORE INTO curfew_alerts (student_id, kind, night, log_id, raised_at)
+                VALUES (?, 'Missed Curfew', ?, NULL, ?)
+            """, (student_id, night, now.strftime(backend.TIME_FORMAT)))
+            if cur.rowcount:
+                raised.append((student_id, room_no, since))
+    return raised
+
+
+def recent_alerts(limit=100):
+    with db.connection() as conn:
+        return conn.execute("""
+            SELECT a.alert_id, a.student_id, s.name, s.room_no, a.kind, a.night, a.raised_at
+            FROM curfew_alerts a JOIN students s ON s.id = a.student_id
+            ORDER BY a.alert_id DESC LIMIT ?
+        """, (limit,)).fetchall()
+
+
+def watch(interval=5.0, hostels=(None,)):
+    """Classify and check curfew every `interval` seconds, for each hostel in turn."""
+    while True:
+        for hostel_id in hostels:
+            with db.use(hostel_id):
+                processed = process_new()
+                missed = check_curfew()
+                backend.stats.refresh_daily_stats()
+            if processed or missed:
+                print(f"{datetime.now():%H:%M:%S} {hostel_id or 'hostel.db'}: classified {processed} movements, "
+                      f"{len(missed)} missed curfew")
+        _time.sleep(interval)
+
+
+# -------------------------------
+# COMMAND LINE
+# -------------------------------
+if __name__ == "__main__":
+    import argparse
+
+    import shards
+
+    parser = argparse.ArgumentParser(description="Curfew and late-return detection.")
+    parser.add_argument("--hostel", help="hostel id from the hostel map (default: every hostel / hostel.db)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("run", help="classify new log rows once and check curfew")
+    p_watch = sub.add_parser("watch", help="keep classifying every few seconds")
+    p_watch.add_argument("--interval", type=float, default=5.0)
+    p_backfill = sub.add_parser("backfill", help="re-classify past logs")
+    p_backfill.add_argument("--from-log-id", type=int, default=0)
+    p_set = sub.add_parser("set", help="set a block's curfew window")
+    p_set.add_argument("block")
+    p_set.add_argument("curfew", help="HH:MM")
+    p_set.add_argument("wake", help="HH:MM")
+    args = parser.parse_args()
+
+    shards.load()
+    shards.init_all()
+    hostels = [args.hostel] if args.hostel else shards.hostels()
+    if args.command == "watch":
+        watch(args.interval, hostels)
+    for hostel_id in hostels:
+        label = hostel_id or "hostel.db"
+        with db.use(hostel_id):
+            if args.command == "run":
+                print(f"✅ {label}: classified {process_new()} movements, {len(check_curfew())} missed curfew")
+            elif args.command == "backfill":
+                print(f"✅ {label}: re-classified {backfill(args.from_log_id)} movements")
+            elif args.command == "set":
+                set_curfew(args.block, args.curfew, args.wake)
+                print(f"✅ {label}: block {args.block} curfew {args.curfew}, wake {args.wake}")
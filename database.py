@@ -1,61 +1,824 @@
 import sqlite3
+from datetime import datetime
 
-# connect to database (creates hostel.db file if it doesn’t exist)
-conn = sqlite3.connect('hostel.db')
-c = conn.cursor()
-
-# 1️⃣ Student Table
-c.execute('''
-CREATE TABLE IF NOT EXISTS Student(
-    student_id INTEGER PRIMARY KEY AUTOINCREMENT,
-    name TEXT NOT NULL,
-    department TEXT,
-    year INTEGER,
-    contact_no TEXT,
-    guardian_name TEXT,
-    guardian_contact TEXT,
-    room_no TEXT
-)
-''')
-
-# 2️⃣ Entry/Exit Log Table
-c.execute('''
-CREATE TABLE IF NOT EXISTS EntryLog(
-    log_id INTEGER PRIMARY KEY AUTOINCREMENT,
-    student_id INTEGER,
-    entry_time TEXT,
-    exit_time TEXT,
-    status TEXT,
-    FOREIGN KEY(student_id) REFERENCES Student(student_id)
-)
-''')
-
-# 3️⃣ Medical Info Table
-c.execute('''
-CREATE TABLE IF NOT EXISTS MedicalInfo(
-    student_id INTEGER PRIMARY KEY,
-    blood_group TEXT,
-    allergies TEXT,
-    medical_conditions TEXT,
-    emergency_contact TEXT,
-    FOREIGN KEY(student_id) REFERENCES Student(student_id)
-)
-''')
-
-# 4️⃣ Leave Request Table
-c.execute('''
-CREATE TABLE IF NOT EXISTS LeaveRequest(
-    request_id INTEGER PRIMARY KEY AUTOINCREMENT,
-    student_id INTEGER,
-    from_date TEXT,
-    to_date TEXT,
-    reason TEXT,
-    status TEXT DEFAULT 'Pending',
-    FOREIGN KEY(student_id) REFERENCES Student(student_id)
-)
-''')
-
-conn.commit()
-conn.close()
-
-print("✅ Database and tables created successfully!")
+import db
+
+# -------------------------------
+# SCHEMA MIGRATIONS
+# -------------------------------
+# Every change to the schema is a numbered step below. migrate() records
+# applied steps in schema_version and only runs the ones a database has not
+# seen yet, so it is safe to call on every startup. Never edit a step that
+# has shipped; append a new one instead.
+
+def _v1_base_tables(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS students (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT,
+            dept TEXT,
+            year INTEGER,
+            contact TEXT,
+            guardian TEXT,
+            guardian_contact TEXT,
+            room_no TEXT
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS entry_logs (
+            log_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_id INTEGER,
+            entry_time TEXT,
+            exit_time TEXT,
+            status TEXT,
+            FOREIGN KEY (student_id) REFERENCES students(id)
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS medical_info (
+            student_id INTEGER PRIMARY KEY,
+            blood_group TEXT,
+            allergies TEXT,
+            conditions TEXT,
+            emergency_contact TEXT,
+            FOREIGN KEY (student_id) REFERENCES students(id)
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS leave_requests (
+            request_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_id INTEGER,
+            from_date TEXT,
+            to_date TEXT,
+            reason TEXT,
+            status TEXT DEFAULT 'Pending',
+            FOREIGN KEY (student_id) REFERENCES students(id)
+        )
+    """)
+
+
+def _table_exists(conn, name):
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (name,)
+    ).fetchone() is not None
+
+
+def _v2_merge_legacy_tables(conn):
+    # Older checkouts ran a standalone script that created a second set of
+    # tables (Student, EntryLog, MedicalInfo, LeaveRequest) nothing read from.
+    # Fold any rows they hold into the real tables, then drop them.
+    if not _table_exists(conn, "Student"):
+        return
+    new_ids = {}
+    for row in conn.execute("""
+        SELECT student_id, name, department, year, contact_no, guardian_name,
+               guardian_contact, room_no
+        FROM Student ORDER BY student_id
+    """).fetchall():
+        cur = conn.execute("""
+            INSERT INTO students (name, dept, year, contact, guardian, guardian_contact, room_no)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, row[1:])
+        new_ids[row[0]] = cur.lastrowid
+
+    if _table_exists(conn, "EntryLog"):
+        for sid, entry_time, exit_time, status in conn.execute(
+            "SELECT student_id, entry_time, exit_time, status FROM EntryLog ORDER BY log_id"
+        ).fetchall():
+            if sid in new_ids:
+                conn.execute("""
+                    INSERT INTO entry_logs (student_id, entry_time, exit_time, status)
+                    VALUES (?, ?, ?, ?)
+                """, (new_ids[sid], entry_time, exit_time, status))
+
+    if _table_exists(conn, "MedicalInfo"):
+        for sid, *fields in conn.execute("""
+            SELECT student_id, blood_group, allergies, medical_conditions, emergency_contact
+            FROM MedicalInfo
+        """).fetchall():
+            if sid in new_ids:
+                conn.execute("""
+                    INSERT OR IGNORE INTO medical_info
+                    (student_id, blood_group, allergies, conditions, emergency_contact)
+                    VALUES (?, ?, ?, ?, ?)
+                """, (new_ids[sid], *fields))
+
+    if _table_exists(conn, "LeaveRequest"):
+        for sid, *fields in conn.execute("""
+            SELECT student_id, from_date, to_date, reason, status
+            FROM LeaveRequest ORDER BY request_id
+        """).fetchall():
+            if sid in new_ids:
+                conn.execute("""
+                    INSERT INTO leave_requests (student_id, from_date, to_date, reason, status)
+                    VALUES (?, ?, ?, ?, ?)
+                """, (new_ids[sid], *fields))
+
+    for table in ("LeaveRequest", "MedicalInfo", "EntryLog", "Student"):
+        conn.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+def _rebuild(conn, table, create_sql, columns):
+    # SQLite cannot alter a foreign key in place; copy into a new table and
+    # swap it in, keeping the AUTOINCREMENT counter where it was.
+    seq = conn.execute("SELECT seq FROM sqlite_sequence WHERE name=?", (table,)).fetchone()
+    conn.execute(create_sql.format(table=f"{table}_new"))
+    cols = ", ".join(columns)
+    conn.execute(f"""
+        INSERT INTO {table}_new ({cols})
+        SELECT {cols} FROM {table}
+        WHERE student_id IN (SELECT id FROM students)
+    """)
+    conn.execute(f"DROP TABLE {table}")
+    conn.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+    if seq is not None:
+        conn.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name=?", (seq[0], table))
+
+
+def _v3_cascade_deletes(conn):
+    # Rows pointing at students that no longer exist are dropped here; the
+    # old delete_student removed them by hand, so none should remain.
+    _rebuild(conn, "entry_logs", """
+        CREATE TABLE {table} (
+            log_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_id INTEGER NOT NULL REFERENCES students(id) ON DELETE CASCADE,
+            entry_time TEXT,
+            exit_time TEXT,
+            status TEXT
+        )
+    """, ["log_id", "student_id", "entry_time", "exit_time", "status"])
+    _rebuild(conn, "medical_info", """
+        CREATE TABLE {table} (
+            student_id INTEGER PRIMARY KEY REFERENCES students(id) ON DELETE CASCADE,
+            blood_group TEXT,
+            allergies TEXT,
+            conditions TEXT,
+            emergency_contact TEXT
+        )
+    """, ["student_id", "blood_group", "allergies", "conditions", "emergency_contact"])
+    _rebuild(conn, "leave_requests", """
+        CREATE TABLE {table} (
+            request_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_id INTEGER NOT NULL REFERENCES students(id) ON DELETE CASCADE,
+            from_date TEXT,
+            to_date TEXT,
+            reason TEXT,
+            status TEXT DEFAULT 'Pending'
+        )
+    """, ["request_id", "student_id", "from_date", "to_date", "reason", "status"])
+
+
+def _v4_hot_query_indexes(conn):
+    # Per-student history and cascade deletes.
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_entry_logs_student_time ON entry_logs(student_id, entry_time)")
+    # Date-range filters and newest-first log views.
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_entry_logs_time ON entry_logs(entry_time)")
+    # Pending/approved lists and "who is on leave" lookups.
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_leave_status_from ON leave_requests(status, from_date)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_leave_student_from ON leave_requests(student_id, from_date)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_students_room ON students(room_no)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_students_dept ON students(dept)")
+
+
+def rebuild_presence(conn):
+    """Recompute the presence table from entry_logs (recovery / first build)."""
+    conn.execute("DELETE FROM presence")
+    conn.execute("""
+        INSERT INTO presence (student_id, state, since, log_id)
+        SELECT student_id, state, since, log_id FROM (
+            SELECT student_id,
+                   CASE WHEN exit_time IS NULL THEN 'in' ELSE 'out' END AS state,
+                   COALESCE(exit_time, entry_time) AS since,
+                   log_id,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY student_id
+                       ORDER BY COALESCE(exit_time, entry_time) DESC, log_id DESC
+                   ) AS rn
+            FROM entry_logs
+            WHERE student_id IN (SELECT id FROM students)
+        )
+        WHERE rn = 1
+    """)
+
+
+def _v5_presence(conn):
+    # One row per student holding their latest gate transition, kept current
+    # by a trigger so every writer (single, bulk, other processes) updates it
+    # in the same transaction as the log row (see backend.add_entry for how
+    # check-ins and check-outs are told apart). Older events arriving late
+    # never overwrite a newer state.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS presence (
+            student_id INTEGER PRIMARY KEY REFERENCES students(id) ON DELETE CASCADE,
+            state TEXT NOT NULL CHECK (state IN ('in', 'out')),
+            since TEXT NOT NULL,
+            log_id INTEGER NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_presence_state_since ON presence(state, since)")
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_entry_logs_presence AFTER INSERT ON entry_logs
+        BEGIN
+            INSERT INTO presence (student_id, state, since, log_id)
+            VALUES (NEW.student_id,
+                    CASE WHEN NEW.exit_time IS NULL THEN 'in' ELSE 'out' END,
+                    COALESCE(NEW.exit_time, NEW.entry_time),
+                    NEW.log_id)
+            ON CONFLICT(student_id) DO UPDATE SET
+                state = excluded.state, since = excluded.since, log_id = excluded.log_id
+            WHERE excluded.since > presence.since
+               OR (excluded.since = presence.since AND excluded.log_id > presence.log_id);
+        END
+    """)
+    rebuild_presence(conn)
+
+
+def _v6_curfew(conn):
+    # Curfew window per hostel block ("A", "B", ... from the room_no prefix);
+    # block "*" is the fallback for everyone else.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS curfew_windows (
+            block TEXT PRIMARY KEY,
+            curfew TEXT NOT NULL,
+            wake TEXT NOT NULL
+        )
+    """)
+    conn.execute("INSERT OR IGNORE INTO curfew_windows (block, curfew, wake) VALUES ('*', '22:00', '06:00')")
+    # Last processed row id for each incremental job.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS watermarks (
+            name TEXT PRIMARY KEY,
+            last_id INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS curfew_alerts (
+            alert_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_id INTEGER NOT NULL REFERENCES students(id) ON DELETE CASCADE,
+            kind TEXT NOT NULL,
+            night TEXT NOT NULL,
+            log_id INTEGER,
+            raised_at TEXT NOT NULL,
+            UNIQUE (student_id, kind, night)
+        )
+    """)
+
+
+def _v7_log_archives(conn):
+    # One row per month of entry_logs moved out to an archive database.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS log_archives (
+            month TEXT PRIMARY KEY,
+            path TEXT NOT NULL,
+            rows INTEGER NOT NULL DEFAULT 0,
+            archived_at TEXT
+        )
+    """)
+    # Hourly counts of archived movements, so analytics never opens archives.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS archived_log_summary (
+            hour TEXT NOT NULL,
+            dept TEXT NOT NULL,
+            block TEXT NOT NULL,
+            check_ins INTEGER NOT NULL DEFAULT 0,
+            check_outs INTEGER NOT NULL DEFAULT 0,
+            late INTEGER NOT NULL DEFAULT 0,
+            overnight INTEGER NOT NULL DEFAULT 0,
+            on_leave INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (hour, dept, block)
+        )
+    """)
+
+
+SEARCH_COLUMNS = ("name", "dept", "room_no", "contact", "guardian", "guardian_contact")
+
+
+def rebuild_search(conn):
+    """Re-index every student for backend.search_students()."""
+    conn.execute("INSERT INTO students_fts(students_fts) VALUES ('rebuild')")
+    conn.execute("INSERT INTO students_trigram(students_trigram) VALUES ('rebuild')")
+
+
+def _v8_student_search(conn):
+    # Word/prefix index over the searchable fields, plus a trigram index over
+    # names for typo-tolerant candidates. Both read their text from students
+    # (external content), so the triggers only have to pass old and new values.
+    columns = ", ".join(SEARCH_COLUMNS)
+    old = ", ".join(f"old.{c}" for c in SEARCH_COLUMNS)
+    new = ", ".join(f"new.{c}" for c in SEARCH_COLUMNS)
+    conn.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS students_fts USING fts5(
+            {columns}, content='students', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='1 2 3'
+        )
+    """)
+    conn.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS students_trigram USING fts5(
+            name, content='students', content_rowid='id', tokenize='trigram'
+        )
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_students_search_ins AFTER INSERT ON students BEGIN
+            INSERT INTO students_fts (rowid, {columns}) VALUES (new.id, {new});
+            INSERT INTO students_trigram (rowid, name) VALUES (new.id, new.name);
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_students_search_del AFTER DELETE ON students BEGIN
+            INSERT INTO students_fts (students_fts, rowid, {columns}) VALUES ('delete', old.id, {old});
+            INSERT INTO students_trigram (students_trigram, rowid, name) VALUES ('delete', old.id, old.name);
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_students_search_upd AFTER UPDATE ON students BEGIN
+            INSERT INTO students_fts (students_fts, rowid, {columns}) VALUES ('delete', old.id, {old});
+            INSERT INTO students_fts (rowid, {columns}) VALUES (new.id, {new});
+            INSERT INTO students_trigram (students_trigram, rowid, name) VALUES ('delete', old.id, old.name);
+            INSERT INTO students_trigram (rowid, name) VALUES (new.id, new.name);
+        END
+    """)
+    rebuild_search(conn)
+
+
+DEFAULT_ROOM_CAPACITY = 2
+
+
+def _v9_rooms(conn):
+    # Gender per block ('M', 'F', or NULL for mixed) and per student.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS blocks (
+            block TEXT PRIMARY KEY,
+            gender TEXT CHECK (gender IN ('M', 'F'))
+        )
+    """)
+    conn.execute("ALTER TABLE students ADD COLUMN gender TEXT CHECK (gender IN ('M', 'F'))")
+    # occupied is kept by the allocation triggers below; the CHECK makes
+    # over-allocation fail the whole transaction instead of slipping through.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS rooms (
+            room_no TEXT PRIMARY KEY,
+            block TEXT NOT NULL REFERENCES blocks(block),
+            capacity INTEGER NOT NULL CHECK (capacity > 0),
+            occupied INTEGER NOT NULL DEFAULT 0 CHECK (occupied BETWEEN 0 AND capacity)
+        )
+    """)
+    # Free-bed index: only rooms with a spare bed are in it.
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_rooms_free ON rooms(block, room_no) WHERE occupied < capacity")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS allocations (
+            student_id INTEGER PRIMARY KEY REFERENCES students(id) ON DELETE CASCADE,
+            room_no TEXT NOT NULL REFERENCES rooms(room_no),
+            allocated_at TEXT NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_allocations_room ON allocations(room_no)")
+    # students.room_no mirrors the allocation so existing queries keep working.
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_allocations_ins AFTER INSERT ON allocations BEGIN
+            UPDATE rooms SET occupied = occupied + 1 WHERE room_no = new.room_no;
+            UPDATE students SET room_no = new.room_no WHERE id = new.student_id;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_allocations_upd AFTER UPDATE OF room_no ON allocations BEGIN
+            UPDATE rooms SET occupied = occupied - 1 WHERE room_no = old.room_no;
+            UPDATE rooms SET occupied = occupied + 1 WHERE room_no = new.room_no;
+            UPDATE students SET room_no = new.room_no WHERE id = new.student_id;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_allocations_del AFTER DELETE ON allocations BEGIN
+            UPDATE rooms SET occupied = occupied - 1 WHERE room_no = old.room_no;
+            UPDATE students SET room_no = NULL WHERE id = old.student_id AND room_no = old.room_no;
+        END
+    """)
+    # Existing free-text rooms become real rooms holding their current
+    # residents, at DEFAULT_ROOM_CAPACITY or however many already live there.
+    block = """CASE WHEN instr(room_no, '-') > 1
+                    THEN upper(trim(substr(room_no, 1, instr(room_no, '-') - 1))) ELSE '*' END"""
+    conn.execute(f"""
+        INSERT OR IGNORE INTO blocks (block)
+        SELECT DISTINCT {block} FROM students WHERE COALESCE(room_no, '') != ''
+    """)
+    conn.execute(f"""
+        INSERT OR IGNORE INTO rooms (room_no, block, capacity)
+        SELECT room_no, {block}, MAX(COUNT(*), {DEFAULT_ROOM_CAPACITY})
+        FROM students WHERE COALESCE(room_no, '') != '' GROUP BY room_no
+    """)
+    conn.execute("""
+        INSERT OR IGNORE INTO allocations (student_id, room_no, allocated_at)
+        SELECT id, room_no, datetime('now', 'localtime') FROM students WHERE COALESCE(room_no, '') != ''
+    """)
+
+
+
+def _v10_leave_workflow(conn):
+    # R*Tree over each live (Pending or Approved) leave: one axis is the
+    # student (a zero-width interval), the other the leave's days as integer
+    # Julian day numbers. A student's overlapping leaves and "who is on leave
+    # on day X" are both range probes instead of scans of leave_requests.
+    # Rejected leaves and rows with unusable dates are left out.
+    conn.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS leave_intervals
+        USING rtree_i32(request_id, student_lo, student_hi, first_day, last_day, +status)
+    """)
+    live = """{row}.status IN ('Pending', 'Approved')
+              AND julianday({row}.from_date) <= julianday({row}.to_date)"""
+    interval = """{row}.request_id, {row}.student_id, {row}.student_id,
+                  CAST(julianday({row}.from_date) AS INTEGER), CAST(julianday({row}.to_date) AS INTEGER),
+                  {row}.status"""
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_leave_intervals_ins AFTER INSERT ON leave_requests
+        WHEN {live.format(row="new")} BEGIN
+            INSERT INTO leave_intervals VALUES ({interval.format(row="new")});
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_leave_intervals_del AFTER DELETE ON leave_requests BEGIN
+            DELETE FROM leave_intervals WHERE request_id = old.request_id;
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_leave_intervals_upd AFTER UPDATE ON leave_requests BEGIN
+            DELETE FROM leave_intervals WHERE request_id = old.request_id;
+            INSERT INTO leave_intervals SELECT {interval.format(row="new")} WHERE {live.format(row="new")};
+        END
+    """)
+    conn.execute(f"""
+        INSERT OR REPLACE INTO leave_intervals
+        SELECT {interval.format(row="l")} FROM leave_requests l WHERE {live.format(row="l")}
+    """)
+    # Every status change, who made it and why.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS leave_history (
+            history_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            request_id INTEGER NOT NULL REFERENCES leave_requests(request_id) ON DELETE CASCADE,
+            old_status TEXT,
+            new_status TEXT NOT NULL,
+            changed_by TEXT,
+            note TEXT,
+            changed_at TEXT NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_leave_history_request ON leave_history(request_id)")
+
+
+
+def _v11_medical_records(conn):
+    # medical_info keeps its columns but new values are AES-GCM encrypted
+    # BLOBs (see medical.py); rows written before this stay plaintext TEXT
+    # until backend.init_db() (or `python medical.py encrypt`) rewrites them
+    # with a key.
+    #
+    # medical_tags is the emergency index: keyed hashes of normalised blood
+    # groups and allergens, so "every O- resident" is one index seek and the
+    # index itself reads as noise without the key.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS medical_tags (
+            tag BLOB NOT NULL,
+            student_id INTEGER NOT NULL REFERENCES students(id) ON DELETE CASCADE,
+            PRIMARY KEY (tag, student_id)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_medical_tags_student ON medical_tags(student_id)")
+    # Who read or changed which record. No foreign key: the trail outlives
+    # the student, and the triggers make it append-only.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS medical_access_log (
+            access_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            at TEXT NOT NULL,
+            actor TEXT,
+            action TEXT NOT NULL,
+            student_id INTEGER,
+            detail TEXT
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_medical_access_student ON medical_access_log(student_id)")
+    for event in ("UPDATE", "DELETE"):
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_medical_access_log_no_{event.lower()}
+            BEFORE {event} ON medical_access_log BEGIN
+                SELECT RAISE(ABORT, 'medical_access_log is append-only');
+            END
+        """)
+
+
+
+# Tables on the change feed: table -> (row id column, operations fed).
+# entry_logs deletes are left out: retention.py moves old months out in
+# bulk and that is not news to anyone.
+FEED_TABLES = {
+    "students": ("id", ("INSERT", "UPDATE", "DELETE")),
+    "entry_logs": ("log_id", ("INSERT", "UPDATE")),
+    "leave_requests": ("request_id", ("INSERT", "UPDATE", "DELETE")),
+    "leave_history": ("history_id", ("INSERT",)),
+    "medical_info": ("student_id", ("INSERT", "UPDATE", "DELETE")),
+    "allocations": ("student_id", ("INSERT", "UPDATE", "DELETE")),
+    "curfew_alerts": ("alert_id", ("INSERT",)),
+}
+
+
+def _v12_change_feed(conn):
+    # Append-only log of row changes, written by triggers so every writer
+    # (backend, bulk import, gate ingest, curfew engine) feeds it. Consumers
+    # tail it by seq (see changefeed.py).
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS change_feed (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            op TEXT NOT NULL CHECK (op IN ('insert', 'update', 'delete')),
+            row_id INTEGER,
+            at TEXT NOT NULL DEFAULT (datetime('now', 'localtime'))
+        )
+    """)
+    for table, (key, ops) in FEED_TABLES.items():
+        for op in ops:
+            row = "old" if op == "DELETE" else "new"
+            # Curfew re-classification rewrites status with the same value.
+            when = "WHEN old.status IS NOT new.status" if (table, op) == ("entry_logs", "UPDATE") else ""
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_feed_{table}_{op.lower()} AFTER {op} ON {table} {when}
+                BEGIN
+                    INSERT INTO change_feed (table_name, op, row_id) VALUES ('{table}', '{op.lower()}', {row}.{key});
+                END
+            """)
+
+
+
+# -------------------------------
+# DAILY ROLLUP
+# -------------------------------
+# daily_stats holds per day, department and block the counts the trend
+# charts need. Log rows are rolled up once the curfew engine has classified
+# them (log_id at or below the "curfew" watermark), leave requests as soon
+# as they exist (counted on their from_date; status is not rolled up, so a
+# request never has to be counted again). "rollup:entry_logs" and
+# "rollup:leave_requests" in watermarks record how far each has got.
+ROLLUP_LOG_COUNTS = ("check_ins", "check_outs", "late", "overnight", "on_leave")
+ROLLUP_LEAVE_COUNTS = ("leave_requests", "leave_days")
+ROLLUP_COUNTS = ROLLUP_LOG_COUNTS + ROLLUP_LEAVE_COUNTS
+
+
+def checkin_sql(alias=None):
+    """SQL that is true for a check-in row (logged without exit_time, see backend.add_entry)."""
+    prefix = f"{alias}." if alias else ""
+    return f"{prefix}exit_time IS NULL"
+
+
+def moved_at_sql(alias=None):
+    """SQL for when a log row's movement happened: exit_time for a check-out, entry_time for a check-in.
+
+    Every count or chart that puts movements into hours or days uses this,
+    so a check-out lands in the same bucket whichever path counts it.
+    """
+    prefix = f"{alias}." if alias else ""
+    return f"COALESCE({prefix}exit_time, {prefix}entry_time)"
+
+
+def block_sql(col):
+    """SQL for backend.block_of(): "A-101" -> "A", no prefix -> "*"."""
+    return f"""CASE WHEN instr({col}, '-') > 1
+                    THEN upper(trim(substr({col}, 1, instr({col}, '-') - 1))) ELSE '*' END"""
+
+
+def _upsert_rollup(conn, columns, select, params=()):
+    conn.execute(f"""
+        INSERT INTO daily_stats (day, dept, block, {", ".join(columns)})
+        {select}
+        ON CONFLICT(day, dept, block) DO UPDATE SET
+            {", ".join(f"{c} = {c} + excluded.{c}" for c in columns)}
+    """, params)
+
+
+def _rollup_watermark(conn, name):
+    row = conn.execute("SELECT last_id FROM watermarks WHERE name = ?", (name,)).fetchone()
+    return row[0] if row else 0
+
+
+def _set_rollup_watermark(conn, name, last_id):
+    conn.execute("""
+        INSERT INTO watermarks (name, last_id) VALUES (?, ?)
+        ON CONFLICT(name) DO UPDATE SET last_id = excluded.last_id
+    """, (name, last_id))
+
+
+def roll_up(conn):
+    """Add log and leave rows past the rollup watermarks to daily_stats. Returns (logs, requests) rolled up."""
+    log_after = _rollup_watermark(conn, "rollup:entry_logs")
+    log_upto = _rollup_watermark(conn, "curfew")
+    logs = 0
+    if log_upto > log_after:
+        logs = conn.execute("SELECT COUNT(*) FROM entry_logs WHERE log_id > ? AND log_id <= ?",
+                            (log_after, log_upto)).fetchone()[0]
+        _upsert_rollup(conn, ROLLUP_LOG_COUNTS, f"""
+            SELECT substr({moved_at_sql("l")}, 1, 10), COALESCE(s.dept, ''), {block_sql("s.room_no")},
+                   SUM({checkin_sql("l")}), SUM(NOT {checkin_sql("l")}),
+                   SUM(l.status = 'Late'), SUM(l.status = 'Overnight'), SUM(l.status = 'On Leave')
+            FROM entry_logs l LEFT JOIN students s ON s.id = l.student_id
+            WHERE l.log_id > ? AND l.log_id <= ?
+            GROUP BY 1, 2, 3
+        """, (log_after, log_upto))
+        _set_rollup_watermark(conn, "rollup:entry_logs", log_upto)
+
+    req_after = _rollup_watermark(conn, "rollup:leave_requests")
+    req_upto = conn.execute("SELECT COALESCE(MAX(request_id), 0) FROM leave_requests").fetchone()[0]
+    requests = 0
+    if req_upto > req_after:
+        requests = conn.execute("SELECT COUNT(*) FROM leave_requests WHERE request_id > ? AND request_id <= ?",
+                                (req_after, req_upto)).fetchone()[0]
+        _upsert_rollup(conn, ROLLUP_LEAVE_COUNTS, f"""
+            SELECT substr(r.from_date, 1, 10), COALESCE(s.dept, ''), {block_sql("s.room_no")},
+                   COUNT(*), SUM(MAX(COALESCE(julianday(r.to_date) - julianday(r.from_date) + 1, 0), 0))
+            FROM leave_requests r LEFT JOIN students s ON s.id = r.student_id
+            WHERE r.request_id > ? AND r.request_id <= ? AND r.from_date IS NOT NULL
+            GROUP BY 1, 2, 3
+        """, (req_after, req_upto))
+        _set_rollup_watermark(conn, "rollup:leave_requests", req_upto)
+    return logs, requests
+
+
+def rebuild_daily_stats(conn):
+    """Recompute daily_stats from entry_logs, archived summaries and leave_requests."""
+    conn.execute("DELETE FROM daily_stats")
+    _upsert_rollup(conn, ROLLUP_LOG_COUNTS, """
+        SELECT substr(hour, 1, 10), dept, block,
+               SUM(check_ins), SUM(check_outs), SUM(late), SUM(overnight), SUM(on_leave)
+        FROM archived_log_summary WHERE true
+        GROUP BY 1, 2, 3
+    """)
+    for name in ("rollup:entry_logs", "rollup:leave_requests"):
+        _set_rollup_watermark(conn, name, 0)
+    return roll_up(conn)
+
+
+def _v13_daily_stats(conn):
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS daily_stats (
+            day TEXT NOT NULL,
+            dept TEXT NOT NULL,
+            block TEXT NOT NULL,
+            {", ".join(f"{c} INTEGER NOT NULL DEFAULT 0" for c in ROLLUP_COUNTS)},
+            PRIMARY KEY (day, dept, block)
+        ) WITHOUT ROWID
+    """)
+    rebuild_daily_stats(conn)
+
+
+# -------------------------------
+# TABLE VERSIONS
+# -------------------------------
+# A counter per cached table (cache.py), bumped by triggers in the same
+# transaction as the write, so every process sees writes made by any other
+# (gate_ingest, curfew watch, the CLIs). Keys are the cache's table names;
+# rooms also covers blocks and allocations.
+VERSIONED_TABLES = {
+    "students": "students",
+    "entry_logs": "entry_logs",
+    "presence": "presence",
+    "medical_info": "medical_info",
+    "leave_requests": "leave_requests",
+    "rooms": "rooms",
+    "blocks": "rooms",
+    "allocations": "rooms",
+}
+
+
+def _v14_table_versions(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS table_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    """)
+    conn.executemany("INSERT OR IGNORE INTO table_versions (name) VALUES (?)",
+                     [(name,) for name in set(VERSIONED_TABLES.values())])
+    for table, name in VERSIONED_TABLES.items():
+        for op in ("INSERT", "UPDATE", "DELETE"):
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_version_{table}_{op.lower()} AFTER {op} ON {table}
+                BEGIN
+                    UPDATE table_versions SET version = version + 1 WHERE name = '{name}';
+                END
+            """)
+
+
+def _v15_movement_time(conn):
+    # Time-bucketed counts go by moved_at_sql(); the expression index keeps
+    # their date ranges off a full scan. daily_stats is re-bucketed the same
+    # way; archived_log_summary rows written before keep their hours.
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_entry_logs_moved_at ON entry_logs({moved_at_sql()})")
+    rebuild_daily_stats(conn)
+
+
+MIGRATIONS = [
+    (1, "base tables", _v1_base_tables),
+    (2, "merge legacy CamelCase tables", _v2_merge_legacy_tables),
+    (3, "foreign keys with ON DELETE CASCADE", _v3_cascade_deletes),
+    (4, "indexes for hot queries", _v4_hot_query_indexes),
+    (5, "live presence table", _v5_presence),
+    (6, "curfew windows, watermarks and alerts", _v6_curfew),
+    (7, "log archive catalogue and summaries", _v7_log_archives),
+    (8, "full-text student search", _v8_student_search),
+    (9, "rooms, beds and allocations", _v9_rooms),
+    (10, "leave interval index and history", _v10_leave_workflow),
+    (11, "medical emergency tags and access log", _v11_medical_records),
+    (12, "change feed", _v12_change_feed),
+    (13, "daily stats rollup", _v13_daily_stats),
+    (14, "table versions for cache invalidation", _v14_table_versions),
+    (15, "movement time index", _v15_movement_time),
+]
+
+
+def current_version(conn):
+    if not _table_exists(conn, "schema_version"):
+        return 0
+    return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+
+def migrate(conn, migrations=MIGRATIONS):
+    """Apply every pending migration, each in its own transaction.
+
+    conn must not be inside a transaction: foreign key enforcement has to
+    be switched off around table rebuilds, which SQLite only allows
+    between transactions.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name TEXT,
+            applied_at TEXT
+        )
+    """)
+    conn.commit()
+    applied = []
+    for version, name, step in migrations:
+        if version <= current_version(conn):
+            continue
+        conn.execute("PRAGMA foreign_keys=OFF")
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            # Another process may have migrated while we waited for the lock.
+            if version <= current_version(conn):
+                conn.rollback()
+                continue
+            step(conn)
+            conn.execute(
+                "INSERT INTO schema_version (version, name, applied_at) VALUES (?, ?, ?)",
+                (version, name, datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
+            )
+            conn.commit()
+            applied.append(version)
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.execute("PRAGMA foreign_keys=ON")
+    return applied
+
+
+# -------------------------------
+# RUN MIGRATIONS
+# -------------------------------
+if __name__ == "__main__":
+    import argparse
+
+    import shards
+
+    parser = argparse.ArgumentParser(description="Migrate the hostel database schema.")
+    parser.add_argument("path", nargs="?", help="database file (default: every hostel's, else hostel.db)")
+    parser.add_argument("--hostel", help="hostel id from the hostel map")
+    parser.add_argument("--rebuild-presence", action="store_true",
+                        help="recompute who is in/out from entry_logs")
+    parser.add_argument("--rebuild-search", action="store_true",
+                        help="re-index students for search")
+    parser.add_argument("--rebuild-stats", action="store_true",
+                        help="recompute the daily_stats rollup")
+    args = parser.parse_args()
+
+    shards.load()
+    if args.path:
+        paths = [args.path]
+    else:
+        hostels = [args.hostel] if args.hostel else shards.hostels()
+        unknown = [h for h in hostels if h is not None and h not in db.shards()]
+        if unknown:
+            parser.error(f"unknown hostel {unknown[0]!r}; known: {', '.join(sorted(db.shards()))}")
+        paths = [db.shards()[h] if h else db.DB_PATH for h in hostels]
+    for path in paths:
+        conn = sqlite3.connect(path)
+        applied = migrate(conn)
+        print(f"✅ {path}: schema at version {current_version(conn)} (applied: {applied or 'none'})")
+        if args.rebuild_presence:
+            with conn:
+                rebuild_presence(conn)
+            count = conn.execute("SELECT COUNT(*) FROM presence").fetchone()[0]
+            print(f"✅ {path}: presence rebuilt for {count} students")
+        if args.rebuild_search:
+            with conn:
+                rebuild_search(conn)
+            print(f"✅ {path}: student search index rebuilt")
+        if args.rebuild_stats:
+            with conn:
+                logs, requests = rebuild_daily_stats(conn)
+            print(f"✅ {path}: daily stats rebuilt from {logs} logs and {requests} leave requests")
+        conn.close()
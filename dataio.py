@@ -0,0 +1,296 @@
+import csv
+import io
+import tempfile
+
+import backend
+import curfew
+import db
+import leaves
+import medical
+
+# -------------------------------
+# TABLE LAYOUTS
+# -------------------------------
+TABLES = {
+    "students": ("id", "name", "dept", "year", "contact", "guardian", "guardian_contact", "room_no", "gender"),
+    "entry_logs": ("log_id", "student_id", "entry_time", "exit_time", "status"),
+    "leave_requests": ("request_id", "student_id", "from_date", "to_date", "reason", "status"),
+    "medical_info": ("student_id", "blood_group", "allergies", "conditions", "emergency_contact"),
+}
+INTEGER_COLUMNS = {"id", "year", "log_id", "student_id", "request_id"}
+FORMATS = ("csv", "parquet")
+CHUNK_SIZE = 5000
+# Exports for the download buttons stay in memory up to this size, then spill to disk.
+SPOOL_BYTES = 8 * 1024 * 1024
+
+
+def _columns(table):
+    if table not in TABLES:
+        raise ValueError(f"Unknown table {table!r}; choose one of {tuple(TABLES)}")
+    return TABLES[table]
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Parquet support needs pyarrow: pip install pyarrow")
+    return pyarrow
+
+
+def iter_chunks(table, chunk_size=CHUNK_SIZE):
+    """Yield the rows of a table in chunks straight off one cursor."""
+    columns = _columns(table)
+    if table == "medical_info":
+        with db.transaction() as conn:
+            medical.log_access(conn, "export", detail="medical_info export")
+    with db.connection() as conn:
+        cur = conn.execute(f"SELECT {', '.join(columns)} FROM {table} ORDER BY {columns[0]}")
+        while True:
+            rows = cur.fetchmany(chunk_size)
+            if not rows:
+                return
+            yield medical.decrypt_rows(rows) if table == "medical_info" else rows
+
+
+# -------------------------------
+# EXPORT
+# -------------------------------
+def _export_csv(table, out):
+    text = io.TextIOWrapper(out, encoding="utf-8", newline="", write_through=True)
+    writer = csv.writer(text)
+    writer.writerow(_columns(table))
+    count = 0
+    for rows in iter_chunks(table):
+        writer.writerows(rows)
+        count += len(rows)
+    text.detach()
+    return count
+
+
+def _export_parquet(table, out):
+    pa = _pyarrow()
+    columns = _columns(table)
+    schema = pa.schema([(c, pa.int64() if c in INTEGER_COLUMNS else pa.string()) for c in columns])
+    count = 0
+    # One row group per chunk, so memory stays at one chunk whatever the table size.
+    with pa.parquet.ParquetWriter(out, schema) as writer:
+        for rows in iter_chunks(table):
+            writer.write_table(pa.Table.from_pylist([dict(zip(columns, r)) for r in rows], schema=schema))
+            count += len(rows)
+    return count
+
+
+def export_table(table, dest, fmt="csv"):
+    """Stream a table to a path or binary file object. Returns the row count."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}; choose one of {FORMATS}")
+    export = _export_csv if fmt == "csv" else _export_parquet
+    if isinstance(dest, (str, bytes)) or hasattr(dest, "__fspath__"):
+        with open(dest, "wb") as out:
+            return export(table, out)
+    return export(table, dest)
+
+
+def export_file(table, fmt="csv"):
+    """Export into a spooled temporary file, rewound and ready to read."""
+    out = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES)
+    export_table(table, out, fmt)
+    out.seek(0)
+    return out
+
+
+# -------------------------------
+# IMPORT
+# -------------------------------
+def _read_csv(src):
+    text = io.TextIOWrapper(src, encoding="utf-8-sig", newline="")
+    try:
+        yield from csv.DictReader(text)
+    finally:
+        text.detach()
+
+
+def _read_parquet(src):
+    pa = _pyarrow()
+    for batch in pa.parquet.ParquetFile(src).iter_batches(batch_size=CHUNK_SIZE):
+        yield from batch.to_pylist()
+
+
+def _clean(record, fields, ints=()):
+    row = {}
+    for field in fields:
+        value = record.get(field)
+        if value == "":
+            value = None
+        if field in ints and isinstance(value, str):
+            try:
+                value = int(value)
+            except ValueError:
+                pass  # left as-is so row validation reports it
+        row[field] = value
+    return row
+
+
+def _import_simple(table, records, fields):
+    count, errors, batch = 0, [], []
+    marks = ", ".join("?" * len(fields))
+    sql = f"INSERT OR REPLACE INTO {table} ({', '.join(fields)}) VALUES ({marks})"
+
+    def flush():
+        with db.transaction() as conn:
+            known = backend.existing_student_ids(conn, {row[0] for _, _, row in batch})
+            good = [row for _, _, row in batch if row[0] in known]
+            errors.extend((i, r, f"unknown student_id {row[0]}") for i, r, row in batch if row[0] not in known)
+            if table == "medical_info":
+                medical.store_many(conn, good, action="import")
+            else:
+                conn.executemany(sql, good)
+        backend.bump_versions(table)
+        batch.clear()
+        return len(good)
+
+    for index, record in enumerate(records):
+        row = _clean(record, fields, ints=("student_id",))
+        if not isinstance(row["student_id"], int):
+            errors.append((index, record, "student_id must be an integer"))
+            continue
+        batch.append((index, record, tuple(row[f] for f in fields)))
+        if len(batch) >= CHUNK_SIZE:
+            count += flush()
+    if batch:
+        count += flush()
+    errors.sort(key=lambda e: e[0])
+    return count, errors
+
+
+def _import_leaves(records):
+    # Through leaves.import_requests(), so imported leaves get the same
+    # overlap checks and history as ones filed in the app.
+    fields = ("student_id", "from_date", "to_date", "reason", "status")
+    count, errors, batch = 0, [], []
+
+    def flush():
+        ids, bad = leaves.import_requests([row for _, _, row in batch])
+        errors.extend((batch[position][0], batch[position][1], reason) for position, reason in bad)
+        batch.clear()
+        return len(ids)
+
+    for index, record in enumerate(records):
+        row = _clean(record, fields, ints=("student_id",))
+        if not isinstance(row["student_id"], int):
+            errors.append((index, record, "student_id must be an integer"))
+            continue
+        batch.append((index, record, tuple(row[f] for f in fields[:-1]) + (row["status"] or "Pending",)))
+        if len(batch) >= CHUNK_SIZE:
+            count += flush()
+    if batch:
+        count += flush()
+    errors.sort(key=lambda e: e[0])
+    return count, errors
+
+
+def _import_logs(records):
+    # Each chunk is classified in the transaction that inserts it, without
+    # alerts for the imported history; gate rows logged before or during the
+    # import are classified there too and still raise theirs.
+    fields = ("student_id", "entry_time", "exit_time", "status")
+    count, errors, batch = 0, [], []
+
+    def flush(offset):
+        with db.transaction() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            ids, bad = backend.insert_entries(conn, batch, offset)
+            curfew.process_pending(conn, quiet=set(ids))
+        backend.bump_versions("entry_logs")
+        errors.extend(bad)
+        batch.clear()
+        return len(ids)
+
+    offset = 0
+    for record in records:
+        row = _clean(record, fields, ints=("student_id",))
+        # Let insert_entries fill in its defaults for missing values.
+        batch.append({k: v for k, v in row.items() if v is not None or k == "exit_time"})
+        if len(batch) >= CHUNK_SIZE:
+            count += flush(offset)
+            offset += CHUNK_SIZE
+    if batch:
+        count += flush(offset)
+    return count, errors
+
+
+def import_records(table, records):
+    """Bulk-load dict records (e.g. a term's roster or historical gate logs).
+
+    Returns (imported_count, errors) where errors holds (index, record,
+    reason) for every rejected record. Student, log and request ids in the
+    input are ignored and new ones assigned; medical_info rows replace the
+    existing row for their student.
+    """
+    _columns(table)
+    if table == "students":
+        fields = _columns("students")[1:]
+        ids, errors = backend.add_students_bulk(_clean(r, fields) for r in records)
+        return len(ids), errors
+    if table == "entry_logs":
+        return _import_logs(records)
+    if table == "leave_requests":
+        return _import_leaves(records)
+    return _import_simple(table, records, _columns("medical_info"))
+
+
+def import_table(table, src, fmt="csv"):
+    """Bulk-load a CSV or Parquet file (path or binary file object)."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}; choose one of {FORMATS}")
+    reader = _read_csv if fmt == "csv" else _read_parquet
+    if isinstance(src, (str, bytes)) or hasattr(src, "__fspath__"):
+        with open(src, "rb") as f:
+            return import_records(table, reader(f))
+    return import_records(table, reader(src))
+
+
+# -------------------------------
+# COMMAND LINE
+# -------------------------------
+if __name__ == "__main__":
+    import argparse
+    import os
+
+    import shards
+
+    parser = argparse.ArgumentParser(description="Export or bulk-import hostel tables.")
+    parser.add_argument("--hostel", help="hostel id from the hostel map (required when there is one)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_export = sub.add_parser("export")
+    p_export.add_argument("table", choices=TABLES)
+    p_export.add_argument("-o", "--output", required=True)
+    p_import = sub.add_parser("import")
+    p_import.add_argument("table", choices=TABLES)
+    p_import.add_argument("input")
+    for p in (p_export, p_import):
+        p.add_argument("--format", choices=FORMATS,
+                       help="defaults to the file extension, else csv")
+    args = parser.parse_args()
+
+    path = args.output if args.command == "export" else args.input
+    fmt = args.format or ("parquet" if os.path.splitext(path)[1].lower() == ".parquet" else "csv")
+    shards.load()
+    if args.hostel is None and shards.hostels() != [None]:
+        # Ids are per hostel, so a file belongs to exactly one of them.
+        parser.error("with a hostel map, say which hostel: --hostel " + " | ".join(shards.hostels()))
+    shards.init_all()
+    db.select(args.hostel)
+    label = args.hostel or "hostel.db"
+    if args.command == "export":
+        count = export_table(args.table, path, fmt)
+        print(f"✅ Exported {count} {args.table} rows from {label} to {path}")
+    else:
+        count, errors = import_table(args.table, path, fmt)
+        print(f"✅ Imported {count} {args.table} rows from {path} into {label}")
+        for index, _, reason in errors[:20]:
+            print(f"   row {index + 1}: {reason}")
+        if len(errors) > 20:
+            print(f"   ... {len(errors) - 20} more rejected rows")
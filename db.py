@@ -0,0 +1,320 @@
+import contextvars
+import os
+import pathlib
+import queue
+import sqlite3
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+
+import perf
+
+# -------------------------------
+# SETTINGS
+# -------------------------------
+DB_PATH = os.environ.get("HOSTEL_DB", "hostel.db")
+POOL_SIZE = int(os.environ.get("HOSTEL_DB_POOL_SIZE", "8"))
+# "shared": connections are checked out per call and returned to the pool.
+# "thread": every thread keeps its own connection until the thread ends
+# (Streamlit runs each session's script on its own thread, so this pins one
+# per session run). Both scopes are bounded by POOL_SIZE.
+POOL_SCOPE = os.environ.get("HOSTEL_DB_SCOPE", "shared")
+BUSY_TIMEOUT = 30.0
+STATEMENT_CACHE_SIZE = 256
+CACHE_SIZE_KB = 16 * 1024
+MMAP_SIZE = 256 * 1024 * 1024
+
+
+# -------------------------------
+# CONNECTION POOL
+# -------------------------------
+class _Pinned:
+    """A thread's connection in a thread-scoped pool; handed back when the thread ends."""
+
+    def __init__(self, pool, conn):
+        self.conn = conn
+        self.depth = 1  # nested connection() blocks share it
+        weakref.finalize(self, pool._give_back, conn)
+
+
+class ConnectionPool:
+    def __init__(self, path=DB_PATH, size=POOL_SIZE, scope=POOL_SCOPE, timeout=BUSY_TIMEOUT, read_only=False):
+        if scope not in ("shared", "thread"):
+            raise ValueError(f"Unknown pool scope: {scope}")
+        self.path = path
+        self.size = size
+        self.scope = scope
+        self.timeout = timeout
+        self.read_only = read_only
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._local = threading.local()
+        self._all = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+        # journal_mode is stored in the database file, so it only has to be
+        # switched once; the per-connection pragmas are applied in _connect().
+        conn = self._connect()
+        if not read_only:
+            conn.execute("PRAGMA journal_mode=WAL")
+        self._idle.put(conn)
+
+    def _connect(self):
+        started = time.perf_counter()
+        # A read-only pool serves a snapshot nobody writes to any more, so
+        # SQLite can skip locking and change detection (immutable=1).
+        target = f"{pathlib.Path(self.path).absolute().as_uri()}?mode=ro&immutable=1" if self.read_only else self.path
+        conn = sqlite3.connect(
+            target,
+            timeout=self.timeout,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+            factory=perf.Connection,
+            uri=self.read_only,
+        )
+        if self.read_only:
+            conn.execute("PRAGMA query_only=ON")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA cache_size=-{CACHE_SIZE_KB}")
+        conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+        conn.execute("PRAGMA foreign_keys=ON")
+        with self._lock:
+            self._all.append(conn)
+        if perf.ENABLED:
+            perf.record("db.connect", time.perf_counter() - started)
+        return conn
+
+    def acquire(self):
+        if self._closed:
+            raise sqlite3.ProgrammingError("Connection pool is closed")
+        if self.scope == "thread":
+            pinned = getattr(self._local, "pinned", None)
+            if pinned is not None:
+                pinned.depth += 1
+                return pinned.conn
+
+        started = time.perf_counter()
+        if not self._slots.acquire(timeout=self.timeout):
+            raise sqlite3.OperationalError("Timed out waiting for a pooled connection")
+        if perf.ENABLED:
+            perf.record("db.acquire", time.perf_counter() - started)
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            try:
+                conn = self._connect()
+            except Exception:
+                self._slots.release()
+                raise
+        if self.scope == "thread":
+            self._local.pinned = _Pinned(self, conn)
+        return conn
+
+    def release(self, conn):
+        if self.scope == "thread":
+            pinned = self._local.pinned
+            pinned.depth -= 1
+            if pinned.depth:
+                return  # an outer block still owns the connection and its transaction
+        if conn.in_transaction:
+            conn.rollback()
+        if self.scope == "shared":
+            self._give_back(conn)
+
+    def _give_back(self, conn):
+        if self._closed:
+            conn.close()
+        else:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+        self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    @contextmanager
+    def transaction(self):
+        with self.connection() as conn:
+            with conn:
+                yield conn
+
+    def close(self):
+        self._closed = True
+        with self._lock:
+            conns, self._all = self._all, []
+        for conn in conns:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+
+# -------------------------------
+# MODULE-LEVEL POOL
+# -------------------------------
+# Calls go to DB_PATH unless a hostel shard is selected with use() (or
+# select()); each shard is its own database file with its own pool. The
+# selection is a context variable, so it follows the thread or asyncio task
+# that made it and concurrent callers can work on different hostels.
+_pool = None
+_pool_lock = threading.Lock()
+_shards = {}  # hostel_id -> database path
+_shard_pools = {}
+_hostel = contextvars.ContextVar("hostel", default=None)
+_replicas = {}  # hostel_id (None for DB_PATH) -> read-only snapshot path
+_replica_pools = {}  # snapshot path -> pool
+_on_replica = contextvars.ContextVar("replica", default=False)
+
+
+def get_pool():
+    global _pool
+    hostel = _hostel.get()
+    if _on_replica.get() and hostel in _replicas:
+        return _replica_pool(_replicas[hostel])
+    if hostel is not None:
+        return _shard_pool(hostel)
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(DB_PATH, POOL_SIZE, POOL_SCOPE)
+    return _pool
+
+
+def _shard_pool(hostel):
+    pool = _shard_pools.get(hostel)
+    if pool is None:
+        with _pool_lock:
+            if hostel not in _shards:
+                raise KeyError(f"Unknown hostel {hostel!r}; known: {sorted(_shards)}")
+            pool = _shard_pools.get(hostel)
+            if pool is None:
+                pool = _shard_pools[hostel] = ConnectionPool(_shards[hostel], POOL_SIZE, POOL_SCOPE)
+    return pool
+
+
+def _replica_pool(path):
+    pool = _replica_pools.get(path)
+    if pool is None:
+        with _pool_lock:
+            pool = _replica_pools.get(path)
+            if pool is None:
+                pool = _replica_pools[path] = ConnectionPool(path, POOL_SIZE, POOL_SCOPE, read_only=True)
+    return pool
+
+
+def configure_shards(shards):
+    """Replace the hostel -> database path map; open shard pools are closed."""
+    with _pool_lock:
+        old = list(_shard_pools.values())
+        _shard_pools.clear()
+        _shards.clear()
+        _shards.update(shards)
+    for pool in old:
+        pool.close()
+
+
+def shards():
+    return dict(_shards)
+
+
+def current_hostel():
+    return _hostel.get()
+
+
+@contextmanager
+def use(hostel):
+    """Route db calls in this block (this thread / task only) to a hostel's shard; None means DB_PATH."""
+    token = _hostel.set(hostel)
+    try:
+        yield
+    finally:
+        _hostel.reset(token)
+
+
+def select(hostel):
+    """use() without an end, for scripts whose whole run belongs to one hostel (e.g. a Streamlit rerun)."""
+    _hostel.set(hostel)
+
+
+def configure_replica(path, hostel=None):
+    """Serve from_replica() reads for a hostel (None: DB_PATH) from a read-only copy; path None drops it."""
+    with _pool_lock:
+        old = _replicas.pop(hostel, None)
+        if path is not None:
+            _replicas[hostel] = os.path.abspath(path)
+        stale = _replica_pools.pop(old, None) if old not in _replicas.values() else None
+    if stale is not None:
+        stale.close()
+
+
+def current_replica():
+    """The snapshot path db calls in this context read from, or None for the live database."""
+    return _replicas.get(_hostel.get()) if _on_replica.get() else None
+
+
+@contextmanager
+def from_replica():
+    """Send db calls in this block to the current hostel's replica, if one is configured."""
+    token = _on_replica.set(True)
+    try:
+        yield current_replica()
+    finally:
+        _on_replica.reset(token)
+
+
+def configure(path=None, size=None, scope=None):
+    global _pool, DB_PATH, POOL_SIZE, POOL_SCOPE
+    with _pool_lock:
+        if path is not None:
+            DB_PATH = path
+        if size is not None:
+            POOL_SIZE = size
+        if scope is not None:
+            POOL_SCOPE = scope
+        old, _pool = _pool, ConnectionPool(DB_PATH, POOL_SIZE, POOL_SCOPE)
+    if old is not None:
+        old.close()
+    return _pool
+
+
+def close():
+    global _pool
+    with _pool_lock:
+        old, _pool = _pool, None
+        shard_pools = list(_shard_pools.values()) + list(_replica_pools.values())
+        _shard_pools.clear()
+        _replica_pools.clear()
+    for pool in [old] + shard_pools:
+        if pool is not None:
+            pool.close()
+
+
+def connection():
+    return get_pool().connection()
+
+
+def transaction():
+    return get_pool().transaction()
+
+
+@contextmanager
+def attached(conn, path, alias):
+    """ATTACH another database file to a pooled connection for the block.
+
+    Must be entered outside a transaction; the file is created if missing.
+    """
+    conn.execute("ATTACH DATABASE ? AS " + alias, (str(path),))
+    try:
+        yield conn
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        conn.execute("DETACH DATABASE " + alias)
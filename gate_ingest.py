@@ -0,0 +1,433 @@
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+from datetime import datetime
+
+import backend
+import curfew
+import db
+
+# -------------------------------
+# GATE INGEST SERVICE
+# -------------------------------
+# One asyncio process owns all gate writes. Readers POST swipe events:
+#
+#   POST /events   {"student_id": 7, "direction": "in", "time": "2025-11-13 21:30:00"}
+#                  (or a list of them; "time" defaults to now)
+#   GET  /metrics  queue depth, throughput, commit latency
+#   GET  /health
+#
+# An accepted event is appended to the spool file before the reply goes
+# out, then queued. A single writer task drains the queue in batches, one
+# transaction per batch, and records the last committed sequence number in
+# the "ingest" watermark inside that same transaction. On start-up every
+# spooled event past the watermark is committed before new traffic is taken,
+# so nothing acknowledged is lost and nothing is written twice. The curfew
+# rules run after a batch is committed, outside its retries; a failed run is
+# picked up by the next batch. Any write error other than a busy database
+# stops the writer and closes the listeners, so gates fail over instead of
+# queueing into a dead service.
+#
+# When the queue is full the service waits up to ENQUEUE_TIMEOUT for room,
+# then answers 503 with Retry-After; events before the one that timed out
+# were accepted and are reported in the reply.
+#
+# Student ids are per hostel, so with hostel shards each hostel runs its own
+# service (python gate_ingest.py --hostel <id> --port ...), with its own
+# spool, and HOSTEL_INGEST_URL may contain {hostel} to reach the right one.
+
+HOST = os.environ.get("HOSTEL_INGEST_HOST", "127.0.0.1")
+PORT = int(os.environ.get("HOSTEL_INGEST_PORT", "8765"))
+INGEST_URL = os.environ.get("HOSTEL_INGEST_URL")  # set to send app check-ins here; {hostel} is filled in
+SPOOL_PATH = os.environ.get("HOSTEL_INGEST_SPOOL", "ingest.spool")
+QUEUE_SIZE = 10000
+BATCH_SIZE = 500
+# How long the writer holds a batch open for more events once the queue runs dry.
+LINGER = 0.005
+ENQUEUE_TIMEOUT = 0.5
+RETRY_DELAY = 1.0
+WATERMARK = "ingest"
+LATENCY_WINDOW = 10000
+
+DIRECTIONS = ("in", "out")
+STATUS_TEXT = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found",
+               405: "Method Not Allowed", 503: "Service Unavailable"}
+
+
+def parse_event(event):
+    """Turn a swipe event into an add_entry() row; raises ValueError if malformed."""
+    if not isinstance(event, dict):
+        raise ValueError("event must be a JSON object")
+    student_id = event.get("student_id")
+    if isinstance(student_id, bool) or not isinstance(student_id, int):
+        raise ValueError(f"student_id must be an integer, got {student_id!r}")
+    direction = event.get("direction")
+    if direction not in DIRECTIONS:
+        raise ValueError(f"direction must be one of {DIRECTIONS}, got {direction!r}")
+    at = event.get("time") or datetime.now().strftime(backend.TIME_FORMAT)
+    try:
+        datetime.strptime(at, backend.TIME_FORMAT)
+    except (TypeError, ValueError):
+        raise ValueError(f"time must look like YYYY-MM-DD HH:MM:SS, got {at!r}")
+    return backend.movement_row(student_id, at, checkout=direction == "out")
+
+
+def _percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+# -------------------------------
+# METRICS
+# -------------------------------
+class Metrics:
+    def __init__(self):
+        self.started = time.monotonic()
+        self.accepted = 0
+        self.rejected = 0
+        self.throttled = 0
+        self.committed = 0
+        self.invalid = 0
+        self.batches = 0
+        self.commit_errors = 0
+        self.classify_errors = 0
+        self.replayed = 0
+        self.last_batch_size = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)  # accept -> commit, seconds
+        self.commit_times = deque(maxlen=LATENCY_WINDOW)
+
+    def snapshot(self, queue_depth=0):
+        uptime = time.monotonic() - self.started
+        ms = lambda v: None if v is None else round(v * 1000, 3)
+        return {
+            "uptime_s": round(uptime, 3),
+            "queue_depth": queue_depth,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "throttled": self.throttled,
+            "committed": self.committed,
+            "invalid": self.invalid,
+            "replayed": self.replayed,
+            "batches": self.batches,
+            "commit_errors": self.commit_errors,
+            "classify_errors": self.classify_errors,
+            "last_batch_size": self.last_batch_size,
+            "events_per_s": round(self.committed / uptime, 1) if uptime else 0.0,
+            "latency_p50_ms": ms(_percentile(self.latencies, 0.50)),
+            "latency_p99_ms": ms(_percentile(self.latencies, 0.99)),
+            "commit_p50_ms": ms(_percentile(self.commit_times, 0.50)),
+            "commit_p99_ms": ms(_percentile(self.commit_times, 0.99)),
+        }
+
+
+# -------------------------------
+# SERVICE
+# -------------------------------
+class IngestService:
+    def __init__(self, spool_path=SPOOL_PATH, queue_size=QUEUE_SIZE, batch_size=BATCH_SIZE,
+                 linger=LINGER, fsync=True, classify=True):
+        self.spool_path = spool_path
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.linger = linger
+        self.fsync = fsync
+        self.classify = classify  # run the curfew rules after every batch
+        self.metrics = Metrics()
+        self.queue = None
+        self.next_seq = 1
+        self.committed_seq = 0
+        self._spool = None
+        self._writer_task = None
+        self.failure = None  # the exception that stopped the writer
+        self._space = None  # set by the writer whenever it takes events off the queue
+        self._servers = []
+
+    # --- spool -------------------------------------------------------
+    def _read_spool(self):
+        if not os.path.exists(self.spool_path):
+            return []
+        events = []
+        with open(self.spool_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    seq, row = json.loads(line)
+                except ValueError:
+                    continue  # torn last line from a crash mid-write
+                events.append((seq, tuple(row)))
+        return events
+
+    def _append_spool(self, events):
+        self._spool.write("".join(json.dumps([seq, row]) + "\n" for seq, row, _ in events))
+        self._spool.flush()
+        if self.fsync:
+            os.fsync(self._spool.fileno())
+
+    def _truncate_spool(self):
+        self._spool.seek(0)
+        self._spool.truncate()
+
+    # --- committing --------------------------------------------------
+    def _commit(self, batch):
+        with db.transaction() as conn:
+            _, errors = backend.insert_entries(conn, [row for _, row, _ in batch])
+            conn.execute("""
+                INSERT INTO watermarks (name, last_id) VALUES (?, ?)
+                ON CONFLICT(name) DO UPDATE SET last_id = MAX(last_id, excluded.last_id)
+            """, (WATERMARK, batch[-1][0]))
+        backend.bump_versions("entry_logs")
+        for index, row, reason in errors:
+            print(f"⚠️ Dropped event {batch[index][0]} {row}: {reason}", file=sys.stderr)
+        return len(errors)
+
+    def _classify(self):
+        if not self.classify:
+            return
+        try:
+            curfew.process_new()
+        except Exception as e:
+            # The rows are committed; process_new() resumes from its watermark next time.
+            self.metrics.classify_errors += 1
+            print(f"⚠️ Curfew classification failed, retrying after the next batch: {e}", file=sys.stderr)
+
+    def replay(self):
+        """Commit spooled events a previous run accepted but never wrote."""
+        with db.connection() as conn:
+            row = conn.execute("SELECT last_id FROM watermarks WHERE name = ?", (WATERMARK,)).fetchone()
+        self.committed_seq = row[0] if row else 0
+        spooled = self._read_spool()
+        pending = [(seq, row, None) for seq, row in spooled if seq > self.committed_seq]
+        for i in range(0, len(pending), self.batch_size):
+            batch = pending[i:i + self.batch_size]
+            self.metrics.invalid += self._commit(batch)
+            self.metrics.replayed += len(batch)
+            self.committed_seq = batch[-1][0]
+        if pending:
+            self._classify()
+        self.next_seq = max([self.committed_seq] + [seq for seq, _ in spooled]) + 1
+        return len(pending)
+
+    async def _write_batches(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.linger
+            while len(batch) < self.batch_size:
+                if not self.queue.empty():
+                    batch.append(self.queue.get_nowait())
+                    continue
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            self._space.set()
+            started = time.monotonic()
+            while True:
+                try:
+                    invalid = await asyncio.to_thread(self._commit, batch)
+                    break
+                except sqlite3.OperationalError as e:
+                    # Locked or busy: the events are safe in the spool, try again.
+                    self.metrics.commit_errors += 1
+                    print(f"⚠️ Batch commit failed, retrying: {e}", file=sys.stderr)
+                    await asyncio.sleep(RETRY_DELAY)
+            done = time.monotonic()
+            await asyncio.to_thread(self._classify)
+            self.committed_seq = batch[-1][0]
+            self.metrics.commit_times.append(done - started)
+            self.metrics.latencies.extend(done - accepted for _, _, accepted in batch)
+            self.metrics.committed += len(batch) - invalid
+            self.metrics.invalid += invalid
+            self.metrics.batches += 1
+            self.metrics.last_batch_size = len(batch)
+            for _ in batch:
+                self.queue.task_done()
+            if self.queue.empty() and self.committed_seq == self.next_seq - 1:
+                self._truncate_spool()
+
+    # --- accepting ---------------------------------------------------
+    async def submit(self, rows):
+        """Spool and queue rows; returns how many were accepted before the queue stayed full."""
+        accepted = []
+        for row in rows:
+            if self.queue.full():
+                try:
+                    await asyncio.wait_for(self._room(), ENQUEUE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    self.metrics.throttled += 1
+                    break
+            # Sequence numbers are handed out and queued without yielding, so
+            # the queue (and the spool) stays in sequence order.
+            event = (self.next_seq, row, time.monotonic())
+            self.next_seq += 1
+            self.queue.put_nowait(event)
+            accepted.append(event)
+        if accepted:
+            self._append_spool(accepted)
+            self.metrics.accepted += len(accepted)
+        return len(accepted)
+
+    async def _room(self):
+        while self.queue.full():
+            self._space.clear()
+            await self._space.wait()
+
+    def _writer_stopped(self, task):
+        if task.cancelled() or task.exception() is None:
+            return
+        self.failure = task.exception()
+        print(f"❌ Gate writer stopped, queued events stay in the spool until restart: {self.failure!r}",
+              file=sys.stderr)
+        for server in self._servers:
+            server.close()
+
+    async def _route(self, method, path, body):
+        if self.failure is not None:
+            return 503, {"ok": False, "error": f"writer stopped: {self.failure}"}
+        if path == "/health":
+            return 200, {"ok": True}
+        if path == "/metrics":
+            return 200, self.metrics.snapshot(self.queue.qsize())
+        if path != "/events":
+            return 404, {"error": f"unknown path {path}"}
+        if method != "POST":
+            return 405, {"error": "use POST"}
+        try:
+            payload = json.loads(body or b"null")
+            events = payload if isinstance(payload, list) else [payload]
+            rows = [parse_event(e) for e in events]
+        except ValueError as e:
+            self.metrics.rejected += 1
+            return 400, {"error": str(e)}
+        accepted = await self.submit(rows)
+        if accepted < len(rows):
+            return 503, {"accepted": accepted, "error": "queue full, retry the rest"}
+        return 202, {"accepted": accepted}
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                method, path = line.decode("latin-1").split()[:2]
+                headers = {}
+                while True:
+                    header = await reader.readline()
+                    if header in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = header.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length") or 0))
+                status, payload = await self._route(method, path.split("?")[0], body)
+                data = json.dumps(payload).encode()
+                extra = "Retry-After: 1\r\n" if status == 503 else ""
+                writer.write(f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+                             f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                             f"{extra}\r\n".encode() + data)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host=HOST, port=PORT, unix_path=None):
+        """Replay the spool, then start the writer and listen. Returns the servers."""
+        await asyncio.to_thread(self.replay)
+        self.queue = asyncio.Queue(self.queue_size)
+        self._space = asyncio.Event()
+        self._spool = open(self.spool_path, "a+", encoding="utf-8")
+        self._truncate_spool()  # everything in it was committed by replay()
+        self._writer_task = asyncio.create_task(self._write_batches())
+        self._writer_task.add_done_callback(self._writer_stopped)
+        if port is not None:
+            self._servers.append(await asyncio.start_server(self._handle, host, port))
+        if unix_path:
+            self._servers.append(await asyncio.start_unix_server(self._handle, unix_path))
+        return self._servers
+
+    async def stop(self):
+        """Stop listening, commit what is queued, then stop the writer."""
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+        if self.failure is None:
+            await self.queue.join()
+            self._writer_task.cancel()
+            try:
+                await self._writer_task
+            except asyncio.CancelledError:
+                pass
+        self._spool.close()
+
+
+# -------------------------------
+# CLIENT
+# -------------------------------
+def submit(student_id, direction, at=None, url=INGEST_URL, timeout=2.0):
+    """Send one swipe to a running ingest service; returns the service's reply."""
+    event = {"student_id": student_id, "direction": direction}
+    if at:
+        event["time"] = at
+    url = url.replace("{hostel}", db.current_hostel() or "")
+    request = urllib.request.Request(url.rstrip("/") + "/events", data=json.dumps(event).encode(),
+                                     headers={"Content-Type": "application/json"}, method="POST")
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.load(response)
+    except urllib.error.HTTPError as e:
+        raise RuntimeError(json.load(e).get("error", str(e)))
+
+
+# -------------------------------
+# COMMAND LINE
+# -------------------------------
+async def _serve(args):
+    service = IngestService(args.spool, fsync=not args.no_fsync)
+    servers = await service.start(args.host, args.port, args.unix)
+    print(f"✅ Ingesting for {args.hostel or 'hostel.db'} on {args.host}:{args.port}"
+          + (f" and {args.unix}" if args.unix else "")
+          + f" (replayed {service.metrics.replayed} spooled events)")
+    try:
+        # A failed writer ends the run (and the process) with its exception.
+        await asyncio.gather(service._writer_task, *(s.serve_forever() for s in servers))
+    finally:
+        await service.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import shards
+
+    parser = argparse.ArgumentParser(description="Accept gate swipes and write them in batches.")
+    parser.add_argument("--hostel", help="hostel id from the hostel map (required when there is one)")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--unix", help="also listen on this Unix socket")
+    parser.add_argument("--spool", help=f"default {SPOOL_PATH}, or ingest.<hostel>.spool with --hostel")
+    parser.add_argument("--no-fsync", action="store_true", help="faster, survives crashes but not power loss")
+    args = parser.parse_args()
+
+    shards.load()
+    if args.hostel is None and shards.hostels() != [None]:
+        parser.error("with a hostel map, run one service per hostel: --hostel " + " | ".join(shards.hostels()))
+    args.spool = args.spool or (f"ingest.{args.hostel}.spool" if args.hostel else SPOOL_PATH)
+    db.select(args.hostel)  # asyncio.run() and to_thread() carry the selection into the writer
+    backend.init_db()
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,271 @@
+from datetime import date, datetime
+
+import backend
+import db
+
+# -------------------------------
+# LEAVE WORKFLOW
+# -------------------------------
+# leave_intervals is an R*Tree kept in step with leave_requests by triggers:
+# each Pending or Approved leave is a box (student, student) x (first day,
+# last day). Overlap checks probe one student's strip of that space and "who
+# is on leave on day X" probes one column of it, so neither reads requests
+# that cannot match.
+#
+# Every status change made here lands in leave_history in the same
+# transaction as the change itself.
+
+STATUSES = ("Pending", "Approved", "Rejected")
+LIVE = ("Pending", "Approved")
+_JULIAN_OFFSET = 1721424  # date.toordinal() -> CAST(julianday(date) AS INTEGER)
+
+
+def _now():
+    return datetime.now().strftime(backend.TIME_FORMAT)
+
+
+def _date(value):
+    try:
+        return date.fromisoformat(str(value))
+    except ValueError:
+        raise ValueError(f"Expected a YYYY-MM-DD date, got {value!r}") from None
+
+
+def _day(value):
+    return _date(value).toordinal() + _JULIAN_OFFSET
+
+
+def _check_status(status):
+    if status not in STATUSES:
+        raise ValueError(f"status must be one of {STATUSES}, got {status!r}")
+
+
+def _overlapping(conn, student_id, first, last, statuses=LIVE, exclude=None):
+    return [row for row in conn.execute("""
+        SELECT i.request_id, l.from_date, l.to_date, i.status
+        FROM leave_intervals i JOIN leave_requests l ON l.request_id = i.request_id
+        WHERE i.student_lo <= ? AND i.student_hi >= ? AND i.first_day <= ? AND i.last_day >= ?
+        ORDER BY l.from_date
+    """, (student_id, student_id, last, first)) if row[3] in statuses and row[0] != exclude]
+
+
+def _history(conn, rows, by, note):
+    """rows: (request_id, old_status, new_status)."""
+    now = _now()
+    conn.executemany("""
+        INSERT INTO leave_history (request_id, old_status, new_status, changed_by, note, changed_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, [(rid, old, new, by, note, now) for rid, old, new in rows])
+
+
+def conflicts(student_id, from_date, to_date, statuses=LIVE, exclude=None):
+    """(request_id, from_date, to_date, status) of the student's leaves overlapping the range."""
+    with db.connection() as conn:
+        return _overlapping(conn, student_id, _day(from_date), _day(to_date), statuses, exclude)
+
+
+def request_leave(student_id, from_date, to_date, reason, by=None):
+    """File a Pending request; refuses one that overlaps the student's pending or approved leave."""
+    if _date(from_date) > _date(to_date):
+        raise ValueError(f"Leave ends ({to_date}) before it starts ({from_date})")
+    with db.transaction() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        clash = _overlapping(conn, student_id, _day(from_date), _day(to_date))
+        if clash:
+            raise ValueError("Overlaps leave request " + ", ".join(
+                f"#{rid} ({start} to {end}, {status})" for rid, start, end, status in clash))
+        request_id = conn.execute("""
+            INSERT INTO leave_requests (student_id, from_date, to_date, reason, status)
+            VALUES (?, ?, ?, ?, 'Pending')
+        """, (student_id, str(from_date), str(to_date), reason)).lastrowid
+        _history(conn, [(request_id, None, "Pending")], by, None)
+    backend.bump_versions("leave_requests")
+    return request_id
+
+
+def set_status(request_id, status, by=None, note=None):
+    """Move one request to status. Approving must not overlap another approved leave."""
+    _check_status(status)
+    with db.transaction() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute("SELECT student_id, from_date, to_date, status FROM leave_requests WHERE request_id = ?",
+                           (request_id,)).fetchone()
+        if row is None:
+            raise ValueError(f"Unknown leave request {request_id}")
+        student_id, from_date, to_date, old = row
+        if old == status:
+            return old
+        if status in LIVE:
+            against = ("Approved",) if status == "Approved" else LIVE
+            clash = _overlapping(conn, student_id, _day(from_date), _day(to_date), against, exclude=request_id)
+            if clash:
+                raise ValueError(f"Request {request_id} overlaps {clash[0][3].lower()} request #{clash[0][0]}")
+        conn.execute("UPDATE leave_requests SET status = ? WHERE request_id = ?", (status, request_id))
+        _history(conn, [(request_id, old, status)], by, note)
+    backend.bump_versions("leave_requests")
+    return old
+
+
+def import_requests(rows, by="import"):
+    """File (student_id, from_date, to_date, reason, status) rows as they are, in one transaction.
+
+    Each row passes the checks request_leave() and set_status() make: known
+    student and status, usable dates, and no overlap with the student's
+    leaves (approved ones for an Approved row, pending or approved for a
+    Pending one), counting rows earlier in the batch. Returns (request ids,
+    errors [(position in rows, reason)]).
+    """
+    rows = list(rows)
+    ids, errors, history = [], [], []
+    with db.transaction() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        known = backend.existing_student_ids(conn, {row[0] for row in rows})
+        for position, (student_id, from_date, to_date, reason, status) in enumerate(rows):
+            try:
+                if student_id not in known:
+                    raise ValueError(f"unknown student_id {student_id}")
+                _check_status(status)
+                first, last = _day(from_date), _day(to_date)
+                if first > last:
+                    raise ValueError(f"Leave ends ({to_date}) before it starts ({from_date})")
+                if status in LIVE:
+                    against = ("Approved",) if status == "Approved" else LIVE
+                    clash = _overlapping(conn, student_id, first, last, against)
+                    if clash:
+                        raise ValueError(f"overlaps {clash[0][3].lower()} request #{clash[0][0]}")
+            except ValueError as e:
+                errors.append((position, str(e)))
+                continue
+            # The interval index picks the row up through its insert trigger, so
+            # later rows of the batch are checked against it too.
+            request_id = conn.execute("""
+                INSERT INTO leave_requests (student_id, from_date, to_date, reason, status)
+                VALUES (?, ?, ?, ?, ?)
+            """, (student_id, str(from_date), str(to_date), reason, status)).lastrowid
+            ids.append(request_id)
+            history.append((request_id, None, status))
+        _history(conn, history, by, None)
+    if ids:
+        backend.bump_versions("leave_requests")
+    return ids, errors
+
+
+def _select(conn, current="Pending", date_from=None, date_to=None, reason=None, dept=None, request_ids=None):
+    where, params = [], []
+    if current is not None:
+        where.append("l.status = ?")
+        params.append(current)
+    # Same overlap rule as backend.query_leave_requests().
+    if date_from is not None:
+        where.append("l.to_date >= ?")
+        params.append(str(date_from))
+    if date_to is not None:
+        where.append("l.from_date <= ?")
+        params.append(str(date_to))
+    if reason:
+        where.append("l.reason LIKE ? ESCAPE '\\'")
+        params.append("%" + reason.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+    if dept is not None:
+        where.append("s.dept = ?")
+        params.append(dept)
+    if request_ids is not None:
+        request_ids = list(request_ids)
+        where.append(f"l.request_id IN ({','.join('?' * len(request_ids))})")
+        params.extend(request_ids)
+    sql = """
+        SELECT l.request_id, l.student_id, l.from_date, l.to_date, l.status
+        FROM leave_requests l JOIN students s ON s.id = l.student_id
+    """
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    return conn.execute(sql + " ORDER BY l.from_date, l.request_id", params).fetchall()
+
+
+def find_requests(**filters):
+    """(request_id, student_id, from_date, to_date, status) matching a bulk filter, earliest first.
+
+    Filters: current status (default "Pending"; None for any), date_from /
+    date_to (overlapping the range), reason (substring, any case), dept,
+    request_ids.
+    """
+    with db.connection() as conn:
+        return _select(conn, **filters)
+
+
+def bulk_set_status(status, by=None, note=None, **filters):
+    """Move every request matching filters (see find_requests) to status in one transaction.
+
+    Requests that cannot move are skipped, not fatal: approving one that
+    overlaps an approved leave, or another request approved earlier in the
+    same batch, or one with unusable dates. Returns (changed request ids,
+    skipped [(request_id, reason)]).
+    """
+    _check_status(status)
+    changed, skipped = [], []
+    with db.transaction() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        history = []
+        taken = {}  # student_id -> [(first, last)] approved by this batch
+        for request_id, student_id, from_date, to_date, old in _select(conn, **filters):
+            if old == status:
+                continue
+            if status == "Approved":
+                try:
+                    first, last = _day(from_date), _day(to_date)
+                except ValueError as e:
+                    skipped.append((request_id, str(e)))
+                    continue
+                clash = _overlapping(conn, student_id, first, last, ("Approved",), exclude=request_id)
+                if clash:
+                    skipped.append((request_id, f"overlaps approved request #{clash[0][0]}"))
+                    continue
+                if any(f <= last and first <= l for f, l in taken.get(student_id, ())):
+                    skipped.append((request_id, "overlaps a request approved in this batch"))
+                    continue
+                taken.setdefault(student_id, []).append((first, last))
+            changed.append(request_id)
+            history.append((request_id, old, status))
+        conn.executemany("UPDATE leave_requests SET status = ? WHERE request_id = ?",
+                         [(status, rid) for rid in changed])
+        _history(conn, history, by, note)
+    if changed:
+        backend.bump_versions("leave_requests")
+    return changed, skipped
+
+
+def history(request_id):
+    with db.connection() as conn:
+        return conn.execute("""
+            SELECT old_status, new_status, changed_by, note, changed_at FROM leave_history
+            WHERE request_id = ? ORDER BY history_id
+        """, (request_id,)).fetchall()
+
+
+# -------------------------------
+# WHO IS ON LEAVE
+# -------------------------------
+def on_leave_ids(conn, day):
+    """Students with an approved leave covering day, via the interval index."""
+    d = _day(day)
+    return {sid for sid, status in conn.execute("""
+        SELECT student_lo, status FROM leave_intervals WHERE first_day <= ? AND last_day >= ?
+    """, (d, d)) if status == "Approved"}
+
+
+def on_leave(day=None):
+    """(student_id, name, room_no, request_id, from_date, to_date) for approved leaves covering day."""
+    d = _day(day or date.today())
+    with db.connection() as conn:
+        return conn.execute("""
+            SELECT s.id, s.name, s.room_no, l.request_id, l.from_date, l.to_date
+            FROM leave_intervals i
+            JOIN leave_requests l ON l.request_id = i.request_id
+            JOIN students s ON s.id = l.student_id
+            WHERE i.first_day <= ? AND i.last_day >= ? AND i.status = 'Approved'
+            ORDER BY s.id
+        """, (d, d)).fetchall()
+
+
+def on_leave_count(day=None):
+    with db.connection() as conn:
+        return len(on_leave_ids(conn, day or date.today()))
@@ -0,0 +1,310 @@
+import base64
+import hashlib
+import hmac
+import os
+import re
+from datetime import datetime
+
+import database
+import db
+
+# -------------------------------
+# MEDICAL RECORDS
+# -------------------------------
+# Every medical_info field is stored as an AES-256-GCM BLOB:
+#   version byte | 12-byte nonce | ciphertext + tag
+# with "<student_id>:<field>" as associated data, so a value copied onto
+# another student or field fails to decrypt instead of reading as theirs.
+# Plain TEXT values are rows from before encryption and are returned as-is
+# until encrypt_existing() rewrites them, which backend.init_db() does
+# whenever a key is available (and `python medical.py encrypt` does on demand).
+#
+# Emergency lookups ("every O- resident in block C", "everyone allergic to
+# peanuts") read medical_tags: HMACs of the normalised blood group and each
+# allergen. A lookup hashes the question, seeks the index and decrypts only
+# the rows it found.
+#
+# Every read, write, export and lookup appends to medical_access_log.
+#
+# The key is 32 random bytes, urlsafe-base64 encoded, taken from configure(),
+# else $HOSTEL_MEDICAL_KEY, else the file at $HOSTEL_MEDICAL_KEY_FILE
+# (medical.key by default; create one with `python medical.py init-key`).
+# Encryption needs the `cryptography` package.
+
+KEY_ENV = "HOSTEL_MEDICAL_KEY"
+KEY_FILE = os.environ.get("HOSTEL_MEDICAL_KEY_FILE", "medical.key")
+FIELDS = ("blood_group", "allergies", "conditions", "emergency_contact")
+BLOOD_GROUPS = ("A+", "A-", "B+", "B-", "AB+", "AB-", "O+", "O-")
+_VERSION = b"\x01"
+_NONCE_BYTES = 12
+
+_configured_key = None
+_ciphers = {}  # raw key -> (AESGCM, tag key)
+
+
+def _aesgcm():
+    try:
+        from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    except ImportError:
+        raise RuntimeError("Medical records need cryptography: pip install cryptography")
+    return AESGCM
+
+
+def _now():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+# -------------------------------
+# KEYS
+# -------------------------------
+def new_key():
+    return base64.urlsafe_b64encode(os.urandom(32)).decode()
+
+
+def create_key_file(path=None):
+    """Write a fresh key readable only by its owner; refuses to replace an existing one."""
+    path = path or KEY_FILE
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w") as f:
+        f.write(new_key() + "\n")
+    return os.path.abspath(path)
+
+
+def configure(key=None):
+    """Use key (urlsafe-base64 text) for this process instead of the env var / key file."""
+    global _configured_key
+    _configured_key = key
+
+
+def _raw_key():
+    text = _configured_key or os.environ.get(KEY_ENV)
+    if not text:
+        try:
+            with open(KEY_FILE) as f:
+                text = f.read()
+        except FileNotFoundError:
+            raise RuntimeError(f"No medical records key: set ${KEY_ENV} or run "
+                               f"`python medical.py init-key` to create {KEY_FILE}") from None
+    raw = base64.urlsafe_b64decode(text.strip())
+    if len(raw) != 32:
+        raise RuntimeError("The medical records key must be 32 bytes (urlsafe base64)")
+    return raw
+
+
+def _keys():
+    raw = _raw_key()
+    if raw not in _ciphers:
+        # Separate subkeys so the tag index never reuses the encryption key.
+        enc = hmac.new(raw, b"hostel medical encryption", hashlib.sha256).digest()
+        tags = hmac.new(raw, b"hostel medical tags", hashlib.sha256).digest()
+        _ciphers[raw] = (_aesgcm()(enc), tags)
+    return _ciphers[raw]
+
+
+def check_key():
+    """Raise RuntimeError unless a usable key and the cryptography package are available."""
+    _keys()
+
+
+def _encrypt(cipher, student_id, field, value):
+    if value is None:
+        return None
+    nonce = os.urandom(_NONCE_BYTES)
+    return _VERSION + nonce + cipher.encrypt(nonce, str(value).encode(), f"{student_id}:{field}".encode())
+
+
+def _decrypt(cipher, student_id, field, value):
+    if not isinstance(value, bytes):
+        return value  # plaintext from before encryption, or NULL
+    if value[:1] != _VERSION:
+        raise ValueError(f"Unknown medical record format for student {student_id}")
+    nonce, body = value[1:1 + _NONCE_BYTES], value[1 + _NONCE_BYTES:]
+    return cipher.decrypt(nonce, body, f"{student_id}:{field}".encode()).decode()
+
+
+# -------------------------------
+# EMERGENCY TAGS
+# -------------------------------
+def normalise_blood_group(value):
+    """'o -ve', 'O NEG', 'o-' -> 'O-'; None if it is not a blood group."""
+    text = re.sub(r"\s+", "", str(value or "")).upper()
+    text = re.sub(r"(\+VE|POS(ITIVE)?)$", "+", text)
+    text = re.sub(r"(-VE|NEG(ATIVE)?)$", "-", text)
+    return text if text in BLOOD_GROUPS else None
+
+
+def allergens(value):
+    """Split free-text allergies into normalised allergens: 'Peanuts, dust & Penicillin' -> 3."""
+    parts = re.split(r"[,;/&\n]|\band\b", str(value or "").lower())
+    return sorted({" ".join(p.split()) for p in parts if p.strip() and p.strip() not in ("none", "nil", "-")})
+
+
+def _tag(tag_key, kind, value):
+    return hmac.new(tag_key, f"{kind}:{value}".encode(), hashlib.sha256).digest()[:16]
+
+
+def _tags_for(tag_key, blood_group, allergies):
+    tags = [_tag(tag_key, "allergy", a) for a in allergens(allergies)]
+    blood = normalise_blood_group(blood_group)
+    if blood:
+        tags.append(_tag(tag_key, "blood", blood))
+    return tags
+
+
+# -------------------------------
+# READ / WRITE
+# -------------------------------
+def log_access(conn, action, student_ids=(None,), actor=None, detail=None):
+    now = _now()
+    conn.executemany("""
+        INSERT INTO medical_access_log (at, actor, action, student_id, detail) VALUES (?, ?, ?, ?, ?)
+    """, [(now, actor, action, sid, detail) for sid in student_ids])
+
+
+def store_many(conn, rows, actor=None, action="write"):
+    """Encrypt and upsert (student_id, blood_group, allergies, conditions, emergency_contact) rows."""
+    cipher, tag_key = _keys()
+    rows = list(rows)
+    ids = [(r[0],) for r in rows]
+    conn.executemany(f"""
+        INSERT OR REPLACE INTO medical_info (student_id, {', '.join(FIELDS)}) VALUES (?, ?, ?, ?, ?)
+    """, [(r[0],) + tuple(_encrypt(cipher, r[0], f, v) for f, v in zip(FIELDS, r[1:])) for r in rows])
+    conn.executemany("DELETE FROM medical_tags WHERE student_id = ?", ids)
+    conn.executemany("INSERT OR IGNORE INTO medical_tags (tag, student_id) VALUES (?, ?)",
+                     [(tag, r[0]) for r in rows for tag in _tags_for(tag_key, r[1], r[2])])
+    log_access(conn, action, [r[0] for r in rows], actor)
+    return len(rows)
+
+
+def read(conn, student_id, actor=None):
+    """The decrypted (student_id, *FIELDS) row, or None; the read is logged either way."""
+    row = conn.execute("SELECT * FROM medical_info WHERE student_id=?", (student_id,)).fetchone()
+    log_access(conn, "read", [student_id], actor, None if row else "no record")
+    if row is None:
+        return None
+    cipher, _ = _keys() if any(isinstance(v, bytes) for v in row[1:]) else (None, None)
+    return (row[0],) + tuple(_decrypt(cipher, row[0], f, v) for f, v in zip(FIELDS, row[1:]))
+
+
+def decrypt_rows(rows):
+    """Decrypt raw (student_id, *FIELDS) rows, e.g. a chunk of an export; the caller logs the access."""
+    cipher, _ = _keys()
+    return [(r[0],) + tuple(_decrypt(cipher, r[0], f, v) for f, v in zip(FIELDS, r[1:])) for r in rows]
+
+
+def emergency(blood_group=None, allergy=None, block=None, actor=None):
+    """Residents matching a blood group and/or allergen, optionally in one block.
+
+    Returns (student_id, name, room_no, contact, blood_group,
+    emergency_contact), decrypting only the matched rows.
+    """
+    if blood_group is None and not allergy:
+        raise ValueError("Give a blood group, an allergy or both")
+    cipher, tag_key = _keys()
+    tags = []
+    if blood_group is not None:
+        blood = normalise_blood_group(blood_group)
+        if blood is None:
+            raise ValueError(f"Unknown blood group {blood_group!r}; use one of {BLOOD_GROUPS}")
+        tags.append(_tag(tag_key, "blood", blood))
+    if allergy:
+        tags.extend(_tag(tag_key, "allergy", a) for a in allergens(allergy))
+    if not tags:  # e.g. allergy="none"
+        raise ValueError("Give a blood group, an allergy or both")
+    encrypt_leftovers()  # plaintext rows have no tags yet and would be missed
+    where = " AND ".join(["t0.tag = ?"] + [f"EXISTS (SELECT 1 FROM medical_tags t{i} WHERE t{i}.tag = ? "
+                                           f"AND t{i}.student_id = t0.student_id)" for i in range(1, len(tags))])
+    params = list(tags)
+    if block is not None:
+        # From students.room_no itself, so residents of rooms missing from
+        # the rooms table still turn up.
+        where += f" AND {database.block_sql('s.room_no')} = ?"
+        params.append(block.strip().upper())
+    with db.transaction() as conn:
+        rows = conn.execute(f"""
+            SELECT s.id, s.name, s.room_no, s.contact, m.blood_group, m.emergency_contact
+            FROM medical_tags t0
+            JOIN students s ON s.id = t0.student_id
+            JOIN medical_info m ON m.student_id = s.id
+            WHERE {where}
+            ORDER BY s.room_no, s.id
+        """, params).fetchall()
+        detail = f"blood={blood_group or '-'} allergy={allergy or '-'} block={block or '*'}"
+        log_access(conn, "emergency", [r[0] for r in rows] or [None], actor, detail)
+    return [r[:4] + (_decrypt(cipher, r[0], "blood_group", r[4]), _decrypt(cipher, r[0], "emergency_contact", r[5]))
+            for r in rows]
+
+
+def access_log(student_id=None, limit=100):
+    sql = "SELECT access_id, at, actor, action, student_id, detail FROM medical_access_log"
+    params = ()
+    if student_id is not None:
+        sql += " WHERE student_id = ?"
+        params = (student_id,)
+    with db.connection() as conn:
+        return conn.execute(sql + " ORDER BY access_id DESC LIMIT ?", params + (limit,)).fetchall()
+
+
+_PLAINTEXT = " OR ".join(f"typeof({f}) = 'text'" for f in FIELDS)
+
+
+def encrypt_leftovers():
+    """encrypt_existing() if any plaintext rows are left and a key is available; returns how many."""
+    with db.connection() as conn:
+        if not conn.execute(f"SELECT EXISTS (SELECT 1 FROM medical_info WHERE {_PLAINTEXT})").fetchone()[0]:
+            return 0
+    try:
+        check_key()
+    except RuntimeError:
+        return 0
+    return encrypt_existing()
+
+
+def encrypt_existing(actor="migration"):
+    """Encrypt plaintext rows left from before encryption and index their tags."""
+    with db.transaction() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        rows = conn.execute(f"""
+            SELECT student_id, {', '.join(FIELDS)} FROM medical_info WHERE {_PLAINTEXT}
+        """).fetchall()
+        store_many(conn, rows, actor, action="encrypt")
+    return len(rows)
+
+
+# -------------------------------
+# COMMAND LINE
+# -------------------------------
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Encrypted medical records.")
+    parser.add_argument("--hostel", help="hostel id from the hostel map (default: every hostel / hostel.db)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_key = sub.add_parser("init-key", help="create a new key file")
+    p_key.add_argument("path", nargs="?", default=KEY_FILE)
+    sub.add_parser("encrypt", help="encrypt plaintext records and build the emergency index")
+    p_find = sub.add_parser("emergency", help="look up residents by blood group / allergy")
+    p_find.add_argument("--blood")
+    p_find.add_argument("--allergy")
+    p_find.add_argument("--block")
+    p_log = sub.add_parser("log", help="show the access log")
+    p_log.add_argument("--student", type=int)
+    args = parser.parse_args()
+
+    if args.command == "init-key":
+        print(f"✅ New key written to {create_key_file(args.path)} - back it up, lost keys mean lost records")
+    else:
+        import shards
+        shards.load()
+        shards.init_all()
+        for hostel_id in [args.hostel] if args.hostel else shards.hostels():
+            label = hostel_id or "hostel.db"
+            with db.use(hostel_id):
+                if args.command == "encrypt":
+                    print(f"✅ {label}: encrypted {encrypt_existing()} medical records")
+                elif args.command == "emergency":
+                    for row in emergency(args.blood, args.allergy, args.block, actor="cli"):
+                        print(" | ".join([label] + ["" if v is None else str(v) for v in row]))
+                else:
+                    for row in access_log(args.student):
+                        print(" | ".join([label] + ["" if v is None else str(v) for v in row]))
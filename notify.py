@@ -0,0 +1,316 @@
+import json
+import logging
+import os
+import re
+import smtplib
+import threading
+import time
+from email.message import EmailMessage
+
+import changefeed
+import db
+
+# -------------------------------
+# NOTIFICATION DISPATCHER
+# -------------------------------
+# Tails the change feed and turns interesting changes into notifications:
+#   late_return    - a curfew alert (Late / Overnight / Missed Curfew) was raised
+#   leave_approved - a leave request moved to Approved
+# Rules are plain functions (conn, changes) -> [notification dict], so more
+# can be added to RULES. Notifications are taken in batches, at most
+# RATE_PER_MINUTE of them, and sent one at a time; a send that fails for a
+# passing reason (connection refused, 4xx) is retried with exponential
+# backoff. The dispatcher's feed cursor only moves past a change once
+# everything it produced has been handled, so a crash means a notification
+# may be sent twice, never lost. A notification that is refused outright
+# (5xx, bad recipient) or still fails after RETRIES attempts is logged and
+# written to the dead-letter transport (if any), on its own, so one bad
+# address cannot hold up or take down the rest of its batch.
+# The dispatcher also prunes the change feed every PRUNE_EVERY seconds.
+#
+# guardian_contact is usually a phone number; guardians are only written to
+# when it holds an email address.
+#
+# Each hostel shard has its own feed, so a Dispatcher serves one hostel
+# (hostel=...) and stamps its id on what it sends; the command line runs one
+# per hostel.
+#
+# Transports: FileTransport (JSON lines, for testing and audit) and
+# SMTPTransport (point it at `python -m aiosmtpd -n -l localhost:1025` or
+# any debugging SMTP server while testing).
+
+SECURITY_CONTACT = os.environ.get("HOSTEL_SECURITY_CONTACT", "security@hostel.local")
+BATCH_SIZE = 50
+RATE_PER_MINUTE = 120
+RETRIES = 5
+BACKOFF = 1.0
+PRUNE_EVERY = 3600.0
+DEAD_LETTER_PATH = "notifications.failed.jsonl"
+
+log = logging.getLogger("hostel.notify")
+_ADDRESS = re.compile(r"[^@\s]+@[^@\s]+\.[^@\s]+")
+
+
+def _address(contact):
+    """contact if it is an email address, else None (e.g. a phone number)."""
+    contact = (contact or "").strip()
+    return contact if _ADDRESS.fullmatch(contact) else None
+
+
+def _notification(seq, kind, to, subject, body, student_id):
+    return {"seq": seq, "kind": kind, "to": to, "subject": subject, "body": body, "student_id": student_id}
+
+
+def _ids(changes, table, op="insert"):
+    return {row_id: seq for seq, t, o, row_id, _ in changes if t == table and o == op}
+
+
+def _rows(conn, sql, ids):
+    ids = list(ids)
+    if not ids:
+        return []
+    return conn.execute(sql.format(marks=",".join("?" * len(ids))), ids).fetchall()
+
+
+# -------------------------------
+# RULES
+# -------------------------------
+def late_return(conn, changes):
+    alerts = _ids(changes, "curfew_alerts")
+    out = []
+    for alert_id, kind, night, sid, name, room, guardian_contact in _rows(conn, """
+        SELECT a.alert_id, a.kind, a.night, s.id, s.name, s.room_no, s.guardian_contact
+        FROM curfew_alerts a JOIN students s ON s.id = a.student_id
+        WHERE a.alert_id IN ({marks})
+    """, alerts):
+        subject = f"{kind}: {name} ({room or 'no room'})"
+        body = f"{name} (ID {sid}, room {room or '-'}) was marked {kind} for the night of {night}."
+        for to in filter(None, (_address(guardian_contact), SECURITY_CONTACT)):
+            out.append(_notification(alerts[alert_id], "late_return", to, subject, body, sid))
+    return out
+
+
+def leave_approved(conn, changes):
+    changed = _ids(changes, "leave_history")
+    out = []
+    for history_id, request_id, from_date, to_date, sid, name, guardian_contact in _rows(conn, """
+        SELECT h.history_id, l.request_id, l.from_date, l.to_date, s.id, s.name, s.guardian_contact
+        FROM leave_history h
+        JOIN leave_requests l ON l.request_id = h.request_id
+        JOIN students s ON s.id = l.student_id
+        WHERE h.history_id IN ({marks}) AND h.new_status = 'Approved'
+    """, changed):
+        to = _address(guardian_contact)
+        if to:
+            out.append(_notification(changed[history_id], "leave_approved", to,
+                                     f"Leave approved: {name}",
+                                     f"{name}'s leave from {from_date} to {to_date} (request #{request_id}) "
+                                     f"was approved.", sid))
+    return out
+
+
+RULES = {"late_return": late_return, "leave_approved": leave_approved}
+
+
+# -------------------------------
+# TRANSPORTS
+# -------------------------------
+class FileTransport:
+    """Appends each notification as a JSON line."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()  # one per hostel dispatcher may share it
+
+    def send(self, batch):
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(n) + "\n" for n in batch))
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class SMTPTransport:
+    """One SMTP session per batch (the dispatcher calls close() after each)."""
+
+    def __init__(self, host="localhost", port=1025, sender="hostel@localhost", timeout=10):
+        self.host, self.port, self.sender, self.timeout = host, port, sender, timeout
+        self._smtp = None
+
+    def send(self, batch):
+        try:
+            if self._smtp is None:
+                self._smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            for n in batch:
+                msg = EmailMessage()
+                msg["From"], msg["To"], msg["Subject"] = self.sender, n["to"], n["subject"]
+                msg["X-Hostel-Seq"] = str(n["seq"])
+                if n.get("hostel"):
+                    msg["X-Hostel-Id"] = n["hostel"]
+                msg.set_content(n["body"])
+                self._smtp.send_message(msg)
+        except (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError):
+            self.close()  # the next send reconnects
+            raise
+
+    def close(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (OSError, smtplib.SMTPException):
+                pass
+            self._smtp = None
+
+
+# -------------------------------
+# DISPATCHER
+# -------------------------------
+def _permanent(error):
+    """Whether retrying cannot help: the server refused for good, or the notification is malformed."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return True
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code >= 500
+    return not isinstance(error, OSError)
+
+
+class Dispatcher:
+    def __init__(self, transport, name="notify", rules=None, batch_size=BATCH_SIZE,
+                 rate_per_minute=RATE_PER_MINUTE, retries=RETRIES, backoff=BACKOFF,
+                 sleep=time.sleep, clock=time.monotonic, dead_letter=None, hostel=None):
+        self.transport = transport
+        self.hostel = hostel
+        self.dead_letter = dead_letter
+        self.name = name
+        self.rules = RULES if rules is None else rules
+        self.batch_size = max(1, min(batch_size, rate_per_minute))
+        self.rate = rate_per_minute / 60.0
+        self.burst = rate_per_minute
+        self.retries = retries
+        self.backoff = backoff
+        self.sleep = sleep
+        self.clock = clock
+        self._tokens = float(self.burst)
+        self._refilled = clock()
+        self.sent = 0
+        self.failed = 0
+
+    def _take(self, n):
+        """Token bucket: wait until n notifications may go out."""
+        while True:
+            now = self.clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.rate)
+            self._refilled = now
+            if self._tokens >= n:
+                self._tokens -= n
+                return
+            self.sleep((n - self._tokens) / self.rate)
+
+    def _send(self, n):
+        """Send one notification, retrying passing failures. Returns None, or the error it was given up on."""
+        for attempt in range(1, self.retries + 1):
+            try:
+                self.transport.send([n])
+                return None
+            except Exception as e:
+                if _permanent(e) or attempt == self.retries:
+                    return e
+                delay = self.backoff * 2 ** (attempt - 1)
+                log.warning("delivery of seq %d failed (%s), attempt %d/%d, retrying in %.1fs",
+                            n["seq"], e, attempt, self.retries, delay)
+                self.sleep(delay)
+
+    def _deliver(self, batch):
+        """Send a batch message by message. Returns how many went out; the rest are dead-lettered."""
+        failed = []
+        try:
+            for n in batch:
+                error = self._send(n)
+                if error is not None:
+                    log.error("giving up on notification seq %d to %s: %s", n["seq"], n["to"], error)
+                    failed.append(dict(n, error=str(error)))
+        finally:
+            if hasattr(self.transport, "close"):
+                self.transport.close()
+        self.failed += len(failed)
+        if failed and self.dead_letter is not None:
+            self.dead_letter.send(failed)
+        return len(batch) - len(failed)
+
+    def run_once(self, limit=changefeed.POLL_LIMIT):
+        """Handle one page of the feed. Returns the number of notifications sent."""
+        with db.use(self.hostel):
+            return self._run_once(limit)
+
+    def _run_once(self, limit):
+        changes = changefeed.poll(changefeed.cursor(self.name), limit)
+        if not changes:
+            return 0
+        with db.connection() as conn:
+            pending = sorted((n for rule in self.rules.values() for n in rule(conn, changes)),
+                             key=lambda n: n["seq"])
+        if self.hostel is not None:
+            for n in pending:
+                n["hostel"] = self.hostel
+        sent = 0
+        for i in range(0, len(pending), self.batch_size):
+            batch = pending[i:i + self.batch_size]
+            self._take(len(batch))
+            delivered = self._deliver(batch)
+            sent += delivered
+            self.sent += delivered
+            # Everything before the next undelivered notification is done.
+            if i + self.batch_size < len(pending):
+                changefeed.advance(self.name, pending[i + self.batch_size]["seq"] - 1)
+        changefeed.advance(self.name, changes[-1][0])
+        return sent
+
+    def run(self, interval=5.0, prune_every=PRUNE_EVERY):
+        pruned_at = None
+        while True:
+            while self.run_once():
+                pass
+            if pruned_at is None or self.clock() - pruned_at >= prune_every:
+                with db.use(self.hostel):
+                    changefeed.prune()
+                pruned_at = self.clock()
+            self.sleep(interval)
+
+
+# -------------------------------
+# COMMAND LINE
+# -------------------------------
+if __name__ == "__main__":
+    import argparse
+
+    import shards
+
+    parser = argparse.ArgumentParser(description="Send notifications from the change feed.")
+    parser.add_argument("--hostel", help="hostel id from the hostel map (default: every hostel / hostel.db)")
+    parser.add_argument("--file", help="append notifications to this JSON-lines file")
+    parser.add_argument("--smtp", metavar="HOST:PORT", help="send through this SMTP server")
+    parser.add_argument("--interval", type=float, default=5.0)
+    parser.add_argument("--dead-letter", default=DEAD_LETTER_PATH,
+                        help="JSON-lines file for notifications that could not be delivered")
+    parser.add_argument("--from-now", action="store_true", help="skip changes made before this run")
+    args = parser.parse_args()
+
+    shards.load()
+    shards.init_all()
+    hostels = [args.hostel] if args.hostel else shards.hostels()
+    if args.smtp:
+        host, _, port = args.smtp.partition(":")
+        transport = SMTPTransport(host, int(port or 25))
+    else:
+        transport = FileTransport(args.file or "notifications.jsonl")
+    dispatchers = [Dispatcher(transport, dead_letter=FileTransport(args.dead_letter), hostel=hostel_id)
+                   for hostel_id in hostels]
+    for dispatcher in dispatchers:
+        if args.from_now:
+            with db.use(dispatcher.hostel):
+                changefeed.advance(dispatcher.name, changefeed.latest_seq())
+    print(f"📨 Dispatching notifications for {', '.join(h or 'hostel.db' for h in hostels)} "
+          f"every {args.interval:g}s (Ctrl+C to stop)")
+    threads = [threading.Thread(target=d.run, args=(args.interval,), daemon=True) for d in dispatchers[1:]]
+    for thread in threads:
+        thread.start()
+    dispatchers[0].run(args.interval)
@@ -0,0 +1,120 @@
+import os
+
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+import backend
+import backup
+import cache
+import columnar
+import db
+import perf
+from ui import cached_stat, chart
+
+# Trend charts read only the daily_stats rollup; new rows are rolled in
+# before the cached answer is rebuilt.
+def cached_trend(metrics, bucket, by=None):
+    def load():
+        if db.current_replica() is None:  # snapshots are read-only and rolled up when taken
+            backend.stats.refresh_daily_stats()
+        return backend.stats.trend(metrics, bucket, by=by)
+    with perf.timer("app.stat.trend"):
+        return cache.get(("trend", metrics, bucket, by), ("entry_logs", "leave_requests"), load)
+
+# ------------------------------
+# ANALYTICS
+# ------------------------------
+# With HOSTEL_ANALYTICS_REPLICA=1 the page reads the newest backup snapshot
+# by default, keeping its queries off the live database.
+def render():
+    st.title("📊 Hostel Analytics Dashboard")
+    latest = backup.use_latest()
+    from_snapshot = latest is not None and st.toggle(
+        "Read from latest snapshot", value=os.environ.get("HOSTEL_ANALYTICS_REPLICA") == "1")
+    if from_snapshot:
+        st.caption(f"💾 Figures as of {latest[1]:%Y-%m-%d %H:%M} (python backup.py snapshot to refresh)")
+        with db.from_replica():
+            charts()
+    else:
+        charts()
+    history()
+
+def charts():
+    totals = cached_stat("totals", ("students", "entry_logs", "leave_requests"))
+    if totals["students"] == 0:
+        st.warning("No data available for analytics.")
+    else:
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Students", totals["students"])
+        col2.metric("Logs", totals["logs"])
+        col3.metric("Leaves", totals["leaves"])
+        col4.metric("Departments", totals["departments"])
+        st.markdown("---")
+        dept_data = pd.DataFrame(cached_stat("students_by_dept", ("students",)), columns=["Department", "Count"])
+        chart("department_strength", lambda: px.bar(dept_data, x="Department", y="Count",
+                                                    title="Department Strength"))
+
+        st.markdown("---")
+        col1, col2 = st.columns(2)
+        bucket = col1.radio("Group trends by", list(backend.stats.TREND_BUCKETS), horizontal=True)
+        split = col2.radio("Split by", ["Hostel", "Department", "Block"], horizontal=True)
+        by = {"Hostel": None, "Department": "dept", "Block": "block"}[split]
+        group = ["Period"] + ([split] if by else [])
+        col1, col2 = st.columns(2)
+        with col1:
+            moves = pd.DataFrame(cached_trend(("check_ins", "check_outs"), bucket, by),
+                                 columns=group + ["Check-ins", "Check-outs"])
+            if by:
+                moves = moves.melt(id_vars=group, var_name="Direction", value_name="Count")
+                chart("movements", lambda: px.bar(moves, x="Period", y="Count", color=split,
+                                                  pattern_shape="Direction",
+                                                  title=f"Gate Movements per {bucket.title()}"))
+            else:
+                chart("movements", lambda: px.bar(moves, x="Period", y=["Check-ins", "Check-outs"],
+                                                  barmode="group", title=f"Gate Movements per {bucket.title()}"))
+        with col2:
+            late = pd.DataFrame(cached_trend(("late", "overnight"), bucket, by),
+                                columns=group + ["Late", "Overnight"])
+            chart("late_returns", lambda: px.line(late, x="Period", y="Late", color=split if by else None,
+                                                  markers=True, hover_data=["Overnight"],
+                                                  title=f"Late Returns per {bucket.title()}"))
+
+        leave = pd.DataFrame(cached_trend(("leave_requests", "leave_days", "on_leave"), "month", by),
+                             columns=group + ["Requests", "Days Requested", "On-Leave Logs"])
+        chart("leave_volume", lambda: px.bar(leave, x="Period", y="Requests", color=split if by else None,
+                                             hover_data=["Days Requested", "On-Leave Logs"],
+                                             title="Leave Requests per Month"))
+
+        approval = pd.DataFrame(cached_stat("leave_approval_by_dept", ("students", "leave_requests")),
+                                columns=["Department", "Requests", "Approved", "Rejected", "Pending", "Approval Rate"])
+        chart("leave_approval", lambda: px.bar(approval, x="Department", y="Approval Rate",
+                                               hover_data=["Requests", "Pending"],
+                                               title="Leave Approval Rate by Department", range_y=[0, 1]))
+
+# Full-history views run on the columnar copy of entry_logs (columnar.py),
+# which sync() keeps up to date from the live database.
+def history():
+    st.markdown("---")
+    st.subheader("🗓️ Gate Activity by Weekday and Hour")
+    direction = st.radio("Movements", ["Check-outs", "Check-ins"], horizontal=True)
+    kind = "out" if direction == "Check-outs" else "in"
+    with perf.timer("app.stat.heatmap"):
+        grid = cache.get(("heatmap", kind), ("entry_logs",), lambda: columnar.heatmap(columnar.current(), kind))
+    if not grid.any():
+        st.info("No classified gate movements yet.")
+        return
+    chart("heatmap", lambda: px.imshow(grid, x=[f"{h:02d}" for h in range(24)],
+                                       y=["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"],
+                                       labels={"x": "Hour", "y": "", "color": direction},
+                                       aspect="auto", color_continuous_scale="Blues"))
+
+    st.subheader("🧳 Longest Absences")
+    with perf.timer("app.stat.absence_streaks"):
+        streaks = cache.get("absence_streaks", ("entry_logs",),
+                            lambda: columnar.absence_streaks(columnar.current(), limit=20))
+    names = cache.get("student_names", ("students",), lambda: {s[0]: s[1] for s in backend.view_students()})
+    st.dataframe(pd.DataFrame([(sid, names.get(sid, "-"), longest, count, total)
+                               for sid, longest, count, total in streaks],
+                              columns=["Student ID", "Name", "Longest (days)", "Absences", "Days Away"]),
+                 use_container_width=True, hide_index=True)
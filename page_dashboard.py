@@ -0,0 +1,78 @@
+from datetime import date
+
+import plotly.express as px
+import plotly.graph_objects as go
+import streamlit as st
+
+import backend
+import cache
+import leaves
+import shards
+from ui import cached_stat, chart, frame, table
+
+# ------------------------------
+# DASHBOARD
+# ------------------------------
+def render():
+    st.title("🏨 Hostel Management Dashboard")
+    st.markdown("### Welcome to Chandigarh University Hostel Management System")
+
+    totals = cached_stat("totals", ("students", "entry_logs", "leave_requests"))
+    if totals["students"] == 0:
+        st.warning("⚠️ No data available. Please add students.")
+        st.stop()
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("👨‍🎓 Total Students", totals["students"])
+    col2.metric("🚪 Total Logs", totals["logs"])
+    col3.metric("⏳ Pending Leaves", totals["pending_leaves"])
+    col4.metric("✅ Approved Leaves", totals["approved_leaves"])
+
+    heads = cache.get("headcount", ("students", "entry_logs", "presence"), backend.headcount)
+    away = cache.get(("on_leave", str(date.today())), ("leave_requests",), leaves.on_leave_count)
+    col1, col2, col3, _ = st.columns(4)
+    col1.metric("🏠 In Hostel Now", heads["in"])
+    col2.metric("🚶 Outside Now", heads["out"])
+    col3.metric("✈️ On Leave Today", away)
+
+    hostels = shards.hostels()
+    if hostels != [None]:
+        st.markdown("---")
+        st.subheader("🏫 Campus")
+        campus = cache.get("campus_totals", ("students", "entry_logs", "leave_requests"), shards.campus_totals)
+        per_hostel = cache.get("campus_by_hostel", ("students", "entry_logs", "presence"), shards.by_hostel)
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("🏢 Hostels", len(hostels))
+        col2.metric("👨‍🎓 Students", campus["students"])
+        col3.metric("🏠 In Hostel Now", sum(row[2] for row in per_hostel))
+        col4.metric("⏳ Pending Leaves", campus["pending_leaves"])
+        table(per_hostel, ["Hostel", "Students", "In", "Out"], hide_index=True)
+        late = frame(cache.get(("campus_late_returns", "day"), ("entry_logs",),
+                               lambda: shards.campus_late_returns("day")), ["Day", "Late Returns"])
+        if not late.empty:
+            chart("campus_late_returns", lambda: px.line(late, x="Day", y="Late Returns",
+                                                         title="Late Returns Across Hostels"))
+
+    st.markdown("---")
+
+    st.subheader("📊 Visual Insights")
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        dept_count = frame(cached_stat("students_by_dept", ("students",)), ["Department", "Count"])
+        chart("students_by_dept", lambda: px.pie(dept_count, names="Department", values="Count",
+                                                 title="Students by Department", hole=0.4))
+
+    with col2:
+        year_count = frame(cached_stat("students_by_year", ("students",)), ["Year", "Count"])
+        chart("students_by_year", lambda: px.bar(year_count, x="Year", y="Count", color="Count",
+                                                 title="Students by Year"))
+
+    with col3:
+        status_count = cached_stat("leaves_by_status", ("leave_requests",))
+        if status_count:
+            chart("leaves_by_status", lambda: go.Figure(data=[go.Bar(
+                x=[s for s, _ in status_count],
+                y=[n for _, n in status_count],
+                marker_color=['#10B981', '#F59E0B', '#EF4444']
+            )], layout={"title": "Leave Request Status"}))
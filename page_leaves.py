@@ -0,0 +1,82 @@
+from datetime import date
+
+import streamlit as st
+
+import backend
+import leaves
+from ui import cached_stat, download_button, paged_table, reset_paged_table, student_picker, table
+
+LEAVE_COLUMNS = ["Req ID", "Student ID", "From", "To", "Reason", "Status"]
+
+# ------------------------------
+# LEAVE REQUESTS
+# ------------------------------
+def render():
+    st.title("✈️ Leave Management")
+    sid = student_picker("leaves")
+    if sid is not None:
+        with st.form("leave_form", clear_on_submit=True):
+            col1, col2 = st.columns(2)
+            from_date = col1.date_input("From Date", date.today())
+            to_date = col2.date_input("To Date", date.today())
+            reason = st.text_area("Reason for Leave")
+            if st.form_submit_button("Submit Request"):
+                try:
+                    leaves.request_leave(sid, str(from_date), str(to_date), reason)
+                except ValueError as e:
+                    st.error(f"❌ {e}")
+                else:
+                    reset_paged_table("leaves_table")
+                    st.success("Leave request submitted!")
+
+    with st.expander("✅ Review requests"):
+        tab_one, tab_bulk = st.tabs(["One Request", "Bulk"])
+        with tab_one:
+            col1, col2, col3 = st.columns(3)
+            request_id = col1.number_input("Request ID", min_value=1, step=1)
+            decision = col2.selectbox("Decision", ["Approved", "Rejected", "Pending"], key="leave_decision")
+            note = col3.text_input("Note", key="leave_note")
+            if st.button("Update Status"):
+                try:
+                    old = leaves.set_status(int(request_id), decision, by="warden", note=note or None)
+                except ValueError as e:
+                    st.error(f"❌ {e}")
+                else:
+                    reset_paged_table("leaves_table")
+                    st.success(f"Request {int(request_id)}: {old} → {decision}")
+            trail = leaves.history(int(request_id))
+            if trail:
+                table(trail, ["From", "To", "By", "Note", "At"])
+        with tab_bulk:
+            col1, col2, col3 = st.columns(3)
+            reason = col1.text_input("Reason contains", placeholder="e.g. Diwali")
+            depts = [d for d, _ in cached_stat("students_by_dept", ("students",)) if d]
+            dept = col2.selectbox("Department", ["All"] + depts, key="leave_bulk_dept")
+            bulk_days = col3.date_input("Overlapping dates", value=(), key="leave_bulk_range")
+            filters = {"current": "Pending", "reason": reason or None, "dept": None if dept == "All" else dept}
+            if len(bulk_days) == 2:
+                filters["date_from"], filters["date_to"] = str(bulk_days[0]), str(bulk_days[1])
+            matching = leaves.find_requests(**filters)
+            st.caption(f"{len(matching)} pending requests match")
+            note = st.text_input("Note", key="leave_bulk_note")
+            col1, col2 = st.columns(2)
+            for col, decision, label in ((col1, "Approved", "✅ Approve all"), (col2, "Rejected", "🚫 Reject all")):
+                if col.button(label, disabled=not matching):
+                    changed, skipped = leaves.bulk_set_status(decision, by="warden", note=note or None,
+                                                              request_ids=[r[0] for r in matching], **filters)
+                    reset_paged_table("leaves_table")
+                    st.success(f"{decision} {len(changed)} requests")
+                    for rid, why in skipped[:20]:
+                        st.warning(f"Request {rid} skipped: {why}")
+
+    st.markdown("---")
+    f1, f2 = st.columns(2)
+    status = f1.selectbox("Status", ["All", "Pending", "Approved", "Rejected"])
+    days = f2.date_input("Overlapping dates", value=(), key="leaves_range")
+    filters = {"sort": "request_id", "descending": True}
+    if status != "All":
+        filters["status"] = status
+    if len(days) == 2:
+        filters["date_from"], filters["date_to"] = str(days[0]), str(days[1])
+    paged_table("leaves_table", backend.query_leave_requests, LEAVE_COLUMNS, filters)
+    download_button("leave_requests", "All Leave Requests")
@@ -0,0 +1,76 @@
+from datetime import datetime, date
+
+import streamlit as st
+
+import backend
+import curfew
+import gate_ingest
+import leaves
+from ui import download_button, frame, paged_table, reset_paged_table, student_picker, table
+
+LOG_COLUMNS = ["Log ID", "Student ID", "Entry", "Exit", "Status"]
+
+# ------------------------------
+# GATE MOVEMENTS
+# ------------------------------
+# With HOSTEL_INGEST_URL set, the buttons go through the same ingest
+# service as the turnstiles so there is a single writer.
+def record_movement(sid, direction):
+    if gate_ingest.INGEST_URL:
+        gate_ingest.submit(sid, direction)
+        return
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    backend.add_entry(sid, now, now if direction == "out" else None)
+    curfew.process_new()
+
+# ------------------------------
+# ENTRY LOGS
+# ------------------------------
+def render():
+    st.title("🕓 Entry / Exit Logs")
+    sid = student_picker("logs")
+    if sid is not None:
+        col1, col2 = st.columns(2)
+        if col1.button("✅ Check-In"):
+            record_movement(sid, "in")
+            reset_paged_table("logs_table")
+            st.success("Entry recorded successfully!")
+        if col2.button("🚪 Check-Out"):
+            record_movement(sid, "out")
+            reset_paged_table("logs_table")
+            st.success("Exit recorded successfully!")
+
+    with st.expander("🌙 Who is outside right now"):
+        curfew_time = st.time_input("Not returned by", value=datetime.strptime("22:00", "%H:%M").time())
+        cutoff = datetime.combine(date.today(), curfew_time).strftime("%Y-%m-%d %H:%M:%S")
+        missing = backend.not_returned_by(cutoff)
+        outside = backend.who_is_out()
+        st.caption(f"{len(outside)} outside, {len(missing)} out since before {curfew_time.strftime('%H:%M')}")
+        if outside:
+            df_out = frame(outside, ["Student ID", "Name", "Room", "Out Since"])
+            df_out["Not Returned"] = df_out["Out Since"] < cutoff
+            away = {row[0] for row in leaves.on_leave(date.today())}
+            df_out["On Leave"] = df_out["Student ID"].isin(away)
+            st.dataframe(df_out, use_container_width=True)
+
+    with st.expander("🚨 Curfew alerts"):
+        alerts = curfew.recent_alerts(limit=50)
+        if alerts:
+            table(alerts, ["Alert", "Student ID", "Name", "Room", "Kind", "Night", "Raised"])
+        else:
+            st.info("No curfew alerts.")
+
+    st.markdown("---")
+    f1, f2, f3 = st.columns(3)
+    only_selected = f1.checkbox("Only this student", disabled=sid is None)
+    status = f2.selectbox("Status", ["All", "On Time", "Late", "Overnight", "On Leave"])
+    days = f3.date_input("Date range", value=(), key="logs_range")
+    filters = {"sort": "log_id", "descending": True}
+    if only_selected and sid is not None:
+        filters["student_id"] = sid
+    if status != "All":
+        filters["status"] = status
+    if len(days) == 2:
+        filters["date_from"], filters["date_to"] = str(days[0]), str(days[1])
+    paged_table("logs_table", backend.query_logs, LOG_COLUMNS, filters)
+    download_button("entry_logs", "All Logs")
@@ -0,0 +1,51 @@
+import streamlit as st
+
+import backend
+import cache
+import medical
+import rooms
+from ui import download_button, student_picker, table
+
+# ------------------------------
+# MEDICAL INFO
+# ------------------------------
+def render():
+    st.title("💊 Medical Information")
+    try:
+        medical.check_key()
+    except RuntimeError as e:
+        st.error(f"🔒 {e}")
+        st.stop()
+
+    with st.expander("🚑 Emergency lookup", expanded=True):
+        col1, col2, col3 = st.columns(3)
+        blood = col1.selectbox("Blood Group", ["Any"] + list(medical.BLOOD_GROUPS))
+        allergy = col2.text_input("Allergy", placeholder="e.g. peanuts")
+        blocks = [row[0] for row in cache.get("occupancy", ("rooms",), rooms.occupancy)]
+        block = col3.selectbox("Block", ["All"] + blocks)
+        if blood != "Any" or allergy:
+            try:
+                found = medical.emergency(None if blood == "Any" else blood, allergy or None,
+                                          None if block == "All" else block, actor="warden")
+            except ValueError as e:
+                st.warning(f"⚠️ {e}")
+            else:
+                st.caption(f"{len(found)} residents")
+                if found:
+                    table(found, ["Student ID", "Name", "Room", "Contact", "Blood Group", "Emergency Contact"])
+
+    sid = student_picker("medical")
+    if sid is not None:
+        record = backend.view_medical_info(sid, actor="warden") or (sid, "", "", "", "")
+        with st.form("medical_form"):
+            blood = st.text_input("Blood Group", record[1] or "")
+            allergies = st.text_area("Allergies", record[2] or "", help="Comma-separated, e.g. peanuts, dust")
+            conditions = st.text_area("Medical Conditions", record[3] or "")
+            emergency = st.text_input("Emergency Contact", record[4] or "")
+            if st.form_submit_button("Save Info"):
+                backend.add_medical_info(sid, blood, allergies, conditions, emergency, actor="warden")
+                st.success("Medical info saved successfully!")
+        with st.expander("📜 Access history"):
+            table(medical.access_log(student_id=sid), ["#", "At", "By", "Action", "Student ID", "Detail"])
+
+    download_button("medical_info", "Medical Records")
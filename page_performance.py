@@ -0,0 +1,45 @@
+import os
+
+import plotly.express as px
+import streamlit as st
+
+import perf
+from ui import frame, table
+
+# ------------------------------
+# PERFORMANCE (ADMIN)
+# ------------------------------
+def render():
+    st.title("⚡ Performance")
+    col1, col2, col3 = st.columns(3)
+    enabled = col1.toggle("Instrumentation on", value=perf.ENABLED)
+    if enabled != perf.ENABLED:
+        perf.enable(enabled)
+    perf.SLOW_MS = col2.number_input("Slow query threshold (ms)", 1.0, 60000.0, float(perf.SLOW_MS))
+    if col3.button("🔄 Reset counters"):
+        perf.reset()
+    port = os.environ.get("HOSTEL_METRICS_PORT")
+    st.caption(f"Prometheus: http://127.0.0.1:{port}/metrics · JSON: /metrics.json" if port
+               else "Set HOSTEL_METRICS_PORT to expose these numbers to Prometheus or as JSON.")
+
+    snap = perf.snapshot()
+    if not snap["timers"]:
+        st.info("No timings yet. Turn instrumentation on and use the other pages.")
+    else:
+        timers = frame([
+            (name, t["count"], t["total_ms"], t["mean_ms"], t["p50_ms"], t["p99_ms"], t["max_ms"], t["rows"])
+            for name, t in snap["timers"].items()
+        ], ["Timer", "Calls", "Total ms", "Mean ms", "p50 ≤ ms", "p99 ≤ ms", "Max ms", "Rows"])
+        st.dataframe(timers.sort_values("Total ms", ascending=False), use_container_width=True, hide_index=True)
+
+        name = st.selectbox("Latency histogram", list(snap["timers"]))
+        buckets = snap["timers"][name]["buckets"]
+        st.plotly_chart(px.bar(x=[f"≤ {b} ms" if b != "+Inf" else "> 5000 ms" for b in buckets],
+                               y=list(buckets.values()), labels={"x": "Latency", "y": "Calls"},
+                               title=name), use_container_width=True)
+
+    st.subheader(f"🐢 Slow queries (≥ {perf.SLOW_MS:g} ms)")
+    if snap["slow_queries"]:
+        table(snap["slow_queries"][::-1], hide_index=True)
+    else:
+        st.caption("None recorded.")
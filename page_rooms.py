@@ -0,0 +1,53 @@
+import streamlit as st
+
+import cache
+import rooms
+from ui import student_picker, table
+
+# ------------------------------
+# ROOMS
+# ------------------------------
+def render():
+    st.title("🛏️ Rooms & Beds")
+    blocks = cache.get("occupancy", ("rooms",), rooms.occupancy)
+    if blocks:
+        table(blocks, ["Block", "Gender", "Rooms", "Beds", "Occupied", "Free"], hide_index=True)
+    else:
+        st.info("No rooms yet. Add some below.")
+
+    tab1, tab2, tab3 = st.tabs(["🧮 Allocate", "🔁 Transfer", "➕ Add Rooms"])
+    with tab1:
+        waiting = rooms.unallocated_students()
+        st.caption(f"{len(waiting)} students without a bed")
+        together = st.radio("Keep together", ["No preference", "dept", "year"], horizontal=True)
+        if st.button("🧮 Allocate everyone waiting", disabled=not waiting):
+            placed, errors = rooms.allocate(waiting, None if together == "No preference" else together)
+            st.success(f"✅ Allocated {len(placed)} students")
+            if errors:
+                st.warning(f"⚠️ {len(errors)} could not be placed")
+                table(errors, ["Student ID", "Reason"])
+    with tab2:
+        sid = student_picker("rooms")
+        if sid is not None:
+            st.caption(f"Current room: {rooms.room_of(sid) or 'none'}")
+            free = rooms.free_beds()
+            if free:
+                target = st.selectbox("Move to", [f"{room} ({n} free)" for room, _, n in free])
+                if st.button("🔁 Transfer"):
+                    try:
+                        rooms.transfer(sid, target.split(" ")[0])
+                        st.success("Room changed.")
+                    except ValueError as e:
+                        st.error(f"❌ {e}")
+    with tab3:
+        with st.form("rooms_form", clear_on_submit=True):
+            col1, col2, col3, col4 = st.columns(4)
+            block = col1.text_input("Block", "A")
+            first = col2.number_input("First room", 1, 9999, 101)
+            last = col3.number_input("Last room", 1, 9999, 120)
+            capacity = col4.number_input("Beds per room", 1, 12, 2)
+            gender = st.selectbox("Block gender", ["Mixed", "M", "F"])
+            if st.form_submit_button("Add Rooms"):
+                count = rooms.add_rooms((f"{block}-{n}", capacity) for n in range(int(first), int(last) + 1))
+                rooms.set_block(block.strip().upper(), None if gender == "Mixed" else gender)
+                st.success(f"✅ {count} rooms ready in block {block}")
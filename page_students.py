@@ -0,0 +1,62 @@
+import streamlit as st
+
+import backend
+import cache
+import dataio
+import perf
+from ui import download_button, frame, table
+
+STUDENT_COLUMNS = ["ID", "Name", "Dept", "Year", "Contact", "Guardian", "Guardian Contact", "Room"]
+
+@perf.timed("app.students_df")
+def students_df():
+    return cache.get("students_df", ("students",), lambda: frame(backend.view_students(), STUDENT_COLUMNS))
+
+# ------------------------------
+# STUDENTS
+# ------------------------------
+def render():
+    st.title("👨‍🎓 Student Management")
+
+    tab1, tab2, tab3 = st.tabs(["➕ Add Student", "📋 View Students", "📥 Import Roster"])
+
+    with tab1:
+        with st.form("add_student_form", clear_on_submit=True):
+            col1, col2 = st.columns(2)
+            with col1:
+                name = st.text_input("Full Name")
+                dept = st.text_input("Department")
+                year = st.number_input("Year", 1, 5)
+                contact = st.text_input("Contact Number")
+            with col2:
+                guardian = st.text_input("Guardian Name")
+                guardian_contact = st.text_input("Guardian Contact")
+                room = st.text_input("Room Number")
+                gender = st.selectbox("Gender", ["", "M", "F"], help="Needed for rooms in a boys' or girls' block")
+            submit = st.form_submit_button("Add Student")
+            if submit:
+                try:
+                    backend.add_student(name, dept, year, contact, guardian, guardian_contact, room, gender)
+                except ValueError as e:
+                    st.error(f"❌ {e}")
+                else:
+                    st.success(f"✅ {name} added successfully!")
+
+    with tab2:
+        df_students = students_df()
+        if not df_students.empty:
+            st.dataframe(df_students, use_container_width=True)
+            download_button("students", "Students")
+        else:
+            st.info("No student records found.")
+
+    with tab3:
+        st.caption("Columns: " + ", ".join(dataio.TABLES["students"][1:]))
+        roster = st.file_uploader("Roster file", type=["csv", "parquet"])
+        if roster is not None and st.button("Import Students"):
+            fmt = "parquet" if roster.name.lower().endswith(".parquet") else "csv"
+            count, errors = dataio.import_table("students", roster, fmt)
+            st.success(f"✅ Imported {count} students")
+            if errors:
+                st.warning(f"⚠️ {len(errors)} rows skipped")
+                table([(i + 2, reason) for i, _, reason in errors], ["Line", "Problem"])
@@ -0,0 +1,263 @@
+import functools
+import inspect
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# -------------------------------
+# HOT-PATH INSTRUMENTATION
+# -------------------------------
+# Timers for backend/stats functions (wrapped by instrument()), for every
+# statement run on a pooled connection (Connection below), for connection
+# setup, and for app.py sections (timer()). Everything is off unless
+# HOSTEL_PERF=1 or enable() is called; switched off, each wrapped call costs
+# one flag check.
+#
+# Each timer keeps a latency histogram (Prometheus-style buckets), a call
+# count, total seconds and rows returned. Statements slower than SLOW_MS are
+# also kept, with their parameters, in the slow query log.
+
+ENABLED = os.environ.get("HOSTEL_PERF", "") == "1"
+SLOW_MS = float(os.environ.get("HOSTEL_SLOW_MS", "100"))
+SLOW_LOG_SIZE = 200
+# Upper bounds in milliseconds; the last bucket is +Inf.
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+log = logging.getLogger("hostel.perf")
+
+
+class Timer:
+    __slots__ = ("count", "seconds", "rows", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.rows = 0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, seconds, rows):
+        ms = seconds * 1000
+        self.count += 1
+        self.seconds += seconds
+        self.rows += rows
+        self.max = max(self.max, seconds)
+        for i, bound in enumerate(BUCKETS_MS):
+            if ms <= bound:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    def quantile(self, q):
+        """Upper bound (ms) of the bucket holding the q-th observation."""
+        if not self.count:
+            return None
+        seen, target = 0, q * self.count
+        for bound, n in zip(BUCKETS_MS + (self.max * 1000,), self.buckets):
+            seen += n
+            if seen >= target:
+                return min(bound, self.max * 1000)
+        return self.max * 1000
+
+
+_timers = {}
+_slow = deque(maxlen=SLOW_LOG_SIZE)
+_lock = threading.Lock()
+
+
+def enable(on=True):
+    global ENABLED
+    ENABLED = on
+
+
+def disable():
+    enable(False)
+
+
+def reset():
+    with _lock:
+        _timers.clear()
+        _slow.clear()
+
+
+def record(name, seconds, rows=0):
+    with _lock:
+        timer = _timers.get(name)
+        if timer is None:
+            timer = _timers[name] = Timer()
+        timer.add(seconds, rows)
+
+
+def _row_count(result):
+    if isinstance(result, list):
+        return len(result)
+    return 0 if result is None else 1
+
+
+@contextmanager
+def timer(name):
+    """Time a block, e.g. a page section in app.py."""
+    if not ENABLED:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - started)
+
+
+def timed(name):
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return fn(*args, **kwargs)
+            started = time.perf_counter()
+            result = fn(*args, **kwargs)
+            record(name, time.perf_counter() - started, _row_count(result))
+            return result
+        wrapper.__wrapped__ = fn
+        return wrapper
+    return decorate
+
+
+def instrument(namespace, prefix, skip=()):
+    """Wrap the public functions a module defines; call as instrument(globals(), "backend")."""
+    module = namespace["__name__"]
+    for name, fn in list(namespace.items()):
+        if (name.startswith("_") or name in skip or not inspect.isfunction(fn)
+                or fn.__module__ != module or inspect.isgeneratorfunction(fn)
+                or hasattr(fn, "__wrapped__")):
+            continue
+        namespace[name] = timed(f"{prefix}.{name}")(fn)
+
+
+# -------------------------------
+# INSTRUMENTED CONNECTIONS
+# -------------------------------
+def _slow_query(seconds, sql, params):
+    entry = {
+        "at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "ms": round(seconds * 1000, 3),
+        "sql": " ".join(sql.split()),
+        "params": repr(params)[:500],
+    }
+    with _lock:
+        _slow.append(entry)
+    log.warning("slow query (%.1f ms): %s %s", entry["ms"], entry["sql"], entry["params"])
+
+
+class Connection(sqlite3.Connection):
+    """sqlite3 connection that times execute()/executemany() while enabled.
+
+    Timings cover preparing the statement and stepping to its first row,
+    which is where sorting, grouping and all writes happen; fetching the
+    rest is counted by the calling function's own timer.
+    """
+
+    def execute(self, sql, params=()):
+        if not ENABLED:
+            return super().execute(sql, params)
+        started = time.perf_counter()
+        cur = super().execute(sql, params)
+        elapsed = time.perf_counter() - started
+        record("sql." + (sql.split(None, 1) or ["?"])[0].upper(), elapsed, max(cur.rowcount, 0))
+        if elapsed * 1000 >= SLOW_MS:
+            _slow_query(elapsed, sql, params)
+        return cur
+
+    def executemany(self, sql, rows):
+        if not ENABLED:
+            return super().executemany(sql, rows)
+        rows = rows if isinstance(rows, (list, tuple)) else list(rows)
+        started = time.perf_counter()
+        cur = super().executemany(sql, rows)
+        elapsed = time.perf_counter() - started
+        record("sql." + (sql.split(None, 1) or ["?"])[0].upper() + "_MANY", elapsed, len(rows))
+        if elapsed * 1000 >= SLOW_MS:
+            _slow_query(elapsed, sql, f"{len(rows)} rows, first {rows[0] if rows else None!r}")
+        return cur
+
+
+# -------------------------------
+# EXPORT
+# -------------------------------
+def snapshot():
+    """Plain-dict copy of every timer and the slow query log."""
+    with _lock:
+        timers = {
+            name: {
+                "count": t.count,
+                "total_ms": round(t.seconds * 1000, 3),
+                "mean_ms": round(t.seconds * 1000 / t.count, 3) if t.count else None,
+                "p50_ms": t.quantile(0.5),
+                "p99_ms": t.quantile(0.99),
+                "max_ms": round(t.max * 1000, 3),
+                "rows": t.rows,
+                "buckets": dict(zip([str(b) for b in BUCKETS_MS] + ["+Inf"], t.buckets)),
+            }
+            for name, t in sorted(_timers.items())
+        }
+        slow = list(_slow)
+    return {"enabled": ENABLED, "slow_ms": SLOW_MS, "timers": timers, "slow_queries": slow}
+
+
+def prometheus():
+    """The timers in Prometheus text exposition format."""
+    lines = [
+        "# HELP hostel_call_seconds Time spent in instrumented calls.",
+        "# TYPE hostel_call_seconds histogram",
+    ]
+    rows = ["# HELP hostel_call_rows_total Rows returned or written by instrumented calls.",
+            "# TYPE hostel_call_rows_total counter"]
+    with _lock:
+        for name, t in sorted(_timers.items()):
+            label = name.replace("\\", "\\\\").replace('"', '\\"')
+            cumulative = 0
+            for bound, n in zip(BUCKETS_MS, t.buckets):
+                cumulative += n
+                lines.append(f'hostel_call_seconds_bucket{{name="{label}",le="{bound / 1000:g}"}} {cumulative}')
+            lines.append(f'hostel_call_seconds_bucket{{name="{label}",le="+Inf"}} {t.count}')
+            lines.append(f'hostel_call_seconds_sum{{name="{label}"}} {t.seconds:.6f}')
+            lines.append(f'hostel_call_seconds_count{{name="{label}"}} {t.count}')
+            rows.append(f'hostel_call_rows_total{{name="{label}"}} {t.rows}')
+        lines += rows
+        lines.append("# HELP hostel_slow_queries Slow statements currently in the log.")
+        lines.append("# TYPE hostel_slow_queries gauge")
+        lines.append(f"hostel_slow_queries {len(_slow)}")
+    return "\n".join(lines) + "\n"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        if path == "/metrics":
+            body, kind = prometheus().encode(), "text/plain; version=0.0.4"
+        elif path == "/metrics.json":
+            body, kind = json.dumps(snapshot()).encode(), "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", kind)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(port, host="127.0.0.1"):
+    """Expose /metrics (Prometheus) and /metrics.json from a daemon thread."""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    threading.Thread(target=server.serve_forever, name="perf-metrics", daemon=True).start()
+    return server
@@ -0,0 +1,181 @@
+import os
+from datetime import datetime, timedelta
+
+import backend
+import curfew
+import database
+import db
+
+# -------------------------------
+# LOG RETENTION / ARCHIVING
+# -------------------------------
+# Closed entry_logs rows older than the retention age move out of hostel.db
+# into one SQLite file per month (archive/entry_logs_YYYY_MM.db), catalogued
+# in log_archives. Hourly counts per department and block (bucketed by
+# database.moved_at_sql(), like the live counts) stay behind in
+# archived_log_summary so analytics never has to open an archive, and
+# backend.query_logs() reads the archives again when a date range reaches
+# them. The hot database keeps only recent months.
+#
+# A row is closed once the curfew engine has classified it and daily_stats
+# has counted it (log_id at or below both watermarks) and it is not anyone's
+# current presence row.
+
+ARCHIVE_DIR = os.environ.get("HOSTEL_ARCHIVE_DIR", "archive")
+RETENTION_DAYS = int(os.environ.get("HOSTEL_RETENTION_DAYS", "180"))
+
+_CLOSED = """
+    FROM entry_logs l
+    WHERE l.entry_time >= ? AND l.entry_time < ?
+      AND l.log_id <= ?
+      AND l.log_id <= COALESCE((SELECT last_id FROM watermarks WHERE name = 'rollup:entry_logs'), 0)
+      AND l.log_id NOT IN (SELECT log_id FROM presence)
+"""
+_COLUMNS = "(log_id, student_id, entry_time, exit_time, status)"
+
+
+def archive_path(month):
+    # Each hostel shard archives into its own subdirectory.
+    return os.path.abspath(os.path.join(ARCHIVE_DIR, db.current_hostel() or "",
+                                        f"entry_logs_{month.replace('-', '_')}.db"))
+
+
+def _next_month(month):
+    year, mon = map(int, month.split("-"))
+    return f"{year + mon // 12:04d}-{mon % 12 + 1:02d}"
+
+
+def _watermark(conn):
+    row = conn.execute("SELECT last_id FROM watermarks WHERE name = ?", (curfew.WATERMARK,)).fetchone()
+    return row[0] if row else 0
+
+
+def _create_archive(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS arc.entry_logs (
+            log_id INTEGER PRIMARY KEY,
+            student_id INTEGER NOT NULL,
+            entry_time TEXT,
+            exit_time TEXT,
+            status TEXT
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS arc.idx_entry_logs_student_time ON entry_logs(student_id, entry_time)")
+    conn.execute("CREATE INDEX IF NOT EXISTS arc.idx_entry_logs_time ON entry_logs(entry_time)")
+
+
+def _summarise(conn, params):
+    totals = {}
+    for hour, dept, room_no, *counts in conn.execute(f"""
+        SELECT substr({database.moved_at_sql("l")}, 1, 13) || ':00:00', COALESCE(s.dept, ''), s.room_no,
+               SUM({database.checkin_sql("l")}), SUM(NOT {database.checkin_sql("l")}),
+               SUM(l.status = 'Late'), SUM(l.status = 'Overnight'), SUM(l.status = 'On Leave')
+        {_CLOSED.replace("FROM entry_logs l", "FROM entry_logs l LEFT JOIN students s ON s.id = l.student_id")}
+        GROUP BY 1, 2, 3
+    """, params):
+        key = (hour, dept, backend.block_of(room_no))
+        totals[key] = [a + b for a, b in zip(totals.get(key, [0] * 5), counts)]
+    conn.executemany("""
+        INSERT INTO archived_log_summary
+            (hour, dept, block, check_ins, check_outs, late, overnight, on_leave)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(hour, dept, block) DO UPDATE SET
+            check_ins = check_ins + excluded.check_ins,
+            check_outs = check_outs + excluded.check_outs,
+            late = late + excluded.late,
+            overnight = overnight + excluded.overnight,
+            on_leave = on_leave + excluded.on_leave
+    """, [(*key, *counts) for key, counts in totals.items()])
+
+
+def _archive_month(conn, month, cutoff):
+    path = archive_path(month)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with db.attached(conn, path, "arc"):
+        _create_archive(conn)
+        conn.execute("BEGIN IMMEDIATE")
+        params = (f"{month}-01", min(f"{_next_month(month)}-01", cutoff), _watermark(conn))
+        # Commits across attached WAL databases are atomic per file only, so
+        # the copy is idempotent and the summary sits in the same file as the
+        # delete: a crash between the two can only leave rows in both places,
+        # which the next run (and query_logs) tolerates.
+        conn.execute(f"INSERT OR IGNORE INTO arc.entry_logs {_COLUMNS} SELECT {_COLUMNS[1:-1]} {_CLOSED}", params)
+        _summarise(conn, params)
+        moved = conn.execute(f"DELETE FROM entry_logs WHERE log_id IN (SELECT l.log_id {_CLOSED})",
+                             params).rowcount
+        conn.execute("""
+            INSERT INTO log_archives (month, path, rows, archived_at)
+            VALUES (?, ?, (SELECT COUNT(*) FROM arc.entry_logs), ?)
+            ON CONFLICT(month) DO UPDATE SET
+                path = excluded.path, rows = excluded.rows, archived_at = excluded.archived_at
+        """, (month, path, datetime.now().strftime(backend.TIME_FORMAT)))
+        conn.commit()
+    return moved
+
+
+def archive_logs(older_than_days=RETENTION_DAYS, now=None):
+    """Move closed log rows older than the cutoff into monthly archives.
+
+    Returns {month: rows moved}. Safe to re-run at any time.
+    """
+    cutoff = ((now or datetime.now()) - timedelta(days=older_than_days)).strftime(backend.TIME_FORMAT)
+    # Rows must be in daily_stats before they leave entry_logs.
+    backend.stats.refresh_daily_stats()
+    moved = {}
+    with db.connection() as conn:
+        months = [m for (m,) in conn.execute("""
+            SELECT DISTINCT substr(entry_time, 1, 7) FROM entry_logs WHERE entry_time < ? ORDER BY 1
+        """, (cutoff,))]
+        for month in months:
+            count = _archive_month(conn, month, cutoff)
+            if count:
+                moved[month] = count
+    if moved:
+        backend.bump_versions("entry_logs")
+    return moved
+
+
+def compact(vacuum=False):
+    """Give the space freed by archiving back: checkpoint the WAL, optionally VACUUM."""
+    with db.connection() as conn:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        if vacuum:
+            conn.execute("VACUUM")
+
+
+def list_archives():
+    with db.connection() as conn:
+        return conn.execute("SELECT month, path, rows, archived_at FROM log_archives ORDER BY month").fetchall()
+
+
+# -------------------------------
+# COMMAND LINE
+# -------------------------------
+if __name__ == "__main__":
+    import argparse
+
+    import shards
+
+    parser = argparse.ArgumentParser(description="Archive old entry logs into monthly databases.")
+    parser.add_argument("--hostel", help="hostel id from the hostel map (default: every hostel / hostel.db)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_archive = sub.add_parser("archive", help="move closed logs past the retention age")
+    p_archive.add_argument("--days", type=int, default=RETENTION_DAYS)
+    p_archive.add_argument("--vacuum", action="store_true", help="shrink hostel.db afterwards")
+    sub.add_parser("list", help="show archived months")
+    args = parser.parse_args()
+
+    shards.load()
+    shards.init_all()
+    for hostel_id in [args.hostel] if args.hostel else shards.hostels():
+        with db.use(hostel_id):
+            if args.command == "archive":
+                moved = archive_logs(args.days)
+                compact(args.vacuum)
+                print(f"✅ {hostel_id or 'hostel.db'}: archived {sum(moved.values())} log rows "
+                      f"from {len(moved)} months")
+                for month, count in moved.items():
+                    print(f"   {month}: {count} rows -> {archive_path(month)}")
+            else:
+                for month, path, rows, archived_at in list_archives():
+                    print(f"{hostel_id or ''}  {month}  {rows:>8} rows  {archived_at}  {path}".lstrip())
@@ -0,0 +1,253 @@
+from datetime import datetime
+
+import backend
+import db
+
+# -------------------------------
+# ROOMS / BED ALLOCATION
+# -------------------------------
+# rooms holds capacity and a trigger-maintained occupied count per room;
+# idx_rooms_free only indexes rooms with a spare bed, so finding free beds
+# never touches full rooms. allocations has one row per housed student and
+# mirrors the room into students.room_no. Deleting a student vacates the
+# bed through ON DELETE CASCADE.
+#
+# allocate() places a whole batch in one pass over the free rooms and
+# writes it in one transaction, so a batch is never half-applied and the
+# occupied CHECK catches anything that would overfill a room.
+
+TOGETHER = (None, "dept", "year")
+GENDERS = ("M", "F")
+
+
+def _now():
+    return datetime.now().strftime(backend.TIME_FORMAT)
+
+
+def set_block(block, gender=None):
+    if gender not in (None,) + GENDERS:
+        raise ValueError(f"gender must be one of {GENDERS} or None, got {gender!r}")
+    with db.transaction() as conn:
+        conn.execute("""
+            INSERT INTO blocks (block, gender) VALUES (?, ?)
+            ON CONFLICT(block) DO UPDATE SET gender = excluded.gender
+        """, (block, gender))
+    backend.bump_versions("rooms")
+
+
+def add_rooms(rows):
+    """Create or resize rooms from (room_no, capacity) pairs; the block comes from the room number."""
+    rows = [(room_no, backend.block_of(room_no), int(capacity)) for room_no, capacity in rows]
+    with db.transaction() as conn:
+        conn.executemany("INSERT OR IGNORE INTO blocks (block) VALUES (?)", {(b,) for _, b, _ in rows})
+        conn.executemany("""
+            INSERT INTO rooms (room_no, block, capacity) VALUES (?, ?, ?)
+            ON CONFLICT(room_no) DO UPDATE SET capacity = excluded.capacity
+        """, rows)
+    backend.bump_versions("rooms")
+    return len(rows)
+
+
+def free_beds(block=None):
+    """(room_no, block, free beds) for every room with space, via the free-bed index."""
+    sql = "SELECT room_no, block, capacity - occupied FROM rooms WHERE occupied < capacity"
+    params = ()
+    if block is not None:
+        sql += " AND block = ?"
+        params = (block,)
+    with db.connection() as conn:
+        return conn.execute(sql + " ORDER BY block, room_no", params).fetchall()
+
+
+def occupancy():
+    """(block, gender, rooms, beds, occupied, free) per block."""
+    with db.connection() as conn:
+        return conn.execute("""
+            SELECT r.block, b.gender, COUNT(*), SUM(r.capacity), SUM(r.occupied), SUM(r.capacity - r.occupied)
+            FROM rooms r JOIN blocks b ON b.block = r.block
+            GROUP BY r.block ORDER BY r.block
+        """).fetchall()
+
+
+def room_of(student_id):
+    with db.connection() as conn:
+        row = conn.execute("SELECT room_no FROM allocations WHERE student_id = ?", (student_id,)).fetchone()
+    return row[0] if row else None
+
+
+def unallocated_students():
+    with db.connection() as conn:
+        return [r[0] for r in conn.execute("""
+            SELECT id FROM students WHERE id NOT IN (SELECT student_id FROM allocations) ORDER BY id
+        """)]
+
+
+# -------------------------------
+# ALLOCATOR
+# -------------------------------
+EMPTY, MIXED = "empty", "mixed"  # room "keys" that are not a dept/year value
+
+
+def _load(conn, student_ids, together):
+    students = {}
+    for i in range(0, len(student_ids), 500):
+        part = student_ids[i:i + 500]
+        marks = ",".join("?" * len(part))
+        for sid, dept, year, gender, room in conn.execute(f"""
+            SELECT s.id, s.dept, s.year, s.gender, a.room_no
+            FROM students s LEFT JOIN allocations a ON a.student_id = s.id
+            WHERE s.id IN ({marks})
+        """, part):
+            students[sid] = (_group_key(together, dept, year), gender, room)
+    # Each free room with what its current residents have in common.
+    beds = []
+    for room_no, block, gender, free, residents, depts, dept, years, year in conn.execute("""
+        SELECT r.room_no, r.block, b.gender, r.capacity - r.occupied, COUNT(a.student_id),
+               COUNT(DISTINCT s.dept), MIN(s.dept), COUNT(DISTINCT s.year), MIN(s.year)
+        FROM rooms r
+        JOIN blocks b ON b.block = r.block
+        LEFT JOIN allocations a ON a.room_no = r.room_no
+        LEFT JOIN students s ON s.id = a.student_id
+        WHERE r.occupied < r.capacity
+        GROUP BY r.room_no ORDER BY r.block, r.room_no
+    """):
+        if not residents:
+            key = EMPTY
+        elif together == "dept":
+            key = ("dept", dept) if depts == 1 else MIXED
+        elif together == "year":
+            key = ("year", year) if years == 1 else MIXED
+        else:
+            key = MIXED
+        beds.append([room_no, block, gender, free, key])
+    return students, beds
+
+
+def _group_key(together, dept, year):
+    if together == "dept":
+        return ("dept", dept)
+    if together == "year":
+        return ("year", year)
+    return None
+
+
+def allocate(student_ids, together=None, block=None):
+    """House a batch of students. Returns (placed [(student_id, room_no)], errors [(student_id, reason)]).
+
+    together="dept" or "year" only puts students in a room whose residents
+    share that value; students fill partly-used matching rooms before empty
+    ones. A block's gender, when set, must match the student's. block limits
+    the batch to one block.
+    """
+    if together not in TOGETHER:
+        raise ValueError(f"together must be one of {TOGETHER}, got {together!r}")
+    student_ids = list(dict.fromkeys(student_ids))
+    placed, errors = [], []
+    with db.transaction() as conn:
+        conn.execute("BEGIN IMMEDIATE")  # free-bed counts must not change under us
+        students, beds = _load(conn, student_ids, together)
+        if block is not None:
+            beds = [bed for bed in beds if bed[1] == block]
+
+        groups = {}
+        for sid in student_ids:
+            if sid not in students:
+                errors.append((sid, "unknown student"))
+                continue
+            key, gender, current = students[sid]
+            if current is not None:
+                errors.append((sid, f"already in {current}"))
+                continue
+            groups.setdefault((key, gender), []).append(sid)
+
+        # Biggest groups first so they get runs of neighbouring rooms.
+        for (key, gender), members in sorted(groups.items(), key=lambda g: -len(g[1])):
+            def fits(bed):
+                return (bed[3] > 0 and bed[2] in (None, gender)
+                        and (together is None or bed[4] in (EMPTY, key)))
+            # Partly used rooms of the same group first, then empty ones.
+            order = [b for b in beds if b[4] == key] + [b for b in beds if b[4] != key]
+            next_member = 0
+            for bed in order:
+                while next_member < len(members) and fits(bed):
+                    placed.append((members[next_member], bed[0]))
+                    next_member += 1
+                    bed[3] -= 1
+                    bed[4] = key if together else MIXED
+                if next_member == len(members):
+                    break
+            errors.extend((sid, "no free bed that fits") for sid in members[next_member:])
+
+        now = _now()
+        conn.executemany("INSERT INTO allocations (student_id, room_no, allocated_at) VALUES (?, ?, ?)",
+                         [(sid, room_no, now) for sid, room_no in placed])
+    backend.bump_versions("rooms", "students")
+    return placed, errors
+
+
+def transfer(student_id, room_no):
+    """Move an allocated (or not yet allocated) student to room_no."""
+    with db.transaction() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        backend.assign_room(conn, student_id, room_no, create=False)
+    backend.bump_versions("rooms", "students")
+
+
+def vacate(student_id):
+    with db.transaction() as conn:
+        vacated = conn.execute("DELETE FROM allocations WHERE student_id = ?", (student_id,)).rowcount > 0
+    backend.bump_versions("rooms", "students")
+    return vacated
+
+
+# -------------------------------
+# COMMAND LINE
+# -------------------------------
+if __name__ == "__main__":
+    import argparse
+
+    import shards
+
+    parser = argparse.ArgumentParser(description="Rooms, beds and allocation.")
+    parser.add_argument("--hostel", help="hostel id from the hostel map (default: the block's hostel, "
+                                         "or every hostel)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_rooms = sub.add_parser("add-rooms", help="create rooms like A-101..A-140")
+    p_rooms.add_argument("block")
+    p_rooms.add_argument("first", type=int)
+    p_rooms.add_argument("last", type=int)
+    p_rooms.add_argument("--capacity", type=int, default=2)
+    p_block = sub.add_parser("set-block", help="set a block's gender (omit for mixed)")
+    p_block.add_argument("block")
+    p_block.add_argument("gender", nargs="?", choices=GENDERS)
+    p_alloc = sub.add_parser("allocate", help="house every student without a bed")
+    p_alloc.add_argument("--together", choices=("dept", "year"))
+    p_alloc.add_argument("--block")
+    sub.add_parser("occupancy")
+    args = parser.parse_args()
+
+    shards.load()
+    shards.init_all()
+    block = getattr(args, "block", None)
+    try:
+        hostels = [args.hostel or shards.hostel_of(block=block)] if args.hostel or block else shards.hostels()
+    except ValueError as e:
+        parser.error(str(e))
+    for hostel_id in hostels:
+        label = hostel_id or "hostel.db"
+        with db.use(hostel_id):
+            if args.command == "add-rooms":
+                count = add_rooms((f"{args.block}-{n}", args.capacity) for n in range(args.first, args.last + 1))
+                print(f"✅ {label}: {count} rooms in block {args.block}")
+            elif args.command == "set-block":
+                set_block(args.block, args.gender)
+                print(f"✅ {label}: block {args.block} {args.gender or 'mixed'}")
+            elif args.command == "allocate":
+                placed, errors = allocate(unallocated_students(), args.together, args.block)
+                print(f"✅ {label}: allocated {len(placed)} students, {len(errors)} could not be placed")
+                for sid, reason in errors[:20]:
+                    print(f"   student {sid}: {reason}")
+            else:
+                for row_block, gender, count, beds, occupied, free in occupancy():
+                    print(f"{label}  {row_block:>4} {gender or 'mixed':>5}  {count:>4} rooms  "
+                          f"{occupied:>5}/{beds:<5} beds  {free} free")
@@ -0,0 +1,164 @@
+import json
+import os
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import backend
+import db
+
+# -------------------------------
+# HOSTEL SHARDS
+# -------------------------------
+# Each hostel lives in its own SQLite file, so hostels never wait on each
+# other's write lock. The map comes from a JSON file ($HOSTEL_SHARDS,
+# hostels.json by default):
+#
+#   {"boys-1":  {"path": "hostels/boys-1.db",  "blocks": ["A", "B"]},
+#    "girls-1": {"path": "hostels/girls-1.db", "blocks": ["C"]}}
+#
+# route() sends the backend calls in a block to one hostel, picked by id or
+# by a room's block prefix; fan_out() runs a call on every hostel in
+# parallel and the campus_* helpers merge the answers. Student, log and
+# request ids are per hostel: (hostel_id, student_id) identifies a student
+# campus-wide. With no map configured everything runs on db.DB_PATH and
+# hostels() is [None].
+
+SHARDS_FILE = os.environ.get("HOSTEL_SHARDS", "hostels.json")
+
+_blocks = {}  # block prefix -> hostel_id
+
+
+def configure(hostels):
+    """hostels: {hostel_id: {"path": ..., "blocks": [...]}}; an empty dict goes back to one database."""
+    blocks = {}
+    for hostel_id, spec in hostels.items():
+        for block in spec.get("blocks", ()):
+            block = block.strip().upper()
+            if blocks.get(block, hostel_id) != hostel_id:
+                raise ValueError(f"Block {block} is in both {blocks[block]} and {hostel_id}")
+            blocks[block] = hostel_id
+    db.configure_shards({hostel_id: spec["path"] for hostel_id, spec in hostels.items()})
+    _blocks.clear()
+    _blocks.update(blocks)
+
+
+def load(path=None):
+    """Configure from the JSON map if it exists. Returns whether it did."""
+    path = path or SHARDS_FILE
+    if not os.path.exists(path):
+        return False
+    with open(path) as f:
+        configure(json.load(f))
+    return True
+
+
+def hostels():
+    return sorted(db.shards()) or [None]
+
+
+def hostel_of(room_no=None, block=None):
+    """The hostel holding a room or block; None when not sharded."""
+    if not db.shards():
+        return None
+    block = (block or backend.block_of(room_no)).strip().upper()
+    if block not in _blocks:
+        raise ValueError(f"No hostel has block {block!r}")
+    return _blocks[block]
+
+
+@contextmanager
+def route(hostel_id=None, room_no=None, block=None):
+    """Run the block against one hostel, given by id or by a room / block it owns."""
+    if hostel_id is None and (room_no is not None or block is not None):
+        hostel_id = hostel_of(room_no, block)
+    with db.use(hostel_id):
+        yield hostel_id
+
+
+def fan_out(fn, *args, **kwargs):
+    """{hostel_id: fn(*args, **kwargs)} with each hostel's call on its own thread."""
+    targets = hostels()
+
+    def call(hostel_id):
+        with db.use(hostel_id):
+            return fn(*args, **kwargs)
+
+    if len(targets) == 1:
+        return {targets[0]: call(targets[0])}
+    with ThreadPoolExecutor(max_workers=len(targets), thread_name_prefix="shard") as pool:
+        return dict(zip(targets, pool.map(call, targets)))
+
+
+def init_all():
+    """Create or migrate every hostel's database."""
+    fan_out(backend.init_db)
+
+
+# -------------------------------
+# CAMPUS-WIDE FIGURES
+# -------------------------------
+def _sum_dicts(results):
+    total = Counter()
+    for result in results.values():
+        total.update(result)
+    return dict(total)
+
+
+def _merge_counts(results, order="count"):
+    """Merge [(key, count)] lists; by count (largest first) or by key."""
+    total = Counter()
+    for rows in results.values():
+        for key, count in rows:
+            total[key] += count or 0
+    if order == "key":
+        return sorted(total.items(), key=lambda kv: (kv[0] is None, kv[0]))
+    return sorted(total.items(), key=lambda kv: (-kv[1], str(kv[0])))
+
+
+def campus_totals():
+    totals = _sum_dicts(fan_out(backend.stats.totals))
+    # A department present in two hostels is still one department.
+    totals["departments"] = len(campus_students_by_dept())
+    return totals
+
+
+def campus_headcount():
+    return _sum_dicts(fan_out(backend.headcount))
+
+
+def campus_students_by_dept():
+    return _merge_counts(fan_out(backend.stats.students_by_dept))
+
+
+def campus_late_returns(bucket="day", date_from=None, date_to=None):
+    return _merge_counts(fan_out(backend.stats.late_returns, bucket, date_from, date_to), order="key")
+
+
+def by_hostel():
+    """(hostel_id, students, in, out) per hostel."""
+    return [(hostel_id, h["total"], h["in"], h["out"]) for hostel_id, h in fan_out(backend.headcount).items()]
+
+
+# -------------------------------
+# COMMAND LINE
+# -------------------------------
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Per-hostel databases.")
+    parser.add_argument("--map", default=SHARDS_FILE, help="hostel map (JSON)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("init", help="create or migrate every hostel's database")
+    sub.add_parser("totals", help="campus-wide and per-hostel figures")
+    args = parser.parse_args()
+
+    if not load(args.map):
+        parser.error(f"{args.map} not found")
+    init_all()
+    if args.command == "init":
+        print(f"✅ {len(hostels())} hostel databases ready")
+    else:
+        print(json.dumps(campus_totals(), indent=2))
+        for hostel_id, total, inside, outside in by_hostel():
+            print(f"{hostel_id:>12}  {total:>6} students  {inside:>6} in  {outside:>6} out")
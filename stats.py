@@ -0,0 +1,200 @@
+from datetime import date, timedelta
+
+import database
+import db
+import perf
+
+# -------------------------------
+# AGGREGATES FOR DASHBOARD / ANALYTICS
+# -------------------------------
+# Everything here is computed with GROUP BY / COUNT in SQLite, so callers
+# get one row per group instead of every row of the underlying table.
+
+# Live rows are bucketed by database.moved_at_sql() (exit_time for a
+# check-out, entry_time for a check-in), stored as "YYYY-MM-DD HH:MM:SS",
+# so most buckets are just a prefix of the string and can be read straight
+# off idx_entry_logs_moved_at.
+# The same expressions work on archived_log_summary.hour ("YYYY-MM-DD HH:00:00"),
+# which holds the hourly counts for rows retention.py moved out of entry_logs.
+BUCKETS = {
+    "hour": "substr({col}, 1, 13) || ':00'",
+    "day": "substr({col}, 1, 10)",
+    "week": "strftime('%Y-W%W', {col})",
+    "month": "substr({col}, 1, 7)",
+}
+
+
+MOVED_AT = database.moved_at_sql()
+
+
+def _bucket(bucket, col=MOVED_AT):
+    if bucket not in BUCKETS:
+        raise ValueError(f"Unknown bucket {bucket!r}; choose one of {tuple(BUCKETS)}")
+    return BUCKETS[bucket].format(col=col)
+
+
+def _time_range(where, params, date_from, date_to, col=MOVED_AT):
+    if date_from is not None:
+        where.append(f"{col} >= ?")
+        params.append(str(date_from))
+    if date_to is not None:
+        where.append(f"{col} < ?")
+        params.append(str(date.fromisoformat(str(date_to)) + timedelta(days=1)))
+
+
+def _where(where):
+    return (" WHERE " + " AND ".join(where)) if where else ""
+
+
+def totals():
+    with db.connection() as conn:
+        row = conn.execute("""
+            SELECT
+                (SELECT COUNT(*) FROM students),
+                (SELECT COUNT(*) FROM entry_logs)
+                    + (SELECT COALESCE(SUM(check_ins + check_outs), 0) FROM archived_log_summary),
+                (SELECT COUNT(*) FROM leave_requests),
+                (SELECT COUNT(*) FROM leave_requests WHERE status = 'Pending'),
+                (SELECT COUNT(*) FROM leave_requests WHERE status = 'Approved'),
+                (SELECT COUNT(DISTINCT dept) FROM students)
+        """).fetchone()
+    keys = ("students", "logs", "leaves", "pending_leaves", "approved_leaves", "departments")
+    return dict(zip(keys, row))
+
+
+def students_by_dept():
+    with db.connection() as conn:
+        return conn.execute("""
+            SELECT dept, COUNT(*) FROM students GROUP BY dept ORDER BY COUNT(*) DESC, dept
+        """).fetchall()
+
+
+def students_by_year():
+    with db.connection() as conn:
+        return conn.execute("""
+            SELECT year, COUNT(*) FROM students GROUP BY year ORDER BY year
+        """).fetchall()
+
+
+def leaves_by_status():
+    with db.connection() as conn:
+        return conn.execute("""
+            SELECT status, COUNT(*) FROM leave_requests GROUP BY status ORDER BY COUNT(*) DESC, status
+        """).fetchall()
+
+
+def _live_and_archived(bucket, date_from, date_to, live, archived, live_where=(), archived_where=()):
+    # Buckets from entry_logs and archived_log_summary, summed per bucket.
+    lw, lp = list(live_where), []
+    _time_range(lw, lp, date_from, date_to)
+    aw, ap = list(archived_where), []
+    _time_range(aw, ap, date_from, date_to, col="hour")
+    sums = ", ".join(f"SUM(c{i})" for i in range(len(live)))
+    with db.connection() as conn:
+        return conn.execute(f"""
+            SELECT b, {sums} FROM (
+                SELECT {_bucket(bucket)} AS b, {", ".join(f"{e} AS c{i}" for i, e in enumerate(live))}
+                FROM entry_logs{_where(lw)}
+                GROUP BY b
+                UNION ALL
+                SELECT {_bucket(bucket, "hour")} AS b, {", ".join(f"{e} AS c{i}" for i, e in enumerate(archived))}
+                FROM archived_log_summary{_where(aw)}
+                GROUP BY b
+            )
+            GROUP BY b ORDER BY b
+        """, lp + ap).fetchall()
+
+
+def movements(bucket="day", date_from=None, date_to=None):
+    checkin = database.checkin_sql()
+    return _live_and_archived(bucket, date_from, date_to,
+                              live=(f"SUM({checkin})", f"SUM(NOT {checkin})"),
+                              archived=("SUM(check_ins)", "SUM(check_outs)"))
+
+
+def late_returns(bucket="day", date_from=None, date_to=None):
+    return _live_and_archived(bucket, date_from, date_to,
+                              live=("COUNT(*)",), archived=("SUM(late)",),
+                              live_where=("status = 'Late'",), archived_where=("late > 0",))
+
+
+def leave_approval_by_dept():
+    # (dept, total, approved, rejected, pending, approval rate of decided requests)
+    with db.connection() as conn:
+        return conn.execute("""
+            SELECT s.dept,
+                   COUNT(*),
+                   SUM(l.status = 'Approved'),
+                   SUM(l.status = 'Rejected'),
+                   SUM(l.status = 'Pending'),
+                   ROUND(1.0 * SUM(l.status = 'Approved')
+                         / NULLIF(SUM(l.status IN ('Approved', 'Rejected')), 0), 3)
+            FROM leave_requests l JOIN students s ON s.id = l.student_id
+            GROUP BY s.dept ORDER BY s.dept
+        """).fetchall()
+
+
+# -------------------------------
+# DAILY ROLLUP / TRENDS
+# -------------------------------
+# Trend charts read daily_stats (see database.roll_up), whose size depends
+# on days x departments x blocks, not on how many logs there are: five years
+# of trend is a few thousand rows either way.
+TREND_BUCKETS = ("day", "week", "month")
+TREND_METRICS = database.ROLLUP_COUNTS
+TREND_BY = (None, "dept", "block")
+
+
+def refresh_daily_stats():
+    """Roll new logs and leave requests into daily_stats. Returns (logs, requests) added."""
+    with db.connection() as conn:
+        behind = conn.execute("""
+            SELECT COALESCE((SELECT last_id FROM watermarks WHERE name = 'curfew'), 0)
+                       > COALESCE((SELECT last_id FROM watermarks WHERE name = 'rollup:entry_logs'), 0)
+                OR COALESCE((SELECT MAX(request_id) FROM leave_requests), 0)
+                       > COALESCE((SELECT last_id FROM watermarks WHERE name = 'rollup:leave_requests'), 0)
+        """).fetchone()[0]
+    if not behind:
+        return 0, 0
+    with db.transaction() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        return database.roll_up(conn)
+
+
+def rebuild_daily_stats():
+    with db.transaction() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        return database.rebuild_daily_stats(conn)
+
+
+def trend(metrics=("check_ins",), bucket="day", date_from=None, date_to=None, dept=None, block=None, by=None):
+    """(period, [dept or block,] metric sums...) from daily_stats only."""
+    if bucket not in TREND_BUCKETS:
+        raise ValueError(f"Unknown bucket {bucket!r}; choose one of {TREND_BUCKETS}")
+    if by not in TREND_BY:
+        raise ValueError(f"by must be one of {TREND_BY}, got {by!r}")
+    metrics = [metrics] if isinstance(metrics, str) else list(metrics)
+    unknown = [m for m in metrics if m not in TREND_METRICS]
+    if unknown or not metrics:
+        raise ValueError(f"Unknown metrics {unknown}; choose from {TREND_METRICS}")
+    where, params = [], []
+    if date_from is not None:
+        where.append("day >= ?")
+        params.append(str(date_from))
+    if date_to is not None:
+        where.append("day <= ?")
+        params.append(str(date_to))
+    for col, value in (("dept", dept), ("block", block)):
+        if value is not None:
+            where.append(f"{col} = ?")
+            params.append(value)
+    group = "p" + (f", {by}" if by else "")
+    with db.connection() as conn:
+        return conn.execute(f"""
+            SELECT {_bucket(bucket, "day")} AS p{f", {by}" if by else ""}, {", ".join(f"SUM({m})" for m in metrics)}
+            FROM daily_stats{_where(where)}
+            GROUP BY {group} ORDER BY {group}
+        """, params).fetchall()
+
+
+perf.instrument(globals(), "stats")
@@ -0,0 +1,21 @@
+import pytest
+
+import bench
+
+pytest.importorskip("streamlit.testing.v1")
+
+
+def test_pages_start_within_budget():
+    startup = bench.app_startup(("dashboard", "medical", "analytics"), reruns=3)
+    assert bench.over_budget(startup) == []
+    assert startup["medical"]["loaded"] == []  # no tables or charts on an empty hostel
+    assert "plotly.express" in startup["analytics"]["loaded"]
+
+
+def test_over_budget_reports_each_problem():
+    fine = {"cold_ms": 10.0, "rerun": {"p50_ms": 1.0}, "loaded": [], "errors": []}
+    slow = {"cold_ms": bench.STARTUP_BUDGET_MS + 1, "rerun": {"p50_ms": bench.RERUN_BUDGET_MS + 1},
+            "loaded": ["plotly.express"], "errors": []}
+    assert bench.over_budget({"analytics": fine, "medical": dict(fine, loaded=["plotly.express"])}) == [
+        ("medical", "imports plotly without drawing a chart")]
+    assert [page for page, _ in bench.over_budget({"logs": slow})] == ["logs"] * 3
@@ -0,0 +1,92 @@
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+import backend
+import backup
+import db
+
+
+@pytest.fixture
+def seeded(seeded, tmp_path, monkeypatch):
+    monkeypatch.setattr(backup, "BACKUP_DIR", str(tmp_path / "backups"))
+    yield seeded
+    db.configure_replica(None)
+
+
+def _names():
+    with db.connection() as conn:
+        return [r[0] for r in conn.execute("SELECT name FROM students ORDER BY id")]
+
+
+def test_snapshot_restore_round_trip(seeded):
+    path = backup.snapshot(now=datetime(2025, 11, 14, 2, 0))
+    assert path.endswith("hostel-20251114-020000.db")
+    assert backup.verify(path) == []
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+
+    backend.add_student("Rohan Iyer", "ME", 1, "", "", "", "A-102")
+    backend.delete_student(1)
+    assert _names() == ["Priya Patel", "Isha Verma", "Rohan Iyer"]
+
+    safety = backup.restore(path)
+    assert _names() == ["Aarav Sharma", "Priya Patel", "Isha Verma"]
+    assert backup.verify(safety) == []
+    backup.restore(safety)
+    assert _names() == ["Priya Patel", "Isha Verma", "Rohan Iyer"]
+
+
+def test_rotation_keeps_the_newest(seeded):
+    start = datetime(2025, 11, 1)
+    for day in range(5):
+        backup.snapshot(keep=3, now=start + timedelta(days=day))
+    taken = [t for _, t, _ in backup.snapshots()]
+    assert taken == [start + timedelta(days=d) for d in (4, 3, 2)]
+    assert backup.latest() == backup.snapshots()[0][0]
+
+
+def test_damaged_snapshots_are_refused(seeded, tmp_path):
+    path = backup.snapshot(now=datetime(2025, 11, 14))
+    with open(path, "r+b") as f:
+        f.seek(200)
+        f.write(b"\xff" * 4096)
+    assert backup.verify(path)
+    with pytest.raises(ValueError):
+        backup.restore(path)
+    (tmp_path / "notes.db").write_bytes(b"not a database")
+    assert backup.verify(str(tmp_path / "notes.db"))
+    assert _names() == ["Aarav Sharma", "Priya Patel", "Isha Verma"]
+
+
+def test_snapshot_while_writers_keep_going(seeded, monkeypatch):
+    monkeypatch.setattr(backup, "PAGES_PER_STEP", 1)
+    stop = threading.Event()
+
+    def writer():
+        while not stop.is_set():
+            backend.add_entry(1)
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        path = backup.snapshot(now=datetime(2025, 11, 14))
+    finally:
+        stop.set()
+        thread.join()
+    assert backup.verify(path) == []
+
+
+def test_replica_serves_reads_from_the_snapshot(seeded):
+    backup.snapshot(now=datetime(2025, 11, 14))
+    backend.add_student("Rohan Iyer", "ME", 1, "", "", "", "A-102")
+    path, taken = backup.use_latest()
+    assert taken == datetime(2025, 11, 14)
+    with db.from_replica() as replica:
+        assert replica == path
+        assert backend.stats.totals()["students"] == 3
+        with pytest.raises(sqlite3.OperationalError):
+            backend.add_student("Diya Nair", "IT", 1, "", "", "", "B-203")
+    assert backend.stats.totals()["students"] == 4
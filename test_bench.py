@@ -0,0 +1,20 @@
+import bench
+
+
+def test_tiny_run_reports_every_function_and_page():
+    result = bench.run("tiny", readers=2, writers=1, duration=0.3, budget=0.01)
+
+    assert result["meta"]["entry_logs"] == bench.SCALES["tiny"][1]
+    assert set(result["pages"]) == set(bench.page_loads())
+    assert "add_entry" in result["functions"] and "stats.movements" in result["functions"]
+    for timing in list(result["functions"].values()) + list(result["pages"].values()):
+        assert timing["runs"] >= bench.MIN_RUNS
+        assert timing["p50_ms"] <= timing["p99_ms"] <= timing["max_ms"]
+    assert result["concurrent"]["error_count"] == 0
+    assert result["concurrent"]["writes_per_s"] > 0
+
+
+def test_compare_flags_slower_p50():
+    baseline = {"functions": {"a": {"p50_ms": 1.0}, "b": {"p50_ms": 1.0}}, "pages": {}}
+    result = {"functions": {"a": {"p50_ms": 1.1}, "b": {"p50_ms": 2.0}, "c": {"p50_ms": 9.0}}, "pages": {}}
+    assert bench.compare(result, baseline, threshold=0.2) == [("functions", "b", 1.0, 2.0)]
@@ -0,0 +1,42 @@
+import backend
+
+STUDENT = ("Aarav Sharma", "CSE", 2, "9876543210", "Ramesh Sharma", "9123456789", "A-101")
+
+
+def test_add_students_bulk_returns_ids_and_skips_bad_rows(hostel_db):
+    rows = [
+        STUDENT,
+        ("", "ECE", 3, "", "", "", "B-202"),
+        {"name": "Priya Patel", "dept": "ECE", "year": "3", "contact": "", "guardian": "",
+         "guardian_contact": "", "room_no": "B-202"},
+        ("Too", "Few", 1),
+    ]
+    ids, errors = backend.add_students_bulk(rows, chunk_size=2)
+    assert ids == [1, 2]
+    assert [e[0] for e in errors] == [1, 3]
+    assert [s[1] for s in backend.view_students()] == ["Aarav Sharma", "Priya Patel"]
+
+
+def test_add_entries_bulk_in_one_transaction(hostel_db):
+    backend.add_students_bulk([STUDENT[:-1] + (None,)] * 3)
+    swipes = ((1 + i % 3, f"2025-11-13 08:{i % 60:02d}:00") for i in range(1000))
+    ids, errors = backend.add_entries_bulk(swipes, chunk_size=None)
+    assert errors == []
+    assert ids == list(range(1, 1001))
+    assert len(backend.view_logs()) == 1000
+
+
+def test_add_entries_bulk_reports_invalid_rows(hostel_db):
+    backend.add_student(*STUDENT)
+    backend.add_entry(1)
+    rows = [
+        (1,),
+        (99,),
+        (1, "yesterday"),
+        ("1",),
+        {"student_id": 1, "exit_time": "2025-11-13 21:00:00"},
+    ]
+    ids, errors = backend.add_entries_bulk(rows, chunk_size=3)
+    assert ids == [2, 3]
+    assert [e[0] for e in errors] == [1, 2, 3]
+    assert "unknown student_id" in errors[0][2]
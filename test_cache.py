@@ -0,0 +1,78 @@
+import sqlite3
+
+import backend
+import cache
+
+STUDENT = ("Aarav Sharma", "CSE", 2, "9876543210", "Ramesh Sharma", "9123456789", "A-101")
+
+
+def _counting_loader(calls, fn):
+    def loader():
+        calls.append(1)
+        return fn()
+    return loader
+
+
+def test_reused_until_table_written(hostel_db):
+    c = cache.TableCache()
+    calls = []
+    load = _counting_loader(calls, backend.view_students)
+    assert c.get("students", ("students",), load) == []
+    assert c.get("students", ("students",), load) == []
+    assert len(calls) == 1
+
+    backend.add_student(*STUDENT)
+    assert len(c.get("students", ("students",), load)) == 1
+    assert len(calls) == 2
+    assert c.stats()["hits"] == 1
+
+
+def test_only_dependent_tables_invalidate(hostel_db):
+    backend.add_student(*STUDENT)
+    c = cache.TableCache()
+    calls = []
+    load = _counting_loader(calls, backend.view_students)
+    c.get("students", ("students",), load)
+    backend.add_entry(1)
+    backend.add_leave_request(1, "2025-11-13", "2025-11-15", "Diwali")
+    c.get("students", ("students",), load)
+    assert len(calls) == 1
+
+    backend.delete_student(1)
+    assert c.get("students", ("students",), load) == []
+    assert len(calls) == 2
+
+
+def test_writes_from_other_processes_invalidate(hostel_db):
+    c = cache.TableCache()
+    calls = []
+    load = _counting_loader(calls, backend.view_students)
+    c.get("students", ("students",), load)
+    other = sqlite3.connect(hostel_db)  # e.g. a CLI or the gate service
+    with other:
+        other.execute("INSERT INTO students (name, dept, year) VALUES ('Priya Patel', 'ECE', 3)")
+    other.close()
+    assert len(c.get("students", ("students",), load)) == 1
+    assert len(calls) == 2
+
+
+def test_ttl_expires_entries(hostel_db):
+    c = cache.TableCache(ttl=0)
+    calls = []
+    load = _counting_loader(calls, backend.view_students)
+    c.get("students", ("students",), load)
+    c.get("students", ("students",), load)
+    assert len(calls) == 2
+
+
+def test_memory_cap_evicts_least_recently_used():
+    c = cache.TableCache(max_bytes=2000)
+    calls = []
+    load = _counting_loader(calls, lambda: list(range(20)))  # ~776 bytes each
+    c.get("a", (), load)
+    c.get("b", (), load)
+    c.get("a", (), load)  # hit; "b" is now the oldest
+    c.get("c", (), load)
+    assert len(calls) == 3
+    assert c.stats()["bytes"] <= 2000
+    assert list(c._entries) == ["a", "c"]
@@ -0,0 +1,103 @@
+import os
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+import backend
+import columnar
+import curfew
+import retention
+
+# 2025-10-02 and 2025-11-13 are Thursdays.
+LOGS = [
+    (1, "2025-10-02 18:00:00", "2025-10-02 18:00:00"),  # out
+    (1, "2025-10-02 21:00:00"),                         # back the same evening
+    (1, "2025-11-13 18:00:00", "2025-11-13 18:00:00"),  # out for two nights
+    (1, "2025-11-15 10:00:00"),
+    (2, "2025-11-13 09:00:00", "2025-11-13 09:00:00"),  # out, not back yet
+]
+
+
+@pytest.fixture
+def seeded(seeded, tmp_path, monkeypatch):
+    monkeypatch.setattr(columnar, "COLUMNAR_DIR", str(tmp_path / "columnar"))
+    monkeypatch.setattr(retention, "ARCHIVE_DIR", str(tmp_path / "archive"))
+    backend.add_entries_bulk(LOGS)
+    curfew.process_new()
+    return seeded
+
+
+def test_sync_appends_classified_rows(seeded):
+    assert columnar.sync() == 5
+    cols = columnar.load()
+    assert list(cols.log_id) == [1, 2, 3, 4, 5]
+    assert isinstance(cols.at, np.memmap) and cols.student_id.dtype == np.int32
+    assert cols.at[0] == int(datetime(2025, 10, 2, 18).timestamp() - datetime(1970, 1, 1).timestamp())
+    assert list(cols.out) == [1, 0, 1, 0, 1]
+
+    backend.add_entry(2, "2025-11-16 08:00:00")
+    assert columnar.sync() == 0  # not classified yet
+    curfew.process_new()
+    assert columnar.sync() == 1
+    cols = columnar.load()
+    assert len(cols) == 6 and columnar.STATUSES[cols.status[-1]] == "Overnight"
+
+    # A half-written append is cut off by the next one.
+    with open(os.path.join(columnar.store_dir(), "log_id.1.bin"), "ab") as f:
+        f.write(b"\x00" * 3)
+    backend.add_entry(1, "2025-11-17 08:00:00", "2025-11-17 08:00:00")
+    curfew.process_new()
+    assert columnar.sync() == 1
+    assert list(columnar.load().log_id) == [1, 2, 3, 4, 5, 6, 7]
+
+    df = columnar.frame(columnar.load())
+    assert str(df["at"].dtype) == "datetime64[s]" and df["status"].dtype == "category"
+    assert df["at"].iloc[0] == datetime(2025, 10, 2, 18)
+
+
+def test_at_is_the_time_of_the_movement(seeded):
+    columnar.sync()
+    # An old snapshot took entry_time for every row; it is rebuilt.
+    meta = columnar._read_meta(columnar.store_dir())
+    del meta["format"]
+    columnar._write_meta(columnar.store_dir(), meta)
+    # A check-out logged late: it happened at exit_time, not entry_time.
+    backend.add_entry(2, "2025-11-16 08:00:00", "2025-11-16 23:30:00")
+    curfew.process_new()
+    assert columnar.sync() == 6
+    cols = columnar.load()
+    assert cols.at[-1] - cols.at[0] == int((datetime(2025, 11, 16, 23, 30) - datetime(2025, 10, 2, 18)).total_seconds())
+    assert columnar.heatmap(cols, "out")[6, 23] == 1  # Sunday 23:00
+
+
+def test_heatmap_and_absence_streaks(seeded):
+    cols = columnar.current()
+    grid = columnar.heatmap(cols)
+    assert grid.shape == (7, 24) and grid.sum() == 3
+    assert grid[3, 18] == 2 and grid[3, 9] == 1
+    assert columnar.heatmap(cols, "in")[5, 10] == 1  # Saturday 10:00
+    assert columnar.heatmap(cols, date_from="2025-11-01").sum() == 2
+    with pytest.raises(ValueError):
+        columnar.heatmap(cols, "sideways")
+
+    now = datetime(2025, 11, 20, 12)
+    assert columnar.absence_streaks(cols, now=now) == [(2, 7, 1, 7), (1, 2, 1, 2)]
+    assert columnar.absence_streaks(cols, min_days=0, now=now)[1] == (1, 2, 2, 2)
+    assert columnar.absence_streaks(cols, date_to="2025-10-31", min_days=0, now=now) == [(1, 0, 1, 0)]
+
+
+def test_archived_and_reclassified_history(seeded):
+    columnar.sync()
+    retention.archive_logs(older_than_days=30, now=datetime(2025, 11, 25))
+    backend.add_entry(2, "2025-11-16 08:00:00")
+    curfew.process_new()
+    assert columnar.sync() == 1
+    assert len(columnar.load()) == 6  # archived rows stay in the snapshot
+
+    curfew.backfill()  # history re-classified: rebuilt from the archives and the live table
+    assert columnar.sync() == 6
+    cols = columnar.load()
+    assert list(cols.log_id) == [1, 2, 3, 4, 5, 6]
+    assert sorted(os.listdir(columnar.store_dir())) == sorted([f"{c}.2.bin" for c in columnar.COLUMNS]
+                                                              + ["meta.json"])
@@ -0,0 +1,89 @@
+from datetime import datetime
+
+import pytest
+
+import backend
+import curfew
+import db
+
+
+def _out(sid, ts):
+    return (sid, ts, ts)
+
+
+def _in(sid, ts):
+    return (sid, ts)
+
+
+def _statuses():
+    with db.connection() as conn:
+        return [r[0] for r in conn.execute("SELECT status FROM entry_logs ORDER BY log_id")]
+
+
+@pytest.fixture
+def seeded(seeded):
+    curfew.set_curfew("A", "21:00", "06:00")
+    return seeded
+
+
+def test_night_of_wraps_midnight():
+    window = (datetime.strptime("22:00", "%H:%M").time(), datetime.strptime("06:00", "%H:%M").time())
+    start, end = curfew.night_of(datetime(2025, 11, 14, 2, 0), window)
+    assert (start, end) == (datetime(2025, 11, 13, 22, 0), datetime(2025, 11, 14, 6, 0))
+    start, _ = curfew.night_of(datetime(2025, 11, 14, 12, 0), window)
+    assert start == datetime(2025, 11, 14, 22, 0)
+
+
+def test_classifies_by_block_window(seeded):
+    backend.add_entries_bulk([
+        _out(1, "2025-11-13 20:00:00"), _in(1, "2025-11-13 21:30:00"),  # A curfew 21:00 -> Late
+        _out(2, "2025-11-13 20:00:00"), _in(2, "2025-11-13 21:30:00"),  # default 22:00 -> On Time
+        _out(3, "2025-11-13 18:00:00"), _in(3, "2025-11-14 09:00:00"),  # Overnight
+        _out(2, "2025-11-14 23:00:00"),                                  # left during curfew
+    ])
+    assert curfew.process_new() == 7
+    assert _statuses() == ["On Time", "Late", "On Time", "On Time", "On Time", "Overnight", "Late"]
+    kinds = {(r[1], r[4]) for r in curfew.recent_alerts()}
+    assert kinds == {(1, "Late"), (3, "Overnight"), (2, "Late")}
+
+
+def test_approved_leave_covers_absence(seeded):
+    backend.add_leave_request(3, "2025-11-13", "2025-11-15", "Festival")
+    backend.update_leave_status(1, "Approved")
+    backend.add_entries_bulk([_out(3, "2025-11-13 10:00:00"), _in(3, "2025-11-15 12:00:00")])
+    curfew.process_new()
+    assert _statuses() == ["On Time", "On Leave"]
+    assert curfew.recent_alerts() == []
+
+
+def test_watermark_makes_runs_incremental(seeded):
+    backend.add_entries_bulk([_out(1, "2025-11-13 20:00:00")])
+    assert curfew.process_new() == 1
+    assert curfew.process_new() == 0
+    backend.add_entry(1, "2025-11-13 21:30:00")
+    assert curfew.process_new() == 1
+    assert _statuses() == ["On Time", "Late"]
+
+
+def test_backfill_reclassifies_history(seeded):
+    backend.add_entries_bulk([_out(2, "2025-11-13 20:00:00"), _in(2, "2025-11-13 21:30:00")])
+    curfew.process_new()
+    assert _statuses() == ["On Time", "On Time"]
+    curfew.set_curfew("B", "21:00", "06:00")
+    assert curfew.backfill() == 2
+    assert _statuses() == ["On Time", "Late"]
+    assert curfew.recent_alerts() == []
+
+
+def test_check_curfew_flags_students_still_out(seeded):
+    backend.add_entries_bulk([
+        _out(1, "2025-11-13 20:00:00"),   # A: out before 21:00, still out
+        _out(2, "2025-11-13 20:30:00"),   # B: curfew not passed yet at 21:30
+        _out(3, "2025-11-13 20:30:00"), _in(3, "2025-11-13 20:50:00"),
+    ])
+    raised = curfew.check_curfew(datetime(2025, 11, 13, 21, 30))
+    assert [r[0] for r in raised] == [1]
+    raised = curfew.check_curfew(datetime(2025, 11, 13, 22, 30))
+    assert [r[0] for r in raised] == [2]
+    assert curfew.check_curfew(datetime(2025, 11, 13, 23, 0)) == []
+    assert sorted(r[1] for r in curfew.recent_alerts() if r[4] == "Missed Curfew") == [1, 2]
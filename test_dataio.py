@@ -0,0 +1,116 @@
+import io
+
+import pytest
+
+import backend
+import curfew
+import dataio
+import leaves
+
+
+@pytest.fixture
+def seeded(seeded):
+    backend.add_entries_bulk([(1, "2025-11-13 08:00:00"), (2, "2025-11-13 09:00:00", "2025-11-13 09:00:00")])
+    backend.add_leave_request(1, "2025-11-13", "2025-11-15", "Diwali")
+    backend.add_medical_info(2, "O-", "Peanuts", "", "9090909090")
+    return seeded
+
+
+def test_csv_export_streams_every_table(seeded):
+    for table, expected in (("students", 3), ("entry_logs", 2), ("leave_requests", 1), ("medical_info", 1)):
+        out = io.BytesIO()
+        assert dataio.export_table(table, out) == expected
+        lines = out.getvalue().decode().splitlines()
+        assert lines[0].split(",") == list(dataio.TABLES[table])
+        assert len(lines) == expected + 1
+
+
+def test_csv_round_trip(seeded, tmp_path):
+    path = tmp_path / "students.csv"
+    dataio.export_table("students", path)
+    count, errors = dataio.import_table("students", path)
+    assert (count, errors) == (3, [])
+    names = [s[1] for s in backend.view_students()]
+    assert names == ["Aarav Sharma", "Priya Patel", "Isha Verma"] * 2
+
+
+def test_import_roster_and_logs_reports_bad_rows(hostel_db):
+    roster = io.BytesIO(
+        "name,dept,year,contact,guardian,guardian_contact,room_no\n"
+        "Aarav Sharma,CSE,2,,,,A-101\n"
+        ",ECE,3,,,,B-202\n"
+        "Isha Verma,CSE,seven,,,,A-104\n".encode()
+    )
+    count, errors = dataio.import_table("students", roster)
+    assert count == 1 and [e[0] for e in errors] == [1, 2]
+
+    logs = io.BytesIO(
+        "student_id,entry_time,exit_time,status\n"
+        "1,2025-11-13 20:00:00,2025-11-13 20:00:00,\n"
+        "1,2025-11-13 23:30:00,,\n"
+        "9,2025-11-13 23:30:00,,\n".encode()
+    )
+    count, errors = dataio.import_table("entry_logs", logs)
+    assert count == 2 and [e[0] for e in errors] == [2]
+    # Historical rows are classified without raising alerts.
+    assert [r[4] for r in backend.view_logs()] == ["On Time", "Late"]
+
+
+def test_import_leave_and_medical(seeded):
+    leaves = io.BytesIO(b"student_id,from_date,to_date,reason,status\n2,2025-12-01,2025-12-02,Trip,\n7,x,y,z,\n")
+    count, errors = dataio.import_table("leave_requests", leaves)
+    assert count == 1 and errors[0][2] == "unknown student_id 7"
+    assert backend.view_leave_requests()[-1][5] == "Pending"
+
+    medical = io.BytesIO(b"student_id,blood_group,allergies,conditions,emergency_contact\n2,AB+,,,\n")
+    assert dataio.import_table("medical_info", medical) == (1, [])
+    assert backend.view_medical_info(2)[1] == "AB+"
+
+
+def test_parquet_round_trip(seeded, tmp_path):
+    pytest.importorskip("pyarrow")
+    path = tmp_path / "logs.parquet"
+    assert dataio.export_table("entry_logs", path, "parquet") == 2
+    assert dataio.import_table("entry_logs", path, "parquet") == (2, [])
+    assert len(backend.view_logs()) == 4
+
+
+def test_log_import_leaves_live_rows_alerting(hostel_db, students):
+    backend.add_students_bulk(students)
+    backend.add_entry(2, "2025-11-14 23:30:00")  # a live gate row, not classified yet
+    logs = io.BytesIO(b"student_id,entry_time,exit_time,status\n1,2025-11-13 23:30:00,,\n")
+    assert dataio.import_table("entry_logs", logs) == (1, [])
+    assert [r[4] for r in backend.view_logs()] == ["Late", "Late"]
+    assert [(a[1], a[4]) for a in curfew.recent_alerts()] == [(2, "Late")]
+
+
+def test_log_import_is_not_alerted_on_between_chunks(hostel_db, students, monkeypatch):
+    monkeypatch.setattr(dataio, "CHUNK_SIZE", 2)
+    backend.add_students_bulk(students)
+
+    def history():
+        for day in range(10, 16):
+            if day == 14:
+                curfew.process_new()  # e.g. the gate service, while the import runs
+            yield {"student_id": "1", "entry_time": f"2025-11-{day} 23:30:00"}
+
+    assert dataio.import_records("entry_logs", history()) == (6, [])
+    assert {r[4] for r in backend.view_logs()} == {"Late"}
+    assert curfew.recent_alerts() == []
+
+
+def test_leave_import_checks_overlaps(seeded):
+    requests = io.BytesIO(
+        b"student_id,from_date,to_date,reason,status\n"
+        b"1,2025-11-14,2025-11-16,Overlaps the Diwali request,\n"
+        b"2,2025-12-01,2025-12-05,Trip,Approved\n"
+        b"2,2025-12-04,2025-12-06,Overlaps the trip,Approved\n"
+        b"2,2025-12-10,2025-12-08,Backwards,\n"
+        b"2,2025-12-04,2025-12-06,Turned down,Rejected\n"
+    )
+    count, errors = dataio.import_table("leave_requests", requests)
+    assert count == 2
+    assert [(i, reason) for i, _, reason in errors] == [
+        (0, "overlaps pending request #1"), (2, "overlaps approved request #2"),
+        (3, "Leave ends (2025-12-08) before it starts (2025-12-10)")]
+    assert [h[:2] for h in leaves.history(2)] == [(None, "Approved")]
@@ -0,0 +1,102 @@
+import sqlite3
+import threading
+
+import pytest
+
+import backend
+import db
+
+
+def test_pragmas_applied(hostel_db):
+    with db.connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        assert conn.execute("PRAGMA cache_size").fetchone()[0] == -db.CACHE_SIZE_KB
+
+
+def test_connections_are_reused(hostel_db):
+    pool = db.get_pool()
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+    assert first is second
+
+
+def test_failed_transaction_rolls_back(hostel_db):
+    with pytest.raises(RuntimeError):
+        with db.transaction() as conn:
+            conn.execute("INSERT INTO students (name) VALUES ('Ghost')")
+            raise RuntimeError("boom")
+    assert backend.view_students() == []
+
+
+def test_pool_is_bounded(tmp_path):
+    pool = db.ConnectionPool(str(tmp_path / "bounded.db"), size=1, timeout=0.05)
+    conn = pool.acquire()
+    try:
+        with pytest.raises(sqlite3.OperationalError):
+            pool.acquire()
+    finally:
+        pool.release(conn)
+        pool.close()
+
+
+def test_thread_scope_pins_one_connection_per_thread(tmp_path):
+    pool = db.ConnectionPool(str(tmp_path / "scoped.db"), scope="thread")
+    seen = []
+    together = threading.Barrier(3)
+
+    def worker():
+        with pool.connection() as a, pool.connection() as b:
+            seen.append((a is b, id(a)))
+            together.wait()
+
+    threads = [threading.Thread(target=worker) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    pool.close()
+    assert all(same for same, _ in seen)
+    assert len({conn_id for _, conn_id in seen}) == 3
+
+
+def test_backend_round_trip_through_pool(hostel_db):
+    backend.add_student("Aarav Sharma", "CSE", 2, "9876543210", "Ramesh Sharma", "9123456789", "A-101")
+    backend.add_entry(1)
+    backend.add_leave_request(1, "2025-11-13", "2025-11-15", "Diwali")
+    backend.update_leave_status(1, "Approved")
+    backend.add_medical_info(1, "B+", "Peanuts", "Asthma", "9876543210")
+
+    assert backend.view_students()[0][1] == "Aarav Sharma"
+    assert backend.view_logs()[0][4] == "On Time"
+    assert backend.view_leave_requests()[0][5] == "Approved"
+    assert backend.view_medical_info(1)[1] == "B+"
+
+    backend.delete_student(1)
+    assert backend.view_students() == []
+    assert backend.view_logs() == []
+
+
+def test_thread_scope_is_bounded_and_returns_connections(tmp_path):
+    pool = db.ConnectionPool(str(tmp_path / "scoped.db"), size=1, scope="thread", timeout=1)
+
+    def worker():
+        with pool.connection() as outer:
+            outer.execute("CREATE TABLE IF NOT EXISTS t (x)")
+            outer.execute("BEGIN")
+            outer.execute("INSERT INTO t VALUES (1)")
+            with pool.connection() as inner:
+                assert inner is outer
+            assert outer.in_transaction  # the inner block did not roll back
+            outer.commit()
+
+    for _ in range(3):  # one slot, yet each new thread gets it back from the one before
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+    assert len(pool._all) == 1 and pool._idle.qsize() == 1
+    with pool.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 3
+    pool.close()
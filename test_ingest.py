@@ -0,0 +1,164 @@
+import asyncio
+import json
+import sqlite3
+
+import pytest
+
+import backend
+import db
+import gate_ingest
+
+
+@pytest.fixture
+def spool(seeded, tmp_path):
+    return str(tmp_path / "ingest.spool")
+
+
+def _logs():
+    with db.connection() as conn:
+        return conn.execute("SELECT student_id, entry_time, exit_time FROM entry_logs ORDER BY log_id").fetchall()
+
+
+async def _request(port, method, path, payload=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode()
+                 + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    while (await reader.readline()) not in (b"\r\n", b""):
+        pass
+    data = json.loads(await reader.read())
+    writer.close()
+    return status, data
+
+
+def _run(service, scenario):
+    async def main():
+        servers = await service.start("127.0.0.1", 0)
+        port = servers[0].sockets[0].getsockname()[1]
+        try:
+            return await scenario(port)
+        finally:
+            await service.stop()
+    return asyncio.run(main())
+
+
+def test_events_are_committed_in_batches(spool):
+    service = gate_ingest.IngestService(spool, fsync=False)
+
+    async def scenario(port):
+        replies = await asyncio.gather(*(
+            _request(port, "POST", "/events", {"student_id": 1 + i % 2, "direction": "in" if i % 3 else "out",
+                                               "time": f"2025-11-13 18:{i:02d}:00"})
+            for i in range(40)))
+        await service.queue.join()
+        return replies, (await _request(port, "GET", "/metrics"))[1]
+
+    replies, metrics = _run(service, scenario)
+    assert {status for status, _ in replies} == {202}
+    assert len(_logs()) == 40
+    assert ("2025-11-13 18:00:00", "2025-11-13 18:00:00") in [r[1:] for r in _logs()]
+    assert metrics["committed"] == 40 and metrics["batches"] < 40
+    assert metrics["latency_p99_ms"] is not None
+    assert backend.presence_of(2) is not None
+
+
+def test_bad_events_are_rejected(spool):
+    service = gate_ingest.IngestService(spool, fsync=False)
+
+    async def scenario(port):
+        return [await _request(port, "POST", "/events", e) for e in (
+            {"student_id": "1", "direction": "in"},
+            {"student_id": 1, "direction": "sideways"},
+            {"student_id": 1, "direction": "in", "time": "13/11/2025"},
+        )] + [await _request(port, "GET", "/nope")]
+
+    assert [status for status, _ in _run(service, scenario)] == [400, 400, 400, 404]
+    assert _logs() == []
+
+
+def test_backpressure_answers_503(spool, monkeypatch):
+    monkeypatch.setattr(gate_ingest, "ENQUEUE_TIMEOUT", 0.05)
+    service = gate_ingest.IngestService(spool, queue_size=2, fsync=False)
+
+    async def scenario(port):
+        service._writer_task.cancel()  # nobody drains the queue
+        events = [{"student_id": 1, "direction": "in", "time": f"2025-11-13 18:0{i}:00"} for i in range(3)]
+        status, reply = await _request(port, "POST", "/events", events)
+        service._writer_task = asyncio.create_task(service._write_batches())
+        return status, reply
+
+    status, reply = _run(service, scenario)
+    assert (status, reply["accepted"]) == (503, 2)
+    assert len(_logs()) == 2
+    assert service.metrics.throttled == 1
+
+
+def test_spooled_events_survive_a_crash(spool):
+    # A previous run accepted three events; the first was committed (watermark 1).
+    with open(spool, "w") as f:
+        f.write(json.dumps([1, [1, "2025-11-13 18:00:00"]]) + "\n")
+        f.write(json.dumps([2, [2, "2025-11-13 18:05:00", "2025-11-13 18:05:00"]]) + "\n")
+        f.write(json.dumps([3, [1, "2025-11-13 18:10:00", "2025-11-13 18:10:00"]]) + "\n")
+        f.write('[4, [1, "2025-11')  # torn write, never acknowledged
+    with db.transaction() as conn:
+        conn.execute("INSERT INTO watermarks (name, last_id) VALUES ('ingest', 1)")
+    service = gate_ingest.IngestService(spool, fsync=False)
+
+    async def scenario(port):
+        status, _ = await _request(port, "POST", "/events", {"student_id": 2, "direction": "in",
+                                                             "time": "2025-11-13 19:00:00"})
+        await service.queue.join()
+        return status
+
+    assert _run(service, scenario) == 202
+    assert [r[1] for r in _logs()] == ["2025-11-13 18:05:00", "2025-11-13 18:10:00", "2025-11-13 19:00:00"]
+    assert service.metrics.replayed == 2
+    with db.connection() as conn:
+        assert conn.execute("SELECT last_id FROM watermarks WHERE name = 'ingest'").fetchone()[0] == 4
+    assert open(spool).read() == ""
+
+
+def test_failed_classification_is_not_retried_as_a_write(spool, monkeypatch):
+    calls = []
+
+    def locked():
+        calls.append(1)
+        if len(calls) == 1:
+            raise sqlite3.OperationalError("database is locked")
+        return real()
+
+    real = gate_ingest.curfew.process_new
+    monkeypatch.setattr(gate_ingest.curfew, "process_new", locked)
+    service = gate_ingest.IngestService(spool, fsync=False, linger=0)
+
+    async def scenario(port):
+        for minute in (0, 5):
+            await _request(port, "POST", "/events", {"student_id": 1, "direction": "in",
+                                                     "time": f"2025-11-13 18:0{minute}:00"})
+            await service.queue.join()
+
+    _run(service, scenario)
+    assert len(_logs()) == 2
+    assert service.metrics.classify_errors == 1 and service.metrics.commit_errors == 0
+    assert [r[4] for r in backend.view_logs()] == ["On Time", "On Time"]  # caught up by the second batch
+
+
+def test_writer_failure_stops_the_service(spool, monkeypatch):
+    def broken(conn, rows, offset=0):
+        raise RuntimeError("disk on fire")
+
+    monkeypatch.setattr(gate_ingest.backend, "insert_entries", broken)
+    service = gate_ingest.IngestService(spool, fsync=False)
+
+    async def scenario(port):
+        await _request(port, "POST", "/events", {"student_id": 1, "direction": "in"})
+        while service.failure is None:
+            await asyncio.sleep(0.01)
+        with pytest.raises(ConnectionError):
+            await _request(port, "GET", "/health")
+
+    _run(service, scenario)
+    assert str(service.failure) == "disk on fire"
+    assert _logs() == [] and len(open(spool).read().splitlines()) == 1  # still spooled
@@ -0,0 +1,87 @@
+import pytest
+
+import backend
+import database
+import db
+import leaves
+
+
+def _statuses():
+    return [r[5] for r in backend.view_leave_requests()]
+
+
+def test_overlapping_requests_are_refused(seeded):
+    first = leaves.request_leave(1, "2025-11-10", "2025-11-15", "Diwali")
+    with pytest.raises(ValueError, match=f"#{first}"):
+        leaves.request_leave(1, "2025-11-15", "2025-11-18", "Wedding")
+    with pytest.raises(ValueError):
+        leaves.request_leave(1, "2025-11-20", "2025-11-18", "Backwards")
+    # Adjacent dates and other students are fine; a rejected leave frees its dates.
+    leaves.request_leave(1, "2025-11-16", "2025-11-18", "Wedding")
+    leaves.request_leave(2, "2025-11-12", "2025-11-14", "Diwali")
+    leaves.set_status(first, "Rejected")
+    assert leaves.conflicts(1, "2025-11-10", "2025-11-12") == []
+    leaves.request_leave(1, "2025-11-10", "2025-11-12", "Diwali, shorter")
+    assert len(backend.view_leave_requests()) == 4
+
+
+def test_bulk_approval_by_filter(seeded):
+    leaves.request_leave(1, "2025-11-12", "2025-11-14", "Diwali at home")
+    leaves.request_leave(2, "2025-11-13", "2025-11-16", "diwali")
+    leaves.request_leave(3, "2025-12-20", "2025-12-28", "Diwali? no, winter break")
+    leaves.request_leave(3, "2025-11-01", "2025-11-02", "Medical")
+
+    changed, skipped = leaves.bulk_set_status("Approved", by="warden", note="festival",
+                                              reason="diwali", date_from="2025-11-10", date_to="2025-11-20")
+    assert (changed, skipped) == ([1, 2], [])
+    assert _statuses() == ["Approved", "Approved", "Pending", "Pending"]
+    assert [h[:4] for h in leaves.history(1)] == [(None, "Pending", None, None),
+                                                   ("Pending", "Approved", "warden", "festival")]
+
+    changed, _ = leaves.bulk_set_status("Rejected", dept="CSE")
+    assert changed == [4, 3]
+    assert _statuses() == ["Approved", "Approved", "Rejected", "Rejected"]
+
+
+def test_bulk_approval_skips_overlaps(seeded):
+    # Legacy rows written without checks can overlap each other.
+    for start, end in (("2025-11-10", "2025-11-12"), ("2025-11-11", "2025-11-13"), ("2025-11-14", "2025-11-15")):
+        backend.add_leave_request(1, start, end, "Diwali")
+    changed, skipped = leaves.bulk_set_status("Approved")
+    assert changed == [1, 3]
+    assert skipped == [(2, "overlaps a request approved in this batch")]
+    with pytest.raises(ValueError, match="#1"):
+        leaves.set_status(2, "Approved")
+
+
+def test_who_is_on_leave(seeded):
+    leaves.request_leave(1, "2025-11-12", "2025-11-14", "Diwali")
+    leaves.request_leave(2, "2025-11-13", "2025-11-16", "Diwali")
+    leaves.request_leave(3, "2025-11-13", "2025-11-13", "Exam")
+    leaves.bulk_set_status("Approved", request_ids=[1, 2])
+    assert [r[0] for r in leaves.on_leave("2025-11-13")] == [1, 2]
+    assert [r[0] for r in leaves.on_leave("2025-11-16")] == [2]
+    assert leaves.on_leave_count("2025-11-17") == 0
+
+    backend.update_leave_status(2, "Rejected")
+    assert leaves.on_leave("2025-11-16") == []
+    backend.delete_student(1)
+    with db.connection() as conn:
+        assert leaves.on_leave_ids(conn, "2025-11-13") == set()
+        assert conn.execute("SELECT COUNT(*) FROM leave_intervals").fetchone()[0] == 1
+        plan = " ".join(r[3] for r in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT student_lo FROM leave_intervals WHERE first_day <= ? AND last_day >= ?",
+            (0, 0)))
+    assert "VIRTUAL TABLE INDEX" in plan
+
+
+def test_interval_index_is_backfilled(hostel_db):
+    with db.transaction() as conn:
+        conn.execute("INSERT INTO students (name) VALUES ('Aarav Sharma')")
+        conn.execute("""
+            INSERT INTO leave_requests (student_id, from_date, to_date, reason, status)
+            VALUES (1, '2025-11-12', '2025-11-14', 'Diwali', 'Approved'), (1, 'soon', 'later', '?', 'Pending')
+        """)
+        conn.execute("DELETE FROM leave_intervals")
+        database._v10_leave_workflow(conn)
+    assert [r[0] for r in leaves.on_leave("2025-11-13")] == [1]
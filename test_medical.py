@@ -0,0 +1,137 @@
+import sqlite3
+
+import pytest
+from cryptography.exceptions import InvalidTag
+
+import backend
+import db
+import medical
+
+
+@pytest.fixture
+def seeded(seeded):
+    backend.add_medical_info(1, "O-", "Peanuts, dust", "Asthma", "9876543210", actor="nurse")
+    backend.add_medical_info(2, "o -ve", "penicillin", "", "9123456789")
+    backend.add_medical_info(3, "O NEG", "Peanuts", "", "9090909090")
+    return seeded
+
+
+def _raw(student_id):
+    with db.connection() as conn:
+        return conn.execute("SELECT * FROM medical_info WHERE student_id = ?", (student_id,)).fetchone()
+
+
+def test_fields_are_encrypted_at_rest(seeded):
+    raw = _raw(1)
+    assert all(isinstance(v, bytes) for v in raw[1:])
+    assert not any(b"Asthma" in v or b"Peanuts" in v for v in raw[1:])
+    assert backend.view_medical_info(1) == (1, "O-", "Peanuts, dust", "Asthma", "9876543210")
+
+    # A value moved onto another student does not decrypt as theirs.
+    with db.transaction() as conn:
+        conn.execute("UPDATE medical_info SET conditions = ? WHERE student_id = 2", (raw[3],))
+    with pytest.raises(InvalidTag):
+        backend.view_medical_info(2)
+
+    medical.configure(medical.new_key())
+    with pytest.raises(InvalidTag):
+        backend.view_medical_info(1)
+
+
+def test_access_is_logged_and_append_only(seeded):
+    backend.view_medical_info(1, actor="warden")
+    backend.view_medical_info(99, actor="warden")
+    log = medical.access_log()
+    assert [(r[2], r[3], r[4], r[5]) for r in log[:2]] == [("warden", "read", 99, "no record"),
+                                                         ("warden", "read", 1, None)]
+    assert [r[2:4] for r in medical.access_log(student_id=1)][-1] == ("nurse", "write")
+    with db.connection() as conn:
+        with pytest.raises(sqlite3.IntegrityError, match="append-only"):
+            conn.execute("DELETE FROM medical_access_log")
+        with pytest.raises(sqlite3.IntegrityError, match="append-only"):
+            conn.execute("UPDATE medical_access_log SET actor = 'nobody'")
+
+
+@pytest.mark.parametrize("students", [[
+    ("Aarav Sharma", "CSE", 2, "9000000001", "", "", "C-101"),
+    ("Priya Patel", "ECE", 3, "9000000002", "", "", "C-102"),
+    ("Isha Verma", "CSE", 2, "9000000003", "", "", "A-101"),
+]], ids=["blocks"])
+def test_emergency_lookup(seeded):
+    with db.transaction() as conn:  # a room written before the rooms table existed
+        conn.execute("UPDATE students SET room_no = 'c-109' WHERE id = 2")
+    assert [r[0] for r in medical.emergency("O-")] == [3, 1, 2]
+    assert medical.emergency("O-", block="C", actor="duty") == [
+        (1, "Aarav Sharma", "C-101", "9000000001", "O-", "9876543210"),
+        (2, "Priya Patel", "c-109", "9000000002", "o -ve", "9123456789"),
+    ]
+    assert [r[3:] for r in medical.access_log(limit=2)] == [("emergency", 2, "blood=O- allergy=- block=C"),
+                                                           ("emergency", 1, "blood=O- allergy=- block=C")]
+    assert [r[0] for r in medical.emergency(allergy="PEANUTS")] == [3, 1]
+    assert [r[0] for r in medical.emergency("O-", allergy="peanuts and dust")] == [1]
+    assert medical.emergency("AB+") == []
+    with pytest.raises(ValueError):
+        medical.emergency("Z+")
+    for nothing in ("none", "nil", "-", ","):
+        with pytest.raises(ValueError):
+            medical.emergency(allergy=nothing)
+    assert medical.access_log(limit=1)[0][4:] == (None, "blood=AB+ allergy=- block=*")
+    with db.connection() as conn:
+        plan = " ".join(r[3] for r in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT student_id FROM medical_tags WHERE tag = ?", (b"",)))
+    assert "PRIMARY KEY" in plan
+
+
+def test_tags_follow_updates_and_deletes(seeded):
+    backend.add_medical_info(3, "B+", "", "", "")
+    assert [r[0] for r in medical.emergency(allergy="peanuts")] == [1]
+    backend.delete_student(1)
+    assert medical.emergency(allergy="peanuts") == []
+    assert medical.access_log(student_id=1)  # the trail outlives the student
+
+
+def test_encrypt_existing_plaintext(hostel_db, students):
+    backend.add_students_bulk(students[:1])
+    with db.transaction() as conn:
+        conn.execute("INSERT INTO medical_info VALUES (1, 'B+', 'Latex', '', '9876543210')")
+    assert backend.view_medical_info(1) == (1, "B+", "Latex", "", "9876543210")
+
+    assert medical.encrypt_existing() == 1
+    assert isinstance(_raw(1)[1], bytes)
+    assert backend.view_medical_info(1) == (1, "B+", "Latex", "", "9876543210")
+    assert [r[0] for r in medical.emergency("B+", allergy="latex")] == [1]
+
+
+def test_plaintext_left_behind_is_encrypted_before_lookups(hostel_db, students, tmp_path, monkeypatch):
+    backend.add_students_bulk(students[:2])
+    with db.transaction() as conn:
+        conn.execute("INSERT INTO medical_info VALUES (1, 'B+', '', '', '')")
+    assert [r[0] for r in medical.emergency("B+")] == [1]
+    assert isinstance(_raw(1)[1], bytes)
+
+    with db.transaction() as conn:
+        conn.execute("INSERT INTO medical_info VALUES (2, 'O-', '', '', '')")
+    key = medical._configured_key
+    medical.configure(None)
+    monkeypatch.delenv(medical.KEY_ENV, raising=False)
+    monkeypatch.setattr(medical, "KEY_FILE", str(tmp_path / "missing.key"))
+    backend.init_db()  # no key: left for later
+    assert _raw(2)[1] == "O-"
+    medical.configure(key)
+    backend.init_db()
+    assert isinstance(_raw(2)[1], bytes)
+    assert medical.encrypt_existing() == 0
+
+
+def test_missing_key(hostel_db, students, monkeypatch, tmp_path):
+    medical.configure(None)
+    monkeypatch.delenv(medical.KEY_ENV, raising=False)
+    monkeypatch.setattr(medical, "KEY_FILE", str(tmp_path / "medical.key"))
+    backend.add_students_bulk(students[:1])
+    with pytest.raises(RuntimeError, match="init-key"):
+        backend.add_medical_info(1, "B+", "", "", "")
+    medical.create_key_file()
+    backend.add_medical_info(1, "B+", "", "", "")
+    assert backend.view_medical_info(1)[1] == "B+"
+    with pytest.raises(FileExistsError):
+        medical.create_key_file()
@@ -0,0 +1,197 @@
+import json
+import smtplib
+from datetime import datetime
+
+import pytest
+
+import backend
+import changefeed
+import db
+import leaves
+import notify
+import shards
+
+pytestmark = pytest.mark.parametrize("students", [[
+    ("Aarav Sharma", "CSE", 2, "", "Ramesh Sharma", "ramesh@example.com", "A-101"),
+    ("Priya Patel", "ECE", 3, "", "Suresh Patel", "", "B-202"),
+]], ids=["guardians"])
+
+
+def _alert(student_id, kind="Late", night="2025-11-13"):
+    with db.transaction() as conn:
+        conn.execute("""
+            INSERT INTO curfew_alerts (student_id, kind, night, log_id, raised_at)
+            VALUES (?, ?, ?, NULL, '2025-11-14 00:30:00')
+        """, (student_id, kind, night))
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class Flaky:
+    def __init__(self, failures):
+        self.failures = failures
+        self.batches = []
+
+    def send(self, batch):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionRefusedError("mail server down")
+        self.batches.append(batch)
+
+
+def test_feed_records_every_write(seeded):
+    start = changefeed.latest_seq()
+    backend.add_entry(1)
+    request_id = leaves.request_leave(2, "2025-11-13", "2025-11-15", "Diwali")
+    leaves.set_status(request_id, "Approved")
+    backend.update_student(1, contact="9998887777")
+    changes = changefeed.poll(start)
+    assert [c[1:4] for c in changes] == [
+        ("entry_logs", "insert", 1),
+        ("leave_requests", "insert", request_id),
+        ("leave_history", "insert", 1),
+        ("leave_requests", "update", request_id),
+        ("leave_history", "insert", 2),
+        ("students", "update", 1),
+    ]
+    assert [c[0] for c in changes] == sorted(c[0] for c in changes)
+    assert changefeed.poll(changes[2][0], limit=2) == changes[3:5]
+    assert [c[1] for c in changefeed.poll(start, tables=["students"])] == ["students"]
+
+    # Re-classifying a log to the status it already has is not a change.
+    with db.transaction() as conn:
+        conn.execute("UPDATE entry_logs SET status = status")
+    assert changefeed.latest_seq() == changes[-1][0]
+
+
+def test_prune_keeps_unread_changes(seeded):
+    changefeed.advance("slow", 1)
+    assert changefeed.prune(keep_days=0, now=datetime(2100, 1, 1)) == 1
+    assert changefeed.poll(0)[0][0] == 2
+    changefeed.advance("slow", changefeed.latest_seq())
+    changefeed.prune(keep_days=0, now=datetime(2100, 1, 1))
+    assert changefeed.poll(0) == []
+
+
+def test_dispatcher_sends_late_returns_and_approvals(seeded, tmp_path):
+    path = tmp_path / "notifications.jsonl"
+    dispatcher = notify.Dispatcher(notify.FileTransport(str(path)))
+    assert dispatcher.run_once() == 0  # student inserts are not news
+
+    _alert(1)
+    _alert(2, "Missed Curfew")
+    leaves.request_leave(1, "2025-11-13", "2025-11-15", "Diwali")
+    leaves.bulk_set_status("Approved")
+    assert dispatcher.run_once() == 4
+    sent = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [(n["kind"], n["to"]) for n in sent] == [
+        ("late_return", "ramesh@example.com"),
+        ("late_return", notify.SECURITY_CONTACT),
+        ("late_return", notify.SECURITY_CONTACT),
+        ("leave_approved", "ramesh@example.com"),
+    ]
+    assert sent[2]["subject"] == "Missed Curfew: Priya Patel (B-202)"
+
+    assert dispatcher.run_once() == 0
+    assert changefeed.cursor("notify") == changefeed.latest_seq()
+
+
+def test_guardians_without_an_email_address_are_skipped(seeded):
+    backend.update_student(1, guardian_contact="9123456789")
+    transport = Flaky(failures=0)
+    _alert(1)
+    leaves.request_leave(1, "2025-11-13", "2025-11-15", "Diwali")
+    leaves.bulk_set_status("Approved")
+    assert notify.Dispatcher(transport).run_once() == 1
+    assert [n["to"] for b in transport.batches for n in b] == [notify.SECURITY_CONTACT]
+
+
+def test_failed_delivery_is_retried_then_dead_lettered(seeded):
+    clock = FakeClock()
+    transport = Flaky(failures=2)
+    dead = Flaky(failures=0)
+    dispatcher = notify.Dispatcher(transport, retries=3, sleep=clock.sleep, clock=clock, dead_letter=dead)
+    _alert(1)
+    assert dispatcher.run_once() == 2
+    assert clock.sleeps == [1.0, 2.0]
+
+    transport.failures = 10
+    _alert(1, night="2025-11-14")
+    _alert(2, night="2025-11-14")
+    dispatcher.batch_size = 2
+    assert dispatcher.run_once() == 0  # both batches given up on, the dispatcher keeps going
+    assert dispatcher.failed == 3
+    assert [[n["error"] for n in b] for b in dead.batches] == [["mail server down"] * 2, ["mail server down"]]
+    assert changefeed.cursor("notify") == changefeed.latest_seq()
+
+
+def test_refused_recipient_only_dead_letters_its_own_message(seeded):
+    class Refusing(Flaky):
+        def send(self, batch):
+            if batch[0]["to"] == "ramesh@example.com":
+                raise smtplib.SMTPRecipientsRefused({"ramesh@example.com": (550, b"No such user")})
+            super().send(batch)
+
+    clock = FakeClock()
+    transport, dead = Refusing(failures=0), Flaky(failures=0)
+    dispatcher = notify.Dispatcher(transport, sleep=clock.sleep, clock=clock, dead_letter=dead)
+    _alert(1)
+    _alert(2)
+    assert dispatcher.run_once() == 2
+    assert [n["to"] for b in transport.batches for n in b] == [notify.SECURITY_CONTACT] * 2  # each sent once
+    assert [[n["to"] for n in b] for b in dead.batches] == [["ramesh@example.com"]]
+    assert clock.sleeps == [] and dispatcher.failed == 1
+
+
+def test_run_prunes_the_feed(seeded, monkeypatch):
+    clock = FakeClock()
+    pruned = []
+    monkeypatch.setattr(changefeed, "prune", lambda: pruned.append(clock.now))
+
+    def sleep(seconds):
+        if clock.now >= 7200:
+            raise KeyboardInterrupt
+        clock.sleep(seconds)
+
+    with pytest.raises(KeyboardInterrupt):
+        notify.Dispatcher(Flaky(failures=0), sleep=sleep, clock=clock).run(interval=600)
+    assert pruned == [0, 3600, 7200]
+
+
+def test_dispatcher_reads_its_own_hostel(seeded, tmp_path):
+    shards.configure({"girls-1": {"path": str(tmp_path / "girls-1.db"), "blocks": ["C"]}})
+    try:
+        shards.init_all()
+        with db.use("girls-1"):
+            backend.add_student("Meera Nair", "ME", 1, "", "Anil Nair", "anil@example.com", "C-101")
+            _alert(1)
+        _alert(1)  # hostel.db is not girls-1's business
+        transport = Flaky(failures=0)
+        assert notify.Dispatcher(transport, hostel="girls-1").run_once() == 2
+        assert {(n["hostel"], n["to"]) for b in transport.batches for n in b} == {
+            ("girls-1", "anil@example.com"), ("girls-1", notify.SECURITY_CONTACT)}
+        assert changefeed.cursor("notify") == 0
+    finally:
+        shards.configure({})
+
+
+def test_rate_limit(seeded):
+    clock = FakeClock()
+    transport = Flaky(failures=0)
+    dispatcher = notify.Dispatcher(transport, batch_size=10, rate_per_minute=2, sleep=clock.sleep, clock=clock)
+    for night in ("2025-11-13", "2025-11-14", "2025-11-15"):
+        _alert(1, night=night)
+    assert dispatcher.run_once() == 6
+    assert len(transport.batches) == 6
+    assert clock.now == pytest.approx(120)  # 2 a minute after the first burst
@@ -0,0 +1,75 @@
+import json
+import urllib.request
+
+import pytest
+
+import backend
+import perf
+
+
+@pytest.fixture
+def instrumented(hostel_db, monkeypatch):
+    perf.reset()
+    monkeypatch.setattr(perf, "ENABLED", True)
+    yield
+    perf.reset()
+
+
+def test_disabled_records_nothing(hostel_db, monkeypatch):
+    perf.reset()
+    monkeypatch.setattr(perf, "ENABLED", False)
+    backend.add_student("Aarav Sharma", "CSE", 2, "", "", "", "A-101")
+    backend.view_students()
+    assert perf.snapshot()["timers"] == {}
+
+
+def test_backend_calls_and_statements_are_timed(instrumented):
+    backend.add_students_bulk([("Aarav Sharma", "CSE", 2, "", "", "", "A-101"),
+                               ("Priya Patel", "ECE", 3, "", "", "", "B-202")])
+    backend.view_students()
+    backend.view_students()
+    backend.stats.totals()
+
+    timers = perf.snapshot()["timers"]
+    assert timers["backend.view_students"]["count"] == 2
+    assert timers["backend.view_students"]["rows"] == 4
+    assert timers["stats.totals"]["count"] == 1
+    assert timers["sql.INSERT_MANY"]["rows"] == 2
+    assert timers["sql.SELECT"]["count"] >= 3
+    assert "backend.bump_versions" not in timers
+    assert backend.view_students.__wrapped__.__name__ == "view_students"
+
+
+def test_slow_queries_keep_sql_and_params(instrumented, monkeypatch):
+    monkeypatch.setattr(perf, "SLOW_MS", 0)
+    backend.view_medical_info(42)
+    slow = [q for q in perf.snapshot()["slow_queries"] if "medical_info" in q["sql"]]
+    assert slow[0]["sql"] == "SELECT * FROM medical_info WHERE student_id=?"
+    assert slow[0]["params"] == "(42,)"
+
+
+def test_prometheus_and_json_endpoint(instrumented):
+    backend.view_students()
+    text = perf.prometheus()
+    assert 'hostel_call_seconds_count{name="backend.view_students"} 1' in text
+    assert 'hostel_call_seconds_bucket{name="backend.view_students",le="+Inf"} 1' in text
+
+    server = perf.serve(0)
+    try:
+        port = server.server_address[1]
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics.json") as response:
+            data = json.load(response)
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+            assert b"hostel_call_seconds_sum" in response.read()
+    finally:
+        server.shutdown()
+    assert data["timers"]["backend.view_students"]["count"] == 1
+
+
+def test_histogram_quantiles():
+    timer = perf.Timer()
+    for ms in [0.05] * 98 + [30, 700]:
+        timer.add(ms / 1000, 0)
+    assert timer.quantile(0.5) == 0.1
+    assert timer.quantile(0.99) == 50
+    assert timer.quantile(1.0) == pytest.approx(700)
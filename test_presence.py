@@ -0,0 +1,49 @@
+import pytest
+
+import backend
+import db
+
+
+@pytest.fixture
+def seeded(seeded):
+    backend.add_entry(1, "2025-11-13 18:00:00", "2025-11-13 18:00:00")  # out
+    backend.add_entry(2, "2025-11-13 19:00:00", "2025-11-13 19:00:00")  # out
+    backend.add_entry(2, "2025-11-13 21:30:00")                         # back in
+    backend.add_entry(3, "2025-11-13 23:15:00", "2025-11-13 23:15:00")  # out late
+    return seeded
+
+
+def test_presence_follows_log_writes(seeded):
+    assert backend.presence_of(1)[:2] == ("out", "2025-11-13 18:00:00")
+    assert backend.presence_of(2)[:2] == ("in", "2025-11-13 21:30:00")
+    assert [r[0] for r in backend.who_is_out()] == [1, 3]
+    assert [r[0] for r in backend.not_returned_by("2025-11-13 22:00:00")] == [1]
+    assert backend.headcount() == {"total": 3, "in": 1, "out": 2}
+
+
+def test_late_arriving_old_event_does_not_override(seeded):
+    backend.add_entries_bulk([(1, "2025-11-13 07:00:00")])
+    assert backend.presence_of(1)[0] == "out"
+
+
+def test_presence_cascades_with_student(seeded):
+    backend.delete_student(1)
+    assert backend.presence_of(1) is None
+    assert backend.headcount() == {"total": 2, "in": 1, "out": 1}
+
+
+def test_rebuild_matches_incremental_state(seeded):
+    with db.connection() as conn:
+        before = conn.execute("SELECT * FROM presence ORDER BY student_id").fetchall()
+        conn.execute("DELETE FROM presence")
+        conn.commit()
+    backend.rebuild_presence()
+    with db.connection() as conn:
+        assert conn.execute("SELECT * FROM presence ORDER BY student_id").fetchall() == before
+
+
+def test_headcount_queries_use_presence_index(seeded):
+    with db.connection() as conn:
+        plan = " | ".join(r[3] for r in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT student_id FROM presence WHERE state = 'out' AND since < ?", ("x",)))
+    assert "idx_presence_state_since" in plan
@@ -0,0 +1,65 @@
+import pytest
+
+import backend
+
+
+@pytest.fixture
+def seeded(seeded):
+    backend.add_entries_bulk(
+        (1 + i % 3, f"2025-11-{10 + i % 5:02d} 0{i % 10}:00:00", None, "Late" if i % 4 == 0 else "On Time")
+        for i in range(60)
+    )
+    backend.add_leave_request(1, "2025-11-01", "2025-11-05", "Festival")
+    backend.add_leave_request(2, "2025-11-04", "2025-11-08", "Medical")
+    backend.add_leave_request(3, "2025-11-20", "2025-11-22", "Festival")
+    backend.update_leave_status(2, "Approved")
+    return seeded
+
+
+def _all_pages(fetch, id_index=0, **kwargs):
+    rows, after = [], None
+    while True:
+        page = fetch(after_id=after, limit=7, **kwargs)
+        rows.extend(page)
+        if len(page) < 7:
+            return rows
+        after = page[-1][id_index]
+
+
+def test_keyset_pages_cover_every_row_once(seeded):
+    rows = _all_pages(backend.query_logs)
+    assert [r[0] for r in rows] == list(range(1, 61))
+
+
+def test_keyset_pages_follow_sort_key(seeded):
+    rows = _all_pages(backend.query_logs, sort="entry_time", descending=True)
+    keys = [(r[2], r[0]) for r in rows]
+    assert len(rows) == 60
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_log_filters(seeded):
+    rows = backend.query_logs(student_id=1, status="Late", limit=100)
+    assert rows and all(r[1] == 1 and r[4] == "Late" for r in rows)
+
+    rows = backend.query_logs(date_from="2025-11-11", date_to="2025-11-12", limit=100)
+    assert rows and all("2025-11-11" <= r[2][:10] <= "2025-11-12" for r in rows)
+
+    rows = backend.query_logs(dept="CSE", limit=100)
+    assert {r[1] for r in rows} == {1, 3}
+
+
+def test_leave_filters(seeded):
+    assert [r[0] for r in backend.query_leave_requests(date_from="2025-11-05", date_to="2025-11-06")] == [1, 2]
+    assert [r[0] for r in backend.query_leave_requests(status="Approved")] == [2]
+    assert [r[0] for r in backend.query_leave_requests(room_no="A-104")] == [3]
+
+
+def test_student_filters_and_sort(seeded):
+    assert [r[1] for r in backend.query_students(sort="name")] == ["Aarav Sharma", "Isha Verma", "Priya Patel"]
+    assert [r[0] for r in backend.query_students(dept="ECE", year=3)] == [2]
+
+
+def test_unknown_sort_key_rejected(seeded):
+    with pytest.raises(ValueError):
+        backend.query_logs(sort="status; DROP TABLE students")
@@ -0,0 +1,94 @@
+import os
+from datetime import datetime
+
+import pytest
+
+import backend
+import curfew
+import db
+import retention
+
+NOW = datetime(2025, 12, 15, 12, 0)
+
+
+@pytest.fixture
+def seeded(seeded, tmp_path, monkeypatch):
+    monkeypatch.setattr(retention, "ARCHIVE_DIR", str(tmp_path / "archive"))
+    rows = []
+    for month in ("2025-09", "2025-10", "2025-12"):
+        for day in ("05", "20"):
+            rows.append((1, f"{month}-{day} 18:00:00", f"{month}-{day} 18:00:00"))  # out
+            rows.append((1, f"{month}-{day} 23:30:00"))                              # back late
+            rows.append((2, f"{month}-{day} 09:00:00", f"{month}-{day} 09:00:00"))
+    backend.add_entries_bulk(rows)
+    curfew.process_new()
+    return seeded
+
+
+def _live_count():
+    with db.connection() as conn:
+        return conn.execute("SELECT COUNT(*) FROM entry_logs").fetchone()[0]
+
+
+def test_archives_closed_rows_by_month(seeded):
+    before = backend.stats.movements("month")
+    moved = retention.archive_logs(older_than_days=30, now=NOW)
+
+    assert moved == {"2025-09": 6, "2025-10": 6}
+    assert _live_count() == 6
+    assert [r[0] for r in retention.list_archives()] == ["2025-09", "2025-10"]
+    assert os.path.exists(retention.archive_path("2025-09"))
+    # Analytics read the summaries, so the totals do not change.
+    assert backend.stats.movements("month") == before
+    assert backend.stats.totals()["logs"] == 18
+    assert sum(n for _, n in backend.stats.late_returns("month")) == 6
+
+
+def test_rerun_is_a_no_op(seeded):
+    retention.archive_logs(older_than_days=30, now=NOW)
+    summary = backend.stats.movements("hour")
+    assert retention.archive_logs(older_than_days=30, now=NOW) == {}
+    assert backend.stats.movements("hour") == summary
+
+
+def test_open_and_unprocessed_rows_stay_live(seeded):
+    # Student 2's last movement is still their presence row.
+    backend.add_entry(2, "2025-09-25 08:00:00", "2025-09-25 08:00:00")
+    retention.archive_logs(older_than_days=30, now=NOW)
+    live = backend.query_logs(student_id=2, date_from="2025-09-25", date_to="2025-09-25")
+    assert [r[2] for r in live] == ["2025-09-25 08:00:00"]
+    with db.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM entry_logs WHERE entry_time < '2025-11'").fetchone()[0] == 1
+
+
+def test_rows_not_yet_rolled_up_stay_live(seeded, monkeypatch):
+    backend.stats.refresh_daily_stats()
+    # Classified but not counted in daily_stats yet (a rollup that lagged).
+    backend.add_entry(2, "2025-09-25 08:00:00", "2025-09-25 08:00:00")
+    backend.add_entry(2, "2025-09-25 10:00:00")
+    backend.add_entry(2, "2025-12-21 09:00:00", "2025-12-21 09:00:00")
+    curfew.process_new()
+    monkeypatch.setattr(backend.stats, "refresh_daily_stats", lambda: (0, 0))
+    assert retention.archive_logs(older_than_days=30, now=NOW) == {"2025-09": 6, "2025-10": 6}
+    with db.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM entry_logs WHERE entry_time < '2025-11'").fetchone()[0] == 2
+
+
+def test_query_logs_fans_out_over_archives(seeded):
+    expected = backend.query_logs(date_from="2025-09-01", date_to="2025-12-31", limit=100)
+    retention.archive_logs(older_than_days=30, now=NOW)
+
+    assert backend.query_logs(limit=100) == expected[-6:]  # no date range: live only
+    assert backend.query_logs(date_from="2025-09-01", date_to="2025-12-31", limit=100) == expected
+    assert backend.query_logs(date_from="2025-10-01", date_to="2025-10-31", student_id=2) == \
+        [r for r in expected if r[1] == 2 and r[2].startswith("2025-10")]
+
+    pages, after = [], None
+    while True:
+        page = backend.query_logs(date_from="2025-09-01", sort="entry_time", descending=True,
+                                  after_id=after, limit=4)
+        if not page:
+            break
+        pages += page
+        after = page[-1][0]
+    assert pages == sorted(expected, key=lambda r: (r[2], r[0]), reverse=True)
@@ -0,0 +1,105 @@
+from datetime import datetime
+
+import pytest
+
+import backend
+import columnar
+import curfew
+import db
+import leaves
+import retention
+
+
+@pytest.fixture
+def seeded(seeded, tmp_path, monkeypatch):
+    monkeypatch.setattr(retention, "ARCHIVE_DIR", str(tmp_path / "archive"))
+    rows = []
+    for day in ("2025-10-05", "2025-10-20", "2025-11-03"):
+        rows.append((1, f"{day} 18:00:00", f"{day} 18:00:00"))  # out
+        rows.append((1, f"{day} 23:30:00"))                     # back late
+        rows.append((2, f"{day} 09:00:00"))
+        rows.append((3, f"{day} 20:00:00"))
+    backend.add_entries_bulk(rows)
+    return seeded
+
+
+def _daily_stats():
+    with db.connection() as conn:
+        return conn.execute("SELECT * FROM daily_stats ORDER BY day, dept, block").fetchall()
+
+
+def test_incremental_refresh_matches_rebuild(seeded):
+    assert backend.stats.refresh_daily_stats() == (0, 0)  # nothing classified yet
+    curfew.process_new()
+    assert backend.stats.refresh_daily_stats() == (12, 0)
+    assert backend.stats.refresh_daily_stats() == (0, 0)
+
+    backend.add_entry(2)
+    leaves.request_leave(3, "2025-11-10", "2025-11-12", "Home")
+    assert backend.stats.refresh_daily_stats() == (0, 1)  # the new log waits for the curfew engine
+    curfew.process_new()
+    assert backend.stats.refresh_daily_stats() == (1, 0)
+
+    incremental = _daily_stats()
+    backend.stats.rebuild_daily_stats()
+    assert _daily_stats() == incremental
+
+
+def test_trends_by_bucket_dept_and_block(seeded):
+    curfew.process_new()
+    leaves.request_leave(1, "2025-10-21", "2025-10-23", "Fest")
+    backend.stats.refresh_daily_stats()
+
+    assert backend.stats.trend(("check_ins", "late"), "month") == [("2025-10", 6, 2), ("2025-11", 3, 1)]
+    assert backend.stats.trend("late", "month", by="dept") == [
+        ("2025-10", "CSE", 2), ("2025-10", "ECE", 0), ("2025-11", "CSE", 1), ("2025-11", "ECE", 0)]
+    assert backend.stats.trend("check_ins", "month", block="A", date_from="2025-11-01") == [("2025-11", 2)]
+    assert backend.stats.trend(("leave_requests", "leave_days"), "month", dept="CSE") == [("2025-10", 1, 3), ("2025-11", 0, 0)]
+    with pytest.raises(ValueError):
+        backend.stats.trend("late", "hour")
+    with pytest.raises(ValueError):
+        backend.stats.trend("students")
+
+
+def test_backfill_and_archiving_keep_the_rollup_right(seeded):
+    curfew.process_new()
+    retention.archive_logs(older_than_days=30, now=datetime(2025, 11, 25))  # rolls October up first
+    expected = [("2025-10", 6, 2, 2), ("2025-11", 3, 1, 1)]
+    assert backend.stats.trend(("check_ins", "check_outs", "late"), "month") == expected
+    backend.stats.rebuild_daily_stats()  # archived months come back from the summaries
+    assert backend.stats.trend(("check_ins", "check_outs", "late"), "month") == expected
+
+    curfew.set_curfew("A", "23:45", "06:00")
+    curfew.backfill()  # 23:30 is no longer late; archived nights keep their counts
+    assert backend.stats.trend("late", "month") == [("2025-10", 2), ("2025-11", 0)]
+
+
+def _paths_by_day(day):
+    """Check-outs on `day` according to each path that counts movements."""
+    cols = columnar.current()
+    return {
+        "movements": dict((b, outs) for b, _, outs in backend.stats.movements("day")).get(day, 0),
+        "daily_stats": dict(backend.stats.trend("check_outs")).get(day, 0),
+        "columnar": int(columnar.heatmap(cols, "out", date_from=day, date_to=day).sum()),
+    }
+
+
+def test_a_check_out_is_counted_on_the_same_day_everywhere(seeded, tmp_path, monkeypatch):
+    monkeypatch.setattr(columnar, "COLUMNAR_DIR", str(tmp_path / "columnar"))
+    # Logged just before midnight, out just after: the movement is on the 6th.
+    backend.add_entry(2, "2025-11-05 23:55:00", "2025-11-06 00:05:00")
+    curfew.process_new()
+    backend.stats.refresh_daily_stats()
+    assert _paths_by_day("2025-11-06") == {"movements": 1, "daily_stats": 1, "columnar": 1}
+    assert _paths_by_day("2025-11-05") == {"movements": 0, "daily_stats": 0, "columnar": 0}
+
+
+def test_archived_check_outs_keep_their_day(seeded, tmp_path, monkeypatch):
+    monkeypatch.setattr(columnar, "COLUMNAR_DIR", str(tmp_path / "columnar"))
+    backend.add_entry(2, "2025-10-05 23:55:00", "2025-10-06 00:05:00")
+    backend.add_entry(2, "2025-11-20 09:00:00")  # so the check-out is not their presence row
+    curfew.process_new()
+    retention.archive_logs(older_than_days=30, now=datetime(2025, 11, 25))
+    assert _paths_by_day("2025-10-06") == {"movements": 1, "daily_stats": 1, "columnar": 1}
+    backend.stats.rebuild_daily_stats()  # from the archived summaries
+    assert _paths_by_day("2025-10-06")["daily_stats"] == 1
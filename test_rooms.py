@@ -0,0 +1,152 @@
+import io
+import sqlite3
+import time
+
+import pytest
+
+import backend
+import dataio
+import db
+import rooms
+
+UNHOUSED = pytest.mark.parametrize("students", [[
+    ("Aarav Sharma", "CSE", 2, "", "", "", None, "M"),
+    ("Priya Patel", "ECE", 3, "", "", "", None, "F"),
+    ("Isha Verma", "CSE", 2, "", "", "", None, "F"),
+    ("Rohan Iyer", "CSE", 1, "", "", "", None, "M"),
+    ("Diya Nair", "ECE", 3, "", "", "", None, "F"),
+]], ids=["unhoused"])
+
+
+@pytest.fixture
+def seeded(seeded):
+    rooms.add_rooms([("A-101", 2), ("A-102", 2), ("B-201", 2), ("B-202", 3)])
+    rooms.set_block("A", "M")
+    rooms.set_block("B", "F")
+    return seeded
+
+
+def _occupied():
+    with db.connection() as conn:
+        return dict(conn.execute("SELECT room_no, occupied FROM rooms"))
+
+
+@UNHOUSED
+def test_allocate_respects_gender_and_groups(seeded):
+    placed, errors = rooms.allocate([1, 2, 3, 4, 5], together="dept")
+    assert errors == []
+    # The CSE men share; the ECE women share; the CSE woman is kept apart from them.
+    assert dict(placed) == {1: "A-101", 4: "A-101", 2: "B-201", 5: "B-201", 3: "B-202"}
+    assert backend.view_students()[0][7] == "A-101"
+    assert _occupied() == {"A-101": 2, "A-102": 0, "B-201": 2, "B-202": 1}
+    assert rooms.free_beds("A") == [("A-102", "A", 2)]
+    assert rooms.occupancy() == [("A", "M", 2, 4, 2, 2), ("B", "F", 2, 5, 3, 2)]
+
+
+@UNHOUSED
+def test_groups_fill_matching_rooms_first(seeded):
+    rooms.allocate([3])                   # CSE woman -> B-201
+    placed, _ = rooms.allocate([2, 5], together="dept")
+    assert dict(placed) == {2: "B-202", 5: "B-202"}
+
+
+@UNHOUSED
+def test_batch_reports_what_does_not_fit(seeded):
+    backend.add_students_bulk([(f"Extra {i}", "ME", 1, "", "", "", None) for i in range(5)])
+    for sid in range(6, 11):
+        backend.update_student(sid, gender="M")
+    placed, errors = rooms.allocate(range(1, 12))
+    assert len(placed) == 4 + 3   # men fill block A, women fit in block B
+    assert sorted(reason for _, reason in errors) == ["no free bed that fits"] * 3 + ["unknown student"]
+    again, errors = rooms.allocate([1])
+    assert again == [] and errors[0][1].startswith("already in")
+
+
+@UNHOUSED
+def test_capacity_cannot_be_exceeded(seeded):
+    rooms.allocate([1, 4])
+    with pytest.raises(sqlite3.IntegrityError):
+        with db.transaction() as conn:
+            conn.execute("INSERT INTO allocations VALUES (99, 'A-101', '')")
+            conn.execute("INSERT INTO allocations VALUES (98, 'A-101', '')")
+
+
+@UNHOUSED
+def test_transfer_vacate_and_delete(seeded):
+    rooms.allocate([1, 2, 4])
+    with pytest.raises(ValueError, match="F block"):
+        rooms.transfer(1, "B-202")
+    rooms.transfer(1, "A-102")
+    assert rooms.room_of(1) == "A-102"
+    assert backend.view_students()[0][7] == "A-102"
+    before = _occupied()
+    backend.delete_student(4)
+    assert sum(_occupied().values()) == sum(before.values()) - 1
+    assert rooms.vacate(2) and rooms.room_of(2) is None
+    assert backend.view_students()[1][7] is None
+    assert rooms.unallocated_students() == [2, 3, 5]
+
+
+def test_existing_rooms_are_migrated(tmp_path):
+    path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(path)
+    import database
+    database.migrate(conn, database.MIGRATIONS[:8])
+    conn.executemany("INSERT INTO students (name, room_no) VALUES (?, ?)",
+                     [("A", "A-101"), ("B", "A-101"), ("C", "A-101"), ("D", "B-7")])
+    conn.commit()
+    database.migrate(conn)
+    assert conn.execute("SELECT room_no, block, capacity, occupied FROM rooms ORDER BY room_no").fetchall() == \
+        [("A-101", "A", 3, 3), ("B-7", "B", 2, 1)]
+    conn.close()
+
+
+def test_semester_batch_is_fast(hostel_db):
+    backend.add_students_bulk([(f"S{i}", ("CSE", "ECE", "ME")[i % 3], 1 + i % 4, "", "", "", None)
+                               for i in range(3000)])
+    rooms.add_rooms([(f"{b}-{n}", 3) for b in "ABCD" for n in range(100, 351)])  # 1004 rooms of 3
+    started = time.perf_counter()
+    placed, errors = rooms.allocate(rooms.unallocated_students(), together="dept")
+    assert (len(placed), errors) == (3000, [])
+    assert time.perf_counter() - started < 5
+    with db.connection() as conn:
+        assert conn.execute("""
+            SELECT COUNT(*) FROM (SELECT a.room_no FROM allocations a JOIN students s ON s.id = a.student_id
+                                  GROUP BY a.room_no HAVING COUNT(DISTINCT s.dept) > 1)
+        """).fetchone()[0] == 0
+
+
+def test_student_writes_go_through_allocations(hostel_db):
+    backend.add_student("Aarav Sharma", "CSE", 2, "", "", "", "C-105")  # unknown room: created
+    rooms.add_rooms([("C-105", 1)])
+    assert _occupied() == {"C-105": 1}
+    with pytest.raises(ValueError, match="full"):
+        backend.add_student("Rohan Iyer", "ME", 1, "", "", "", "C-105")
+    ids, errors = backend.add_students_bulk([("Rohan Iyer", "ME", 1, "", "", "", "C-105"),
+                                             ("Isha Verma", "CSE", 2, "", "", "", "C-106")])
+    assert ids == [3] and errors[0][2] == "Room C-105 is full"
+    with pytest.raises(ValueError, match="full"):
+        backend.update_student(3, room_no="C-105")
+    backend.update_student(3, room_no="C-107")
+    assert rooms.room_of(3) == "C-107" and _occupied() == {"C-105": 1, "C-106": 0, "C-107": 1}
+    backend.update_student(3, room_no="")
+    assert rooms.room_of(3) is None and backend.view_students()[1][7] is None
+    with pytest.raises(ValueError, match="Unknown room"):
+        rooms.transfer(1, "Z-1")
+
+
+def test_students_can_be_added_straight_into_a_gendered_block(hostel_db):
+    rooms.add_rooms([("F-101", 2), ("F-102", 2)])
+    rooms.set_block("F", "F")
+    backend.add_student("Priya Patel", "ECE", 3, "", "", "", "F-101", gender="f")
+    with pytest.raises(ValueError, match="in a F block"):
+        backend.add_student("Rohan Iyer", "ME", 1, "", "", "", "F-101")
+    ids, errors = backend.add_students_bulk([("Meera Nair", "ME", 1, "", "", "", "F-102", "F"),
+                                             ("Arjun Rao", "CSE", 2, "", "", "", "F-102", "M"),
+                                             ("Kavya Iyer", "CSE", 2, "", "", "", None, "X")])
+    assert len(ids) == 1 and [e[2] for e in errors] == ["Room F-102 is in a F block",
+                                                        "gender must be M, F or blank, got 'X'"]
+    roster = io.BytesIO(b"name,dept,year,contact,guardian,guardian_contact,room_no,gender\n"
+                        b"Isha Verma,CSE,2,,,,F-102,F\n")
+    assert dataio.import_table("students", roster)[0] == 1
+    assert _occupied() == {"F-101": 1, "F-102": 2}
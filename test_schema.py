@@ -0,0 +1,112 @@
+import sqlite3
+
+import pytest
+
+import backend
+import database
+import db
+
+STUDENT = ("Aarav Sharma", "CSE", 2, "9876543210", "Ramesh Sharma", "9123456789", "A-101")
+
+
+def test_migrate_is_idempotent(hostel_db):
+    with db.connection() as conn:
+        assert database.current_version(conn) == database.MIGRATIONS[-1][0]
+        assert database.migrate(conn) == []
+
+
+def test_legacy_tables_are_merged(tmp_path):
+    path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(path)
+    database._v1_base_tables(conn)
+    conn.execute("INSERT INTO students (name) VALUES ('Existing')")
+    conn.execute("""CREATE TABLE Student(student_id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL,
+        department TEXT, year INTEGER, contact_no TEXT, guardian_name TEXT, guardian_contact TEXT, room_no TEXT)""")
+    conn.execute("""CREATE TABLE EntryLog(log_id INTEGER PRIMARY KEY AUTOINCREMENT, student_id INTEGER,
+        entry_time TEXT, exit_time TEXT, status TEXT)""")
+    conn.execute("""CREATE TABLE MedicalInfo(student_id INTEGER PRIMARY KEY, blood_group TEXT, allergies TEXT,
+        medical_conditions TEXT, emergency_contact TEXT)""")
+    conn.execute("""CREATE TABLE LeaveRequest(request_id INTEGER PRIMARY KEY AUTOINCREMENT, student_id INTEGER,
+        from_date TEXT, to_date TEXT, reason TEXT, status TEXT DEFAULT 'Pending')""")
+    conn.execute("INSERT INTO Student (name, department, room_no) VALUES ('Legacy', 'ME', 'C-103')")
+    conn.execute("INSERT INTO EntryLog (student_id, entry_time) VALUES (1, '2025-11-13 08:00:00')")
+    conn.execute("INSERT INTO MedicalInfo VALUES (1, 'O-', '', '', '')")
+    conn.execute("INSERT INTO LeaveRequest (student_id, from_date, to_date) VALUES (1, '2025-11-13', '2025-11-14')")
+    conn.commit()
+
+    database.migrate(conn)
+    assert conn.execute("SELECT id, name, dept FROM students ORDER BY id").fetchall() == [
+        (1, "Existing", None), (2, "Legacy", "ME")]
+    assert conn.execute("SELECT student_id FROM entry_logs").fetchall() == [(2,)]
+    assert conn.execute("SELECT student_id, blood_group FROM medical_info").fetchall() == [(2, "O-")]
+    assert conn.execute("SELECT student_id FROM leave_requests").fetchall() == [(2,)]
+    assert not database._table_exists(conn, "Student")
+    conn.close()
+
+
+def test_delete_student_cascades(hostel_db):
+    backend.add_student(*STUDENT)
+    backend.add_entry(1)
+    backend.add_leave_request(1, "2025-11-13", "2025-11-15", "Diwali")
+    backend.add_medical_info(1, "B+", "", "", "")
+    backend.delete_student(1)
+    with db.connection() as conn:
+        for table in ("entry_logs", "leave_requests", "medical_info"):
+            assert conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] == 0
+
+
+def test_foreign_keys_enforced(hostel_db):
+    with pytest.raises(sqlite3.IntegrityError):
+        backend.add_entry(404)
+
+
+# -------------------------------
+# EXPLAIN QUERY PLAN REGRESSIONS
+# -------------------------------
+# Each hot backend call is run with a trace hook to capture the SQL it
+# really sends; the plan for that SQL must use the named index.
+
+def _plans(fn, **kwargs):
+    statements = []
+    with db.connection() as conn:
+        conn.set_trace_callback(statements.append)
+    try:
+        # The pool hands idle connections back LIFO, so fn gets conn.
+        fn(**kwargs)
+    finally:
+        conn.set_trace_callback(None)
+    plans = []
+    with db.connection() as conn:
+        for sql in statements:
+            if sql.lstrip().upper().startswith(("SELECT", "DELETE", "UPDATE")):
+                rows = conn.execute("EXPLAIN QUERY PLAN " + sql).fetchall()
+                plans.append(" | ".join(r[3] for r in rows))
+    return plans
+
+
+@pytest.mark.parametrize("fn, kwargs, index", [
+    (backend.query_logs, {"student_id": 1}, "idx_entry_logs_student_time"),
+    (backend.query_logs, {"student_id": 1, "after_id": 1}, "idx_entry_logs_student_time"),
+    (backend.query_logs, {"date_from": "2025-11-01", "date_to": "2025-11-02", "sort": "entry_time"}, "idx_entry_logs_time"),
+    (backend.query_leave_requests, {"status": "Pending"}, "idx_leave_status_from"),
+    (backend.query_leave_requests, {"student_id": 1}, "idx_leave_student_from"),
+    (backend.query_students, {"room_no": "A-101"}, "idx_students_room"),
+    (backend.query_students, {"dept": "CSE"}, "idx_students_dept"),
+    (backend.query_logs, {"dept": "CSE"}, "idx_entry_logs_student_time"),
+    (backend.view_medical_info, {"student_id": 1}, "PRIMARY KEY"),
+    (backend.stats.movements, {"date_from": "2025-11-01", "date_to": "2025-11-02"}, "idx_entry_logs_moved_at"),
+])
+def test_hot_query_uses_index(hostel_db, fn, kwargs, index):
+    plans = _plans(fn, **kwargs)
+    assert plans and any(index in p for p in plans), plans
+
+
+def test_cascade_delete_uses_student_indexes(hostel_db):
+    backend.add_student(*STUDENT)
+    with db.connection() as conn:
+        plan = " | ".join(r[3] for r in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT 1 FROM entry_logs WHERE student_id=?", (1,)))
+        assert "idx_entry_logs_student_time" in plan
+        plan = " | ".join(r[3] for r in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT 1 FROM leave_requests WHERE student_id=?", (1,)))
+        assert "idx_leave_student_from" in plan
@@ -0,0 +1,45 @@
+import pytest
+
+import backend
+import db
+
+
+def _names(rows):
+    return [r[1] for r in rows]
+
+
+def test_prefix_and_field_matches(seeded):
+    backend.add_student("Aaradhya Iyer", "ME", 1, "9700000000", "Kumar Iyer", "9000000002", "C-301")
+    assert _names(backend.search_students("aar")) == ["Aarav Sharma", "Aaradhya Iyer"]
+    assert _names(backend.search_students("isha cse")) == ["Isha Verma"]
+    assert _names(backend.search_students("B-202")) == ["Priya Patel"]
+    assert _names(backend.search_students("98123")) == ["Isha Verma"]
+    # Name hits outrank a guardian-only hit.
+    assert _names(backend.search_students("sharma")) == ["Aarav Sharma"]
+    assert backend.search_students("   ") == []
+
+
+def test_id_lookup_comes_first(seeded):
+    assert backend.search_students("3")[0][:2] == (3, "Isha Verma")
+
+
+def test_typos_still_match(seeded):
+    assert _names(backend.search_students("Pryia Patle"))[0] == "Priya Patel"
+    assert _names(backend.search_students("verna"))[0] == "Isha Verma"
+    assert backend.search_students("zzzz") == []
+
+
+def test_index_follows_updates_and_deletes(seeded):
+    backend.update_student(2, name="Priyanka Patel")
+    assert _names(backend.search_students("priyanka")) == ["Priyanka Patel"]
+    backend.delete_student(2)
+    assert backend.search_students("patel") == []
+    backend.add_student("Kabir Khan", "IT", 4, "", "", "", "D-401")
+    assert _names(backend.search_students("kab")) == ["Kabir Khan"]
+    with db.connection() as conn:
+        conn.execute("INSERT INTO students_fts(students_fts) VALUES ('integrity-check')")
+
+
+def test_limit(seeded):
+    backend.add_students_bulk([(f"Student {i}", "CSE", 1, "", "", "", f"A-{i}") for i in range(30)])
+    assert len(backend.search_students("student", limit=5)) == 5
@@ -0,0 +1,107 @@
+import threading
+
+import pytest
+
+import backend
+import cache
+import db
+import shards
+
+
+@pytest.fixture
+def campus(hostel_db, tmp_path):
+    shards.configure({
+        "boys-1": {"path": str(tmp_path / "boys-1.db"), "blocks": ["A", "b"]},
+        "girls-1": {"path": str(tmp_path / "girls-1.db"), "blocks": ["C"]},
+    })
+    shards.init_all()
+    yield
+    shards.configure({})
+
+
+def _add(name, dept, room_no):
+    with shards.route(room_no=room_no):
+        backend.add_student(name, dept, 2, "", "", "", room_no)
+
+
+def test_calls_are_routed_by_block(campus):
+    _add("Aarav Sharma", "CSE", "A-101")
+    _add("Rohan Iyer", "ME", "B-201")
+    _add("Priya Patel", "ECE", "C-101")
+    assert shards.hostels() == ["boys-1", "girls-1"]
+    with shards.route("boys-1"):
+        assert [s[1] for s in backend.view_students()] == ["Aarav Sharma", "Rohan Iyer"]
+    with shards.route(block="c") as hostel_id:
+        assert hostel_id == "girls-1"
+        assert [(s[0], s[1]) for s in backend.view_students()] == [(1, "Priya Patel")]  # ids are per hostel
+    assert backend.view_students() == []  # the default database is untouched
+    with pytest.raises(ValueError):
+        shards.hostel_of("Z-1")
+    with pytest.raises(ValueError):
+        shards.configure({"x": {"path": "x.db", "blocks": ["A"]}, "y": {"path": "y.db", "blocks": ["A"]}})
+
+
+def test_campus_figures_merge_every_hostel(campus):
+    _add("Aarav Sharma", "CSE", "A-101")
+    _add("Rohan Iyer", "ME", "A-102")
+    _add("Priya Patel", "CSE", "C-101")
+    for hostel_id, times in (("boys-1", ["2025-11-13 23:00:00", "2025-11-14 23:30:00"]),
+                             ("girls-1", ["2025-11-13 23:10:00"])):
+        with shards.route(hostel_id), db.transaction() as conn:
+            conn.executemany("INSERT INTO entry_logs (student_id, entry_time, status) VALUES (1, ?, 'Late')",
+                             [(t,) for t in times])
+
+    totals = shards.campus_totals()
+    assert (totals["students"], totals["logs"], totals["departments"]) == (3, 3, 2)
+    assert shards.campus_students_by_dept() == [("CSE", 2), ("ME", 1)]
+    assert shards.campus_late_returns("day") == [("2025-11-13", 2), ("2025-11-14", 1)]
+    assert shards.campus_headcount() == {"total": 3, "in": 3, "out": 0}
+    assert shards.by_hostel() == [("boys-1", 2, 2, 0), ("girls-1", 1, 1, 0)]
+
+
+def test_hostels_are_written_concurrently(campus):
+    locked, release = threading.Event(), threading.Event()
+
+    def hold_boys_write_lock():
+        with shards.route("boys-1"), db.transaction() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            locked.set()
+            release.wait(5)
+
+    holder = threading.Thread(target=hold_boys_write_lock)
+    holder.start()
+    try:
+        assert locked.wait(5)
+        assert db.current_hostel() is None  # the other thread's route() is not ours
+        _add("Priya Patel", "ECE", "C-101")  # not blocked by the boys' hostel writer
+    finally:
+        release.set()
+        holder.join()
+    with shards.route("girls-1"):
+        assert len(backend.view_students()) == 1
+
+
+def test_cache_entries_are_per_hostel(campus):
+    _add("Aarav Sharma", "CSE", "A-101")
+    counts = {}
+    for hostel_id in shards.hostels():
+        with shards.route(hostel_id):
+            counts[hostel_id] = cache.get("count", ("students",), lambda: len(backend.view_students()))
+    assert counts == {"boys-1": 1, "girls-1": 0}
+
+
+def test_downloads_export_the_selected_hostel(campus, monkeypatch):
+    st = pytest.importorskip("streamlit")
+    import ui
+
+    buttons = {}
+    monkeypatch.setattr(st, "download_button", lambda *args, **kwargs: buttons.update(kwargs))
+    _add("Priya Patel", "ECE", "C-101")
+    with shards.route("girls-1"):
+        ui.download_button("students", "Students")
+    # Streamlit builds the file on a thread of its own, with no hostel selected.
+    out = []
+    worker = threading.Thread(target=lambda: out.append(buttons["data"]().read().decode()))
+    worker.start()
+    worker.join()
+    assert "Priya Patel" in out[0]
@@ -0,0 +1,47 @@
+import pytest
+
+import backend
+
+
+@pytest.fixture
+def seeded(seeded):
+    backend.add_entries_bulk([
+        (1, "2025-11-13 08:05:00"),
+        (1, "2025-11-13 08:40:00", "2025-11-13 08:40:00"),
+        (2, "2025-11-13 09:10:00", None, "Late"),
+        (3, "2025-11-14 23:30:00", None, "Late"),
+    ])
+    leaves = ((1, "Approved"), (1, "Rejected"), (2, "Approved"), (3, "Pending"))
+    for request_id, (sid, status) in enumerate(leaves, 1):
+        backend.add_leave_request(sid, "2025-11-20", "2025-11-21", "Festival")
+        backend.update_leave_status(request_id, status)
+    return seeded
+
+
+def test_totals(seeded):
+    assert backend.stats.totals() == {
+        "students": 3, "logs": 4, "leaves": 4,
+        "pending_leaves": 1, "approved_leaves": 2, "departments": 2,
+    }
+
+
+def test_group_counts(seeded):
+    assert backend.stats.students_by_dept() == [("CSE", 2), ("ECE", 1)]
+    assert backend.stats.students_by_year() == [(2, 2), (3, 1)]
+    assert backend.stats.leaves_by_status() == [("Approved", 2), ("Pending", 1), ("Rejected", 1)]
+
+
+def test_time_buckets(seeded):
+    assert backend.stats.movements("hour") == [
+        ("2025-11-13 08:00", 1, 1), ("2025-11-13 09:00", 1, 0), ("2025-11-14 23:00", 1, 0)]
+    assert backend.stats.movements("day", date_to="2025-11-13") == [("2025-11-13", 2, 1)]
+    assert backend.stats.late_returns("day") == [("2025-11-13", 1), ("2025-11-14", 1)]
+    with pytest.raises(ValueError):
+        backend.stats.movements("fortnight")
+
+
+def test_leave_approval_by_dept(seeded):
+    assert backend.stats.leave_approval_by_dept() == [
+        ("CSE", 3, 1, 1, 1, 0.5),
+        ("ECE", 1, 1, 0, 0, 1.0),
+    ]
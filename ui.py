@@ -0,0 +1,132 @@
+from datetime import date
+
+import streamlit as st
+
+import backend
+import cache
+import dataio
+import db
+import perf
+
+# Shared pieces of the Streamlit pages. pandas is imported inside the helpers
+# that build DataFrames, so a page that shows no table never loads it;
+# plotly is only imported by the page modules that draw charts.
+
+# ------------------------------
+# STYLING
+# ------------------------------
+STYLE = """
+<style>
+@import url('https://fonts.googleapis.com/css2?family=Poppins:wght@300;400;500;600;700&display=swap');
+* { font-family: 'Poppins', sans-serif; }
+h1 { color: #1E293B; font-weight: 700; margin-bottom: 0.5rem; }
+h2, h3, h4 { color: #334155; font-weight: 600; }
+[data-testid="stSidebar"] { background: linear-gradient(180deg, #0F172A, #1E293B); }
+[data-testid="stSidebar"] [data-testid="stMarkdownContainer"] p { color: #E2E8F0; }
+.stButton>button {
+    background: linear-gradient(135deg, #3B82F6, #2563EB);
+    color: white; border-radius: 10px; padding: 10px 24px; border: none;
+    font-weight: 600; transition: all 0.3s ease; box-shadow: 0 4px 6px rgba(59,130,246,0.3);
+}
+.stButton>button:hover { background: linear-gradient(135deg, #2563EB, #1D4ED8);
+    box-shadow: 0 6px 12px rgba(59,130,246,0.4); transform: translateY(-2px);
+}
+.metric-card { background: #F8FAFC; border-radius: 16px; padding: 24px; border: 2px solid #E2E8F0;
+    box-shadow: 0 4px 12px rgba(0,0,0,0.08); }
+</style>
+"""
+
+# ------------------------------
+# TABLES AND CHARTS
+# ------------------------------
+# Cached results are shared between sessions and only rebuilt after a write
+# to the tables they were built from; treat them as read-only.
+def cached_stat(name, tables, *args):
+    with perf.timer(f"app.stat.{name}"):
+        return cache.get(("stats", name) + args, tables, lambda: getattr(backend.stats, name)(*args))
+
+def frame(rows, columns=None):
+    import pandas as pd
+    return pd.DataFrame(rows, columns=columns)
+
+def table(rows, columns=None, **kwargs):
+    st.dataframe(frame(rows, columns), use_container_width=True, **kwargs)
+
+# Builds and renders one Plotly chart under a perf timer.
+def chart(name, build):
+    with perf.timer(f"app.chart.{name}"):
+        st.plotly_chart(build(), use_container_width=True)
+
+# ------------------------------
+# PAGED TABLE HELPER
+# ------------------------------
+# Keeps the rows fetched so far in session_state and asks the backend for
+# one more keyset page only when "Load more" is clicked. Changing a filter
+# (or calling reset_paged_table after a write) starts again from page one.
+def paged_table(key, fetch, columns, filters):
+    state = st.session_state.get(key)
+    if state is None or state["filters"] != filters:
+        state = {"filters": filters, "rows": [], "done": False}
+        st.session_state[key] = state
+
+    def load_page():
+        after = state["rows"][-1][0] if state["rows"] else None
+        page = fetch(after_id=after, limit=backend.PAGE_SIZE, **filters)
+        state["rows"].extend(page)
+        state["done"] = len(page) < backend.PAGE_SIZE
+
+    if not state["rows"] and not state["done"]:
+        load_page()
+
+    if not state["rows"]:
+        st.info("No records found.")
+        return
+    table(state["rows"], columns)
+    if not state["done"] and st.button("⬇️ Load more", key=f"{key}_more"):
+        load_page()
+        st.rerun()
+
+def reset_paged_table(key):
+    st.session_state.pop(key, None)
+
+# ------------------------------
+# DOWNLOAD HELPER
+# ------------------------------
+# The export only runs when the button is clicked and streams the table
+# through a spooled temp file instead of building it in memory. Streamlit
+# calls it on another thread, outside the hostel selected for this run, so
+# the hostel is read now and selected again there.
+def _export_in(hostel, table):
+    with db.use(hostel):
+        return dataio.export_file(table)
+
+def download_button(table, label):
+    hostel = db.current_hostel()
+    st.download_button(
+        f"⬇️ Download {label} (CSV)",
+        data=lambda: _export_in(hostel, table),
+        file_name=f"{table}_{date.today()}.csv",
+        mime="text/csv",
+        key=f"download_{table}",
+        on_click="ignore",
+    )
+
+# ------------------------------
+# STUDENT PICKER
+# ------------------------------
+# Looks students up through the search index as the query is typed instead
+# of shipping every resident to the browser in one selectbox.
+def student_picker(key):
+    query = st.text_input("🔍 Find student", key=f"{key}_query",
+                          placeholder="Name, room, department, phone or ID").strip()
+    if not query:
+        st.caption("Start typing to pick a student.")
+        return None
+    with perf.timer("app.student_search"):
+        matches = cache.get(("search", query.lower()), ("students",),
+                            lambda: backend.search_students(query, limit=20))
+    if not matches:
+        st.warning("⚠️ No matching students.")
+        return None
+    labels = {f"{name} (ID {sid}) · {room or '-'} · {dept or '-'}": sid for sid, name, dept, room, _ in matches}
+    return labels[st.selectbox("Select Student", list(labels), key=f"{key}_choice")]